@@ -10,18 +10,24 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.freight_optimizer import FreightOptimizer
-from utils.data_loader import load_train_data, load_stations
+from models.freight_optimizer import FreightOptimizer, to_public
+from utils.data_loader import load_stations
+from utils.timetable_cache import load_cached_timetable
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
 
 # Load data once at startup
 print("Loading train data...")
-trains = load_train_data()
+timetable, timetable_cache_info = load_cached_timetable()
+trains = timetable.as_dicts()
 stations = load_stations()
 print(f"Loaded {len(trains)} trains and {len(stations)} stations")
 
+# One optimizer serves every request thread, so its gap index, routing
+# network and warm-start seeds stay warm between requests
+optimizer = FreightOptimizer(trains, stations)
+
 @app.route('/api/freight/optimize', methods=['POST'])
 def optimize_freight():
     """
@@ -31,14 +37,34 @@ def optimize_freight():
     {
         "num_trains": 30,
         "algorithm": "genetic",
-        "time_window_hours": 2
+        "time_window_hours": 2,
+        "islands": 8,               (algorithm "island" only)
+        "migration_interval": 10,   (algorithm "island" only)
+        "seed": 42,
+        "time_budget_ms": 300,
+        "stagnation_generations": 20,
+        "min_improvement": 0.5,
+        "warm_start": true          (genetic / vectorized / island)
     }
+    
+    The response reports generations_completed and stop_reason
+    ("max_generations", "time_budget", "stagnation" or "completed"; for
+    "cpsat": "optimal", "time_limit" or "fallback", with solver details
+    including the optimality gap under "solver"). Warm-started GA runs
+    report the number of seed chromosomes as warm_start_seeds.
     """
     try:
         data = request.get_json() or {}
         num_trains = data.get('num_trains', 10)
         algorithm = data.get('algorithm', 'genetic')
         time_window_hours = data.get('time_window_hours', None)
+        islands = data.get('islands', None)
+        migration_interval = data.get('migration_interval', None)
+        seed = data.get('seed', None)
+        time_budget_ms = data.get('time_budget_ms', None)
+        stagnation_generations = data.get('stagnation_generations', None)
+        min_improvement = data.get('min_improvement', None)
+        warm_start = data.get('warm_start', None)
         
         # Validate inputs
         if num_trains < 1 or num_trains > 100:
@@ -47,15 +73,61 @@ def optimize_freight():
                 'error': 'num_trains must be between 1 and 100'
             }), 400
         
-        if algorithm not in ['genetic', 'greedy']:
+        if algorithm not in ['genetic', 'vectorized', 'island', 'cpsat', 'greedy']:
+            return jsonify({
+                'success': False,
+                'error': 'algorithm must be "genetic", "vectorized", "island", "cpsat" or "greedy"'
+            }), 400
+        
+        if islands is not None and (not isinstance(islands, int) or islands < 1 or islands > 64):
+            return jsonify({
+                'success': False,
+                'error': 'islands must be between 1 and 64'
+            }), 400
+        
+        if migration_interval is not None and (not isinstance(migration_interval, int) or migration_interval < 1):
+            return jsonify({
+                'success': False,
+                'error': 'migration_interval must be a positive integer'
+            }), 400
+        
+        if seed is not None and (not isinstance(seed, int) or seed < 0):
+            return jsonify({
+                'success': False,
+                'error': 'seed must be a non-negative integer'
+            }), 400
+        
+        if time_budget_ms is not None and (not isinstance(time_budget_ms, (int, float)) or time_budget_ms <= 0):
+            return jsonify({
+                'success': False,
+                'error': 'time_budget_ms must be a positive number'
+            }), 400
+        
+        if stagnation_generations is not None and (not isinstance(stagnation_generations, int) or stagnation_generations < 1):
+            return jsonify({
+                'success': False,
+                'error': 'stagnation_generations must be a positive integer'
+            }), 400
+        
+        if min_improvement is not None and (not isinstance(min_improvement, (int, float)) or min_improvement < 0):
             return jsonify({
                 'success': False,
-                'error': 'algorithm must be "genetic" or "greedy"'
+                'error': 'min_improvement must be a non-negative number'
+            }), 400
+        
+        if warm_start is not None and not isinstance(warm_start, bool):
+            return jsonify({
+                'success': False,
+                'error': 'warm_start must be true or false'
             }), 400
         
         # Run optimization
-        optimizer = FreightOptimizer(trains, stations)
-        result = optimizer.optimize(num_trains, algorithm, time_window_hours)
+        result = optimizer.optimize(num_trains, algorithm, time_window_hours,
+                                    islands=islands, migration_interval=migration_interval, seed=seed,
+                                    time_budget_ms=time_budget_ms,
+                                    stagnation_generations=stagnation_generations,
+                                    min_improvement=min_improvement,
+                                    warm_start=warm_start)
         
         return jsonify(result)
     
@@ -67,15 +139,23 @@ def optimize_freight():
 
 @app.route('/api/freight/gaps', methods=['GET'])
 def get_time_gaps():
-    """Get all available time gaps between passenger trains"""
+    """
+    Get all available time gaps between passenger trains
+    
+    Optional query parameters: station (code), start_time and end_time
+    (minutes since midnight) to only return gaps within that range.
+    """
     try:
-        optimizer = FreightOptimizer(trains, stations)
-        gaps = optimizer.find_time_gaps()
+        gaps = optimizer.find_time_gaps(
+            station=request.args.get('station'),
+            start_time=request.args.get('start_time', type=int),
+            end_time=request.args.get('end_time', type=int)
+        )
         
         return jsonify({
             'success': True,
             'total_gaps': len(gaps),
-            'gaps': gaps[:50]  # Return first 50 for performance
+            'gaps': to_public(gaps[:50])  # Return first 50 for performance
         })
     
     except Exception as e:
@@ -91,8 +171,6 @@ def compare_algorithms():
         data = request.get_json() or {}
         num_trains = data.get('num_trains', 10)
         
-        optimizer = FreightOptimizer(trains, stations)
-        
         # Run both algorithms
         greedy_result = optimizer.optimize(num_trains, 'greedy')
         genetic_result = optimizer.optimize(num_trains, 'genetic')
@@ -118,7 +196,8 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'trains_loaded': len(trains),
-        'stations_loaded': len(stations)
+        'stations_loaded': len(stations),
+        'timetable_cache': timetable_cache_info
     })
 
 if __name__ == '__main__':
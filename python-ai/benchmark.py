@@ -0,0 +1,1233 @@
+"""
+Performance Benchmarks
+Times the data pipeline and AI engines against their reference versions
+
+Usage:
+    python benchmark.py ingest --csv ../backend/data/Train_details.csv
+    python benchmark.py stream --csv ../backend/data/Train_details.csv
+    python benchmark.py ga --num-trains 30
+    python benchmark.py islands --workers 1,2,4,8,16
+    python benchmark.py fitness --sizes 10,100,1000,10000
+    python benchmark.py route --queries 200
+    python benchmark.py greedy --sizes 10,100,1000
+    python benchmark.py warmstart --num-trains 30
+    python benchmark.py concurrency --threads 8
+    python benchmark.py platforms --csv ../backend/data/Train_details.csv
+    python benchmark.py tracks --csv ../backend/data/Train_details.csv
+    python benchmark.py incremental --queries 50
+    python benchmark.py sharded --workers 1,2,4,8 --csv ../backend/data/Train_details.csv
+    python benchmark.py queries --csv ../backend/data/Train_details.csv
+    python benchmark.py sections --csv ../backend/data/Train_details.csv
+    python benchmark.py cascade --queries 50 --csv ../backend/data/Train_details.csv
+    python benchmark.py secondary --queries 50 --csv ../backend/data/Train_details.csv
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+import pandas as pd
+
+from utils.data_loader import convert_time_to_minutes, find_train_csv, load_timetable, load_stations
+from utils.schedule_builder import ScheduleBuilder
+
+
+def timed(func, *args, repeat=1, **kwargs):
+    """Run func and return (result, best wall time in seconds)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def _parse_train_dicts_rowwise(csv_path):
+    """Row-by-row reference for load_train_data (previous implementation)"""
+    print(f"Loading train data from {csv_path}...")
+    df = pd.read_csv(csv_path, low_memory=False)
+
+    # Convert Distance to numeric, handling errors
+    df['Distance'] = pd.to_numeric(df['Distance'], errors='coerce').fillna(0)
+
+    # Group by train number to create train objects
+    trains = []
+    train_groups = df.groupby('Train No')
+
+    for train_no, group in train_groups:
+        first_row = group.iloc[0]
+
+        # Build route from all stops
+        route = []
+        for idx, row in group.iterrows():
+            # Safely get SEQ value
+            seq_val = row.get('SEQ', idx)
+            try:
+                seq = int(seq_val) if pd.notna(seq_val) and str(seq_val).isdigit() else idx
+            except:
+                seq = idx
+
+            route.append({
+                'seq': seq,
+                'station_code': str(row['Station Code']),
+                'station_name': str(row['Station Name']),
+                'arrival_time': str(row.get('Arrival time', '')),
+                'departure_time': str(row.get('Departure Time', '')),
+                'distance': float(row.get('Distance', 0)) if pd.notna(row.get('Distance')) else 0,
+                'arrival_minutes': convert_time_to_minutes(row.get('Arrival time', '00:00'))
+            })
+
+        trains.append({
+            'train_id': str(train_no),
+            'train_name': str(first_row.get('Train Name', f'Train {train_no}')),
+            'train_type': 'passenger',
+            'source_code': str(first_row.get('Source Station', '')),
+            'source_name': str(first_row.get('Source Station Name', '')),
+            'destination_code': str(first_row.get('Destination Station', '')),
+            'destination_name': str(first_row.get('Destination Station Name', '')),
+            'total_distance': float(group['Distance'].max()) if len(group) > 0 else 0.0,
+            'total_stations': len(group),
+            'route': route
+        })
+
+    print(f"Loaded {len(trains)} trains")
+    return trains
+
+
+def _build_train_schedules_rowwise(builder):
+    """Row-by-row reference for ScheduleBuilder.build_train_schedules (previous implementation)"""
+    print("Building train schedules...")
+
+    trains = {}
+
+    # Group by train number
+    grouped = builder.df.groupby('Train No')
+
+    for train_no, group in grouped:
+        # Sort by sequence
+        group = group.sort_values('SEQ')
+
+        # Get train metadata
+        first_row = group.iloc[0]
+        train_name = first_row['Train Name']
+        train_type = builder.determine_train_type(train_name)
+
+        # Build route
+        route = []
+        for _, row in group.iterrows():
+            station = {
+                'seq': int(row['SEQ']),
+                'station_code': row['Station Code'],
+                'station_name': row['Station Name'],
+                'arrival_time': row['Arrival time'],
+                'departure_time': row['Departure Time'],
+                'distance': float(row['Distance']),
+                'arrival_minutes': builder.parse_time(row['Arrival time']),
+                'departure_minutes': builder.parse_time(row['Departure Time'])
+            }
+            route.append(station)
+
+        # Create train object
+        train = {
+            'train_id': str(train_no),
+            'train_name': train_name,
+            'train_type': train_type,
+            'priority': builder.get_priority(train_type),
+            'source_station': first_row['Source Station'],
+            'source_name': first_row['Source Station Name'],
+            'destination_station': first_row['Destination Station'],
+            'destination_name': first_row['Destination Station Name'],
+            'total_distance': float(group.iloc[-1]['Distance']),
+            'total_stations': len(route),
+            'route': route
+        }
+
+        trains[str(train_no)] = train
+
+    print(f"Built schedules for {len(trains)} trains")
+    return trains
+
+
+def bench_ingest(args):
+    """Vectorized vs row-wise CSV ingestion"""
+    csv_path = args.csv or find_train_csv()
+    if not csv_path:
+        print("❌ Train_details.csv not found. Pass --csv PATH.")
+        return False
+
+    print("=" * 60)
+    print(f"INGEST BENCHMARK: {csv_path}")
+    print("=" * 60)
+
+    # load_train_data: CSV -> list of train dicts
+    expected, t_rowwise = timed(_parse_train_dicts_rowwise, csv_path)
+    timetable, t_vectorized = timed(load_timetable, csv_path)
+    trains, t_views = timed(lambda: list(timetable.as_dicts()))
+    load_ok = repr(trains) == repr(expected)
+
+    # ScheduleBuilder: DataFrame -> schedule dicts
+    df = pd.read_csv(csv_path)
+    builder = ScheduleBuilder(df)
+    expected_schedules, t_sched_rowwise = timed(_build_train_schedules_rowwise, builder)
+    schedules, t_sched_vectorized = timed(builder.build_train_schedules)
+    schedules_ok = repr(schedules) == repr(expected_schedules)
+
+    # (stage, row-wise time, vectorized time, identical, counts towards --min-speedup)
+    rows = [
+        ('load_train_data', t_rowwise, t_vectorized, load_ok, True),
+        ('  + materialize every dict', t_rowwise, t_vectorized + t_views, load_ok, False),
+        ('ScheduleBuilder', t_sched_rowwise, t_sched_vectorized, schedules_ok, True),
+    ]
+
+    print(f"\n{'stage':32s} {'row-wise':>10s} {'vectorized':>11s} {'speedup':>8s}  identical")
+    ok = True
+    for name, slow, fast, identical, gated in rows:
+        speedup = slow / fast if fast else float('inf')
+        print(f"{name:32s} {slow:9.3f}s {fast:10.3f}s {speedup:7.1f}x  {identical}")
+        ok = ok and identical
+        if gated and args.min_speedup and speedup < args.min_speedup:
+            ok = False
+
+    print(f"\n{timetable.n_trains} trains, {timetable.n_stops} stops")
+    return ok
+
+
+def _peak_rss_mb():
+    import resource
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _ingest_in_child(mode, csv_path, output_dir, chunksize, queue):
+    from utils.timetable_cache import stream_timetable
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'stream':
+        timetable = stream_timetable(csv_path, output_dir, chunksize=chunksize)
+        n_stops = timetable.n_stops
+    else:
+        n_stops = load_timetable(csv_path).n_stops
+    queue.put((time.perf_counter() - start, _peak_rss_mb(), baseline, n_stops))
+
+
+def bench_stream(args):
+    """Peak memory of batch vs streaming ingestion (each run in a fresh process)"""
+    csv_path = args.csv or find_train_csv()
+    if not csv_path:
+        print("❌ Train_details.csv not found. Pass --csv PATH.")
+        return False
+
+    print("=" * 60)
+    print(f"STREAMING INGEST BENCHMARK: {csv_path}")
+    print("=" * 60)
+
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('batch', 'stream'):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_ingest_in_child,
+                               args=(mode, str(csv_path), Path(tmp) / 'timetable', args.chunksize, queue))
+            proc.start()
+            results[mode] = queue.get()
+            proc.join()
+
+        # Both builds must give the same layout: same trains, order and string ids
+        from utils.timetable import Timetable
+        from utils.timetable_cache import load_timetable_from_cache
+        batch = load_timetable(csv_path)
+        stream = load_timetable_from_cache(Path(tmp) / 'timetable')
+        identical = all(
+            list(getattr(batch, column)) == list(getattr(stream, column))
+            for column in Timetable.TRAIN_COLUMNS + ('station_codes', 'station_names', 'time_strings')
+        ) and all(
+            (getattr(batch, column) == getattr(stream, column)).all()
+            for column in ('offsets', 'total_distance') + Timetable.STOP_COLUMNS
+        )
+        del stream
+
+    print(f"\n{'mode':8s} {'time':>8s} {'peak RSS':>10s} {'over baseline':>14s} {'stops':>9s}")
+    for mode, (elapsed, peak, baseline, n_stops) in results.items():
+        print(f"{mode:8s} {elapsed:7.2f}s {peak:8.0f}MB {peak - baseline:12.0f}MB {n_stops:9d}")
+    print(f"\nchunksize={args.chunksize}, identical timetables: {identical}")
+
+    return identical
+
+
+def _load_optimizer(args):
+    from models.freight_optimizer import FreightOptimizer
+
+    csv_path = args.csv or find_train_csv()
+    if not csv_path:
+        print("❌ Train_details.csv not found. Pass --csv PATH.")
+        return None
+    return FreightOptimizer(load_timetable(csv_path).as_dicts(), load_stations())
+
+
+def bench_ga(args):
+    """List-of-dicts GA vs the vectorized GA engine (and CP-SAT for reference)"""
+    optimizer = _load_optimizer(args)
+    if optimizer is None:
+        return False
+
+    gaps = optimizer.find_time_gaps()
+
+    print("=" * 60)
+    print(f"GA BENCHMARK: {len(gaps)} gaps, {args.num_trains} freight trains, "
+          f"{optimizer.population_size} x {optimizer.generations} generations")
+    print("=" * 60)
+
+    random.seed(args.seed)
+    (_, list_fitness), t_list = timed(optimizer.genetic_algorithm, gaps, args.num_trains)
+    (solution, vec_fitness), t_vec = timed(optimizer.genetic_algorithm_vectorized, gaps, args.num_trains,
+                                           seed=args.seed)
+
+    (_, cpsat_fitness, solver_info), t_cpsat = timed(optimizer.cpsat_assignment, gaps, args.num_trains)
+
+    speedup = t_list / t_vec if t_vec else float('inf')
+    print(f"\n{'engine':12s} {'time':>9s} {'fitness':>10s}")
+    print(f"{'genetic':12s} {t_list:8.3f}s {list_fitness:10.2f}")
+    print(f"{'vectorized':12s} {t_vec:8.3f}s {vec_fitness:10.2f}")
+    print(f"{'cpsat':12s} {t_cpsat:8.3f}s {cpsat_fitness:10.2f}  "
+          f"({solver_info['status']}, gap {solver_info.get('optimality_gap')})")
+    print(f"\nvectorized speedup {speedup:.1f}x")
+
+    return len(solution) == args.num_trains and (not args.min_speedup or speedup >= args.min_speedup)
+
+
+def bench_islands(args):
+    """Island-model GA scaling over worker counts"""
+    optimizer = _load_optimizer(args)
+    if optimizer is None:
+        return False
+
+    gaps = optimizer.find_time_gaps()
+    worker_counts = [int(w) for w in args.workers.split(',')]
+    fixed_islands = max(worker_counts)
+
+    print("=" * 60)
+    print(f"ISLAND GA BENCHMARK: {len(gaps)} gaps, {args.num_trains} freight trains, "
+          f"{optimizer.generations} generations, {multiprocessing.cpu_count()} CPUs")
+    print("=" * 60)
+
+    # Fixed work (one island per max worker): wall time should drop with workers
+    # and, being seeded per island, the result must not depend on the worker count
+    # (first call: the optimizer's worker pool starts; later calls reuse it)
+    print(f"\nFixed work: {fixed_islands} islands")
+    print(f"{'workers':>8s} {'first call':>11s} {'time':>9s} {'speedup':>8s} {'fitness':>10s}")
+    ok = True
+    baseline = None
+    reference = None
+    for workers in worker_counts:
+        run = lambda: optimizer.genetic_algorithm_islands(gaps, args.num_trains, islands=fixed_islands,
+                                                          seed=args.seed, workers=workers)
+        (first, _), t_first = timed(run)
+        (solution, fitness), elapsed = timed(run)
+        baseline = baseline or elapsed
+        reference = reference if reference is not None else solution
+        ok = ok and solution == first == reference
+        print(f"{workers:8d} {t_first:10.2f}s {elapsed:8.2f}s {baseline / elapsed:7.2f}x {fitness:10.2f}")
+
+    # Fixed islands per worker: more islands in (ideally) the same wall time
+    print("\nOne island per worker")
+    print(f"{'workers':>8s} {'time':>9s} {'fitness':>10s}")
+    for workers in worker_counts:
+        (_, fitness), elapsed = timed(optimizer.genetic_algorithm_islands, gaps, args.num_trains,
+                                      islands=workers, seed=args.seed, workers=workers)
+        print(f"{workers:8d} {elapsed:8.2f}s {fitness:10.2f}")
+
+    print(f"\nresults identical across worker counts: {ok}")
+    return ok
+
+
+def bench_fitness(args):
+    """Sort-and-sweep vs pairwise headway conflict count in fitness_function"""
+    optimizer = _load_optimizer(args)
+    if optimizer is None:
+        return False
+
+    gaps = optimizer.find_time_gaps()
+    sizes = [int(n) for n in args.sizes.split(',')]
+
+    print("=" * 60)
+    print(f"FITNESS CONFLICT COUNT BENCHMARK: {len(gaps)} gaps")
+    print("=" * 60)
+
+    # Random schedules drawn from a few gaps so conflicts actually occur
+    random.seed(args.seed)
+    crowded = random.sample(gaps, min(len(gaps), 20))
+
+    print(f"\n{'trains':>8s} {'pairwise':>10s} {'sweep':>10s} {'speedup':>8s} {'conflicts':>10s}  identical")
+    ok = True
+    for n in sizes:
+        chromosome = [
+            optimizer._freight_path(f'FRT{1000 + i}', random.choice(crowded), random.choice(gaps))
+            for i in range(n)
+        ]
+        chromosome = [t for t in chromosome if t['origin_id'] != t['destination_id']]
+
+        expected, t_pairwise = timed(optimizer.count_conflicts_pairwise, chromosome)
+        conflicts, t_sweep = timed(optimizer.count_conflicts, chromosome, repeat=3)
+        identical = conflicts == expected
+        ok = ok and identical
+        speedup = t_pairwise / t_sweep if t_sweep else float('inf')
+        print(f"{len(chromosome):8d} {t_pairwise * 1000:8.2f}ms {t_sweep * 1000:8.2f}ms {speedup:7.1f}x "
+              f"{conflicts:10d}  {identical}")
+
+    return ok
+
+
+def bench_route(args):
+    """Freight routing queries on the time-expanded network (target: < 50 ms each)"""
+    optimizer = _load_optimizer(args)
+    if optimizer is None:
+        return False
+
+    gaps = optimizer.find_time_gaps()
+    network, t_build = timed(optimizer.time_expanded_network)
+
+    print("=" * 60)
+    print(f"ROUTING BENCHMARK: {network.n_windows} free windows, {network.n_edges} segments, "
+          f"built in {t_build * 1000:.1f}ms")
+    print("=" * 60)
+
+    random.seed(args.seed)
+    stations = sorted({gap['station'] for gap in gaps})
+    segment_km = {
+        (optimizer.registry.code(station), optimizer.registry.code(neighbor)): length
+        for station, edges in network.edges.items()
+        for neighbor, length, _ in edges
+    }
+    times = []
+    found = 0
+    multi_hop = 0
+    mismatches = 0
+    for _ in range(args.queries):
+        origin, destination = random.sample(stations, 2)
+        path, elapsed = timed(optimizer.dynamic_programming_path, gaps, origin, destination)
+        times.append(elapsed)
+        if path:
+            found += 1
+            multi_hop += path['hops'] > 1
+            # Reported distance is the sum of the segments along the route, visiting each station once
+            route = [hop['station'] for hop in path['path']]
+            km = sum(segment_km[pair] for pair in zip(route, route[1:]))
+            if abs(path['distance'] - round(km, 2)) > 0.01 or len(set(route)) != len(route):
+                mismatches += 1
+
+    times.sort()
+    median = times[len(times) // 2]
+    print(f"\n{'queries':>8s} {'routed':>8s} {'multi-hop':>10s} {'median':>10s} {'max':>10s}")
+    print(f"{len(times):8d} {found:8d} {multi_hop:10d} {median * 1000:8.2f}ms {times[-1] * 1000:8.2f}ms")
+    print(f"Routes with wrong distance or a repeated station: {mismatches}")
+
+    return mismatches == 0 and times[-1] < 0.05
+
+
+def _greedy_heuristic_linear(optimizer, gaps, num_trains=5):
+    """
+    Reference greedy (previous implementation): largest gaps first,
+    each station used at most once, two linear scans per train
+    """
+    if len(gaps) < 2:
+        return []
+
+    # Sort gaps by size (largest first)
+    sorted_gaps = sorted(gaps, key=lambda x: x['gap_size'], reverse=True)
+
+    freight_paths = []
+    used_stations = set()
+
+    for _ in range(num_trains):
+        # Find origin from unused stations
+        origin_gap = None
+        for gap in sorted_gaps:
+            if gap['station_id'] not in used_stations:
+                origin_gap = gap
+                break
+
+        if not origin_gap:
+            break
+
+        # Find destination from unused stations
+        dest_gap = None
+        for gap in sorted_gaps:
+            if gap['station_id'] != origin_gap['station_id'] and gap['station_id'] not in used_stations:
+                dest_gap = gap
+                break
+
+        if not dest_gap:
+            break
+
+        path = optimizer._freight_path(f'FRT{1000 + len(freight_paths)}', origin_gap, dest_gap)
+        path['gap_utilization'] = round((path['travel_time'] / origin_gap['gap_size']) * 100, 2)
+        freight_paths.append(path)
+
+        used_stations.add(origin_gap['station_id'])
+        used_stations.add(dest_gap['station_id'])
+
+    return freight_paths
+
+
+def bench_greedy(args):
+    """Heap greedy with gap reinsertion vs the single-use linear greedy"""
+    optimizer = _load_optimizer(args)
+    if optimizer is None:
+        return False
+
+    gaps = optimizer.find_time_gaps()
+    sizes = [int(n) for n in args.sizes.split(',')]
+
+    print("=" * 60)
+    print(f"GREEDY BENCHMARK: {len(gaps)} gaps")
+    print("=" * 60)
+
+    print(f"\n{'trains':>8s} {'linear':>10s} {'placed':>7s} {'fitness':>10s} "
+          f"{'heap':>10s} {'placed':>7s} {'fitness':>10s} {'conflicts':>10s} {'same start':>11s}")
+    ok = True
+    for n in sizes:
+        linear, t_linear = timed(_greedy_heuristic_linear, optimizer, gaps, n, repeat=3)
+        heap, t_heap = timed(optimizer.greedy_heuristic, gaps, n, repeat=3)
+        conflicts = optimizer.count_conflicts(heap)
+        # Until the linear greedy runs out of unused stations both place the same trains
+        same_start = heap[:len(linear)] == linear
+        ok = ok and conflicts == 0 and same_start
+        print(f"{n:8d} {t_linear * 1000:8.2f}ms {len(linear):7d} {optimizer.fitness_function(linear):10.0f} "
+              f"{t_heap * 1000:8.2f}ms {len(heap):7d} {optimizer.fitness_function(heap):10.0f} {conflicts:10d} "
+              f"{str(same_start):>11s}")
+
+    return ok
+
+
+def bench_warmstart(args):
+    """Repeated optimize() calls: cold start vs warm start from stored schedules"""
+    optimizer = _load_optimizer(args)
+    if optimizer is None:
+        return False
+
+    print("=" * 60)
+    print(f"WARM START BENCHMARK: {args.num_trains} freight trains, stop after 15 stagnant generations")
+    print("=" * 60)
+
+    print(f"\n{'run':12s} {'generations':>12s} {'time':>9s} {'fitness':>10s} {'seeds':>6s}")
+    runs = [('cold', False)] + [(f'warm {i + 1}', True) for i in range(3)]
+    results = []
+    for name, warm_start in runs:
+        result, elapsed = timed(optimizer.optimize, args.num_trains, 'vectorized', seed=args.seed,
+                                stagnation_generations=15, warm_start=warm_start)
+        results.append(result)
+        print(f"{name:12s} {result['generations_completed']:12d} {elapsed:8.3f}s "
+              f"{result['statistics']['fitness_score']:10.2f} {result.get('warm_start_seeds', 0):6d}")
+
+    cold, last = results[0], results[-1]
+    return last['statistics']['fitness_score'] >= cold['statistics']['fitness_score']
+
+
+def bench_concurrency(args):
+    """Stress test: one shared optimizer serving many threads at once"""
+    from concurrent.futures import ThreadPoolExecutor
+    from models.freight_optimizer import FreightOptimizer
+
+    optimizer = _load_optimizer(args)
+    if optimizer is None:
+        return False
+    optimizer.generations = 30
+
+    # Start from cold shared caches so the threads race to build them
+    FreightOptimizer._shared_gap_indexes.clear()
+    FreightOptimizer._shared_networks.clear()
+
+    # (Time windows in optimize() follow the wall clock, so explicit
+    # find_time_gaps() windows are used to keep runs comparable)
+    calls = [(('genetic', 'vectorized', 'greedy')[i % 3], args.seed + i) for i in range(args.threads * 4)]
+
+    def run(call):
+        algorithm, seed = call
+        result = optimizer.optimize(args.num_trains, algorithm, seed=seed, warm_start=False)
+        start = (seed * 37) % 1440
+        gaps = optimizer.find_time_gaps(start_time=start, end_time=start + 120)
+        return (result['statistics']['fitness_score'],
+                [(t['origin'], t['destination'], t['departure_time']) for t in result['freight_trains']],
+                len(gaps))
+
+    print("=" * 60)
+    print(f"CONCURRENCY STRESS TEST: {len(calls)} optimize() calls on {args.threads} threads")
+    print("=" * 60)
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        concurrent, t_concurrent = timed(lambda: list(pool.map(run, calls)))
+    sequential, t_sequential = timed(lambda: [run(call) for call in calls])
+
+    mismatches = sum(1 for a, b in zip(concurrent, sequential) if a != b)
+    print(f"\n{'mode':12s} {'time':>9s}")
+    print(f"{'threads':12s} {t_concurrent:8.3f}s")
+    print(f"{'sequential':12s} {t_sequential:8.3f}s")
+    print(f"\nresults differing from the sequential run: {mismatches}")
+
+    return mismatches == 0
+
+
+def _load_schedules(args):
+    csv_path = args.csv or find_train_csv()
+    if not csv_path:
+        print("❌ Train_details.csv not found. Pass --csv PATH.")
+        return None
+    return ScheduleBuilder(pd.read_csv(csv_path)).build_train_schedules()
+
+
+def _platform_conflicts_per_minute(detector):
+    """
+    Reference platform check (previous implementation): one entry per
+    occupied minute and one conflict per overcrowded minute, capacity 2
+
+    Returns:
+        (conflicts, the (station, minute) of each conflict)
+    """
+    conflicts = []
+    cells = []
+
+    station_occupancy = {}
+
+    for train_id, train in detector.trains.items():
+        for station in train['route']:
+            station_code = station['station_code']
+            arrival = station['arrival_minutes']
+            departure = station['departure_minutes']
+
+            if arrival is None or departure is None:
+                continue
+
+            # Check each minute
+            for minute in range(int(arrival), int(departure) + 1):
+                key = (station_code, minute)
+                if key not in station_occupancy:
+                    station_occupancy[key] = []
+                station_occupancy[key].append(train_id)
+
+    # Find conflicts (more than 2 trains at same time)
+    for (station_code, minute), trains in station_occupancy.items():
+        if len(trains) > 2:
+            conflicts.append({
+                'conflict_id': f"C{detector.conflict_id_counter:03d}",
+                'type': 'platform_conflict',
+                'severity': 'medium',
+                'station': station_code,
+                'trains_involved': trains,
+                'description': f"{len(trains)} trains at {station_code} simultaneously",
+                'platform_capacity': 2,
+                'trains_present': len(trains)
+            })
+            cells.append((station_code, minute))
+            detector.conflict_id_counter += 1
+
+    return conflicts, cells
+
+
+def bench_platforms(args):
+    """Sweep-line platform occupancy vs per-minute expansion"""
+    from models.conflict_detector import ConflictDetector
+
+    schedules = _load_schedules(args)
+    if schedules is None:
+        return False
+    detector = ConflictDetector(schedules)
+
+    (expected, expected_cells), t_minutes = timed(_platform_conflicts_per_minute, detector)
+    conflicts, t_sweep = timed(detector._detect_platform_conflicts)
+
+    # Same overcrowded (station, minute) cells, merged into intervals
+    expected_cells = set(expected_cells)
+    cells = {
+        (c['station'], minute)
+        for c in conflicts for minute in range(c['start_minute'], c['end_minute'] + 1)
+    }
+    identical = cells == expected_cells
+
+    print("=" * 60)
+    print(f"PLATFORM CONFLICT BENCHMARK: {len(schedules)} trains")
+    print("=" * 60)
+    speedup = t_minutes / t_sweep if t_sweep else float('inf')
+    print(f"\n{'method':12s} {'time':>9s} {'conflicts':>10s}")
+    print(f"{'per-minute':12s} {t_minutes:8.3f}s {len(expected):10d}")
+    print(f"{'sweep':12s} {t_sweep:8.3f}s {len(conflicts):10d}")
+    print(f"\nspeedup {speedup:.1f}x, same overcrowded minutes: {identical}")
+
+    return identical and (not args.min_speedup or speedup >= args.min_speedup)
+
+
+def _overlapping_pairs_brute_force(detector):
+    """Every (station, train, train) pair within the track margin, by checking all pairs"""
+    station_ids, arrivals, departures, train_ids = detector._stop_arrays()
+    by_station = {}
+    for i, station_id in enumerate(station_ids.tolist()):
+        by_station.setdefault(station_id, []).append(i)
+
+    pairs = set()
+    for station_id, stops in by_station.items():
+        stops.sort(key=lambda i: arrivals[i])
+        for a, i in enumerate(stops):
+            for j in stops[a + 1:]:
+                if arrivals[j] < departures[i] + detector.TRACK_MARGIN:
+                    pairs.add((detector.registry.code(station_id), train_ids[i], train_ids[j]))
+    return pairs
+
+
+def _track_occupancy_consecutive(detector):
+    """
+    Reference track check (previous implementation): only trains that
+    are consecutive by arrival at a station are compared
+    """
+    conflicts = []
+
+    print("\n   Checking track occupancy conflicts...")
+
+    # Build station timeline (keyed by integer station id)
+    station_timeline = {}
+
+    for train_id, train in detector.trains.items():
+        for station in train['route']:
+            station_id = detector.registry.id_of(station['station_code'])
+            arrival = station['arrival_minutes']
+            departure = station['departure_minutes']
+
+            if station_id not in station_timeline:
+                station_timeline[station_id] = []
+
+            if arrival is not None and departure is not None:
+                station_timeline[station_id].append({
+                    'train_id': train_id,
+                    'train_name': train['train_name'],
+                    'arrival': arrival,
+                    'departure': departure
+                })
+
+    # Check for overlaps
+    for station_id, trains_at_station in station_timeline.items():
+        station_code = detector.registry.code(station_id)
+
+        # Sort by arrival time
+        trains_at_station.sort(key=lambda x: x['arrival'])
+
+        # Check consecutive trains
+        for i in range(len(trains_at_station) - 1):
+            train1 = trains_at_station[i]
+            train2 = trains_at_station[i + 1]
+
+            # If train2 arrives before train1 departs (with safety margin)
+            if train2['arrival'] < train1['departure'] + 5:
+                conflict = {
+                    'conflict_id': f"C{detector.conflict_id_counter:03d}",
+                    'type': 'track_occupancy',
+                    'severity': 'high',
+                    'station': station_code,
+                    'trains_involved': [train1['train_id'], train2['train_id']],
+                    'train_names': [train1['train_name'], train2['train_name']],
+                    'description': f"Trains {train1['train_id']} and {train2['train_id']} overlap at {station_code}",
+                    'time_gap': train2['arrival'] - train1['departure'],
+                    'recommended_gap': 5
+                }
+                conflicts.append(conflict)
+                detector.conflict_id_counter += 1
+
+                print(f"      ⚠️  Conflict at {station_code}: {train1['train_id']} vs {train2['train_id']}")
+
+    return conflicts
+
+
+def bench_tracks(args):
+    """All-pairs track occupancy detection vs the consecutive-only check"""
+    from models.conflict_detector import ConflictDetector
+
+    schedules = _load_schedules(args)
+    if schedules is None:
+        return False
+    detector = ConflictDetector(schedules)
+
+    consecutive, t_consecutive = timed(_track_occupancy_consecutive, detector)
+    conflicts, t_pairs = timed(detector._detect_track_occupancy)
+
+    def key(conflict):
+        return (conflict['station'], *conflict['trains_involved'])
+
+    pairs = {key(c) for c in conflicts}
+    ok = {key(c) for c in consecutive} <= pairs
+
+    print("=" * 60)
+    print(f"TRACK OCCUPANCY BENCHMARK: {len(schedules)} trains")
+    print("=" * 60)
+    print(f"\n{'method':12s} {'time':>9s} {'conflicts':>10s}")
+    print(f"{'consecutive':12s} {t_consecutive:8.3f}s {len(consecutive):10d}")
+    print(f"{'all pairs':12s} {t_pairs:8.3f}s {len(conflicts):10d}")
+    print(f"\nconsecutive pairs all found: {ok}")
+
+    # The quadratic check is only affordable on small timetables
+    if len(schedules) <= 2000:
+        expected = _overlapping_pairs_brute_force(detector)
+        identical = pairs == expected and len(pairs) == len(conflicts)
+        print(f"same pairs as the all-pairs brute force: {identical}")
+        ok = ok and identical
+
+    return ok
+
+
+def bench_incremental(args):
+    """update_train() after a single-train delay vs a full re-detection"""
+    import contextlib
+    import io
+    from models.conflict_detector import ConflictDetector
+
+    schedules = _load_schedules(args)
+    if schedules is None:
+        return False
+    rng = random.Random(args.seed)
+    original = {train_id: train['route'] for train_id, train in schedules.items()}
+    detector = ConflictDetector(schedules)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    with quiet:
+        detector.detect_all_conflicts()
+    t_update = 0.0
+    changes = 0
+    full_rechecks = 0
+    for _ in range(args.queries):
+        train_id = rng.choice(list(schedules))
+        route = detector.trains[train_id]['route']
+        start = rng.randrange(len(route))
+        delay = rng.choice([5, 15, 30, 60])
+        new_route = route[:start] + [
+            {**stop,
+             'arrival_minutes': None if stop['arrival_minutes'] is None else stop['arrival_minutes'] + delay,
+             'departure_minutes': None if stop['departure_minutes'] is None else stop['departure_minutes'] + delay}
+            for stop in route[start:]
+        ]
+        with quiet:
+            diff, elapsed = timed(detector.update_train, train_id, new_route)
+        t_update += elapsed
+        changes += len(diff['added']) + len(diff['removed']) + len(diff['updated'])
+        full_rechecks += diff['full_recheck']
+
+    # The live set must equal what a from-scratch detection finds
+    def strip(conflicts):
+        return sorted(repr({k: v for k, v in c.items() if k != 'conflict_id'}) for c in conflicts)
+
+    checked = detector.ROUTE_TYPES + detector.SECTION_TYPES
+    live = [c for c in detector.conflicts if c['type'] in checked]
+    with quiet:
+        fresh, t_full = timed(ConflictDetector(dict(detector.trains)).detect_all_conflicts)
+    expected = [c for conflict_type in checked for c in fresh['by_type'][conflict_type]]
+    identical = strip(live) == strip(expected)
+    unique_ids = len({c['conflict_id'] for c in live}) == len(live)
+    untouched = all(schedules[train_id]['route'] is route for train_id, route in original.items())
+
+    print("=" * 60)
+    print(f"INCREMENTAL CONFLICT BENCHMARK: {len(schedules)} trains, {args.queries} delays")
+    print("=" * 60)
+    per_update = t_update / max(args.queries, 1)
+    print(f"\nfull detection     {t_full:8.4f}s")
+    print(f"update_train (avg) {per_update:8.4f}s  ({changes} conflict changes, "
+          f"{full_rechecks} full rechecks)")
+    speedup = t_full / per_update if per_update else float('inf')
+    print(f"\nspeedup {speedup:.1f}x, same conflicts as a full scan: {identical}, unique ids: {unique_ids}, "
+          f"input schedules untouched: {untouched}")
+
+    return identical and unique_ids and untouched and (not args.min_speedup or speedup >= args.min_speedup)
+
+
+def bench_sharded(args):
+    """Station-sharded conflict detection across worker processes vs one process"""
+    import contextlib
+    import io
+    from models.conflict_detector import ConflictDetector
+
+    schedules = _load_schedules(args)
+    if schedules is None:
+        return False
+    worker_counts = [int(w) for w in args.workers.split(',')]
+
+    print("=" * 60)
+    print(f"SHARDED CONFLICT BENCHMARK: {len(schedules)} trains, {multiprocessing.cpu_count()} CPUs")
+    print("=" * 60)
+    print(f"\n{'workers':>8s} {'time':>9s} {'speedup':>8s}  identical")
+
+    ok = True
+    expected = None
+    baseline = None
+    for workers in worker_counts:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Untimed first run starts the shared worker processes
+            ConflictDetector(schedules).detect_all_conflicts(workers=workers)
+            result, elapsed = timed(ConflictDetector(schedules).detect_all_conflicts, workers=workers)
+        if expected is None:
+            expected, baseline = repr(result), elapsed
+        identical = repr(result) == expected
+        ok = ok and identical
+        print(f"{workers:8d} {elapsed:8.3f}s {baseline / elapsed:7.2f}x  {identical}")
+
+    return ok
+
+
+def bench_queries(args):
+    """Indexed conflict queries vs linear scans over every conflict"""
+    import contextlib
+    import io
+    from models.conflict_detector import ConflictDetector
+
+    schedules = _load_schedules(args)
+    if schedules is None:
+        return False
+    detector = ConflictDetector(schedules)
+    with contextlib.redirect_stdout(io.StringIO()):
+        detector.detect_all_conflicts()
+    conflicts = detector.conflicts
+
+    # The scans are O(conflicts) per call, so only --queries keys of each kind
+    rng = random.Random(args.seed)
+    stations = sorted({c['station'] for c in conflicts})
+    stations = rng.sample(stations, min(args.queries, len(stations)))
+    trains = rng.sample(list(schedules), min(args.queries, len(schedules)))
+    queries = [
+        ('by station', stations, detector.get_conflicts_by_station,
+         lambda code: [c for c in conflicts if c.get('station') == code]),
+        ('by train', trains, detector.get_conflicts_by_train,
+         lambda train_id: [c for c in conflicts if train_id in c.get('trains_involved', [])]),
+        ('high priority', [None], lambda _: detector.get_high_priority_conflicts(),
+         lambda _: [c for c in conflicts if c['severity'] == 'high']),
+    ]
+
+    print("=" * 60)
+    print(f"CONFLICT QUERY BENCHMARK: {len(schedules)} trains, {len(conflicts)} conflicts")
+    print("=" * 60)
+    print(f"\n{'query':14s} {'calls':>6s} {'scan':>9s} {'index':>9s} {'speedup':>8s}  identical")
+
+    ok = True
+    for name, keys, indexed, scan in queries:
+        expected, t_scan = timed(lambda: [scan(key) for key in keys])
+        result, t_index = timed(lambda: [indexed(key) for key in keys])
+        identical = result == expected
+        ok = ok and identical
+        speedup = t_scan / t_index if t_index else float('inf')
+        print(f"{name:14s} {len(keys):6d} {t_scan:8.4f}s {t_index:8.4f}s {speedup:7.1f}x  {identical}")
+
+    return ok and len(conflicts) > 0
+
+
+def _section_pairs_brute_force(detector):
+    """Every (section, train, train, overtaking) violation, by checking all pairs per section"""
+    by_section = {}
+    for train_id, train in detector.trains.items():
+        route = train['route']
+        for stop, following in zip(route, route[1:]):
+            enter, exit_ = stop['departure_minutes'], following['arrival_minutes']
+            if enter is None or exit_ is None:
+                continue
+            if exit_ < enter:
+                exit_ += 1440
+            section = f"{stop['station_code']}-{following['station_code']}"
+            by_section.setdefault(section, []).append((enter, exit_, train_id))
+
+    headway = detector.SECTION_HEADWAY
+    pairs = set()
+    for section, intervals in by_section.items():
+        intervals.sort(key=lambda interval: interval[0])
+        for a, (enter1, exit1, train1) in enumerate(intervals):
+            for enter2, exit2, train2 in intervals[a + 1:]:
+                overtaking = exit2 < exit1
+                if overtaking or enter2 - enter1 < headway or exit2 - exit1 < headway:
+                    pairs.add((section, train1, train2, overtaking))
+    return pairs
+
+
+def bench_sections(args):
+    """Block-section headway/overtaking sweep over every directed section"""
+    import contextlib
+    import io
+    from models.conflict_detector import ConflictDetector
+
+    schedules = _load_schedules(args)
+    if schedules is None:
+        return False
+    detector = ConflictDetector(schedules)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, t_routes = timed(detector._route_arrays)
+        conflicts, t_sweep = timed(detector._detect_section_conflicts)
+    overtakings = sum(c['type'] == 'section_overtaking' for c in conflicts)
+
+    print("=" * 60)
+    print(f"BLOCK SECTION BENCHMARK: {len(schedules)} trains")
+    print("=" * 60)
+    print(f"\nroute arrays  {t_routes:8.3f}s")
+    print(f"section sweep {t_sweep:8.3f}s  ({overtakings} overtakings, {len(conflicts) - overtakings} headway)")
+
+    # The quadratic check is only affordable on small timetables
+    ok = True
+    if len(schedules) <= 2000:
+        pairs = {(c['section'], *c['trains_involved'], c['type'] == 'section_overtaking') for c in conflicts}
+        identical = pairs == _section_pairs_brute_force(detector) and len(pairs) == len(conflicts)
+        print(f"same pairs as the all-pairs brute force: {identical}")
+        ok = identical
+
+    return ok
+
+
+def _cascade_brute_force(cascade, train_id, stop_index, delay_minutes):
+    """Largest delay per train from relaxing every rule over all stops until nothing changes"""
+    trains = cascade.trains
+    order = {tid: i for i, tid in enumerate(trains)}
+    margin = cascade.safety_margin
+    arrival_delay = {}
+    departure_delay = {(train_id, stop_index): delay_minutes}
+
+    changed = True
+    while changed:
+        changed = False
+        for (train, index), delay in list(arrival_delay.items()):
+            arrival, departure = cascade.times[train][index]
+            if index < len(cascade.times[train]) - 1:
+                remaining = delay - max(0, departure - arrival - cascade.MIN_DWELL)
+                if remaining > departure_delay.get((train, index), 0):
+                    departure_delay[(train, index)] = remaining
+                    changed = True
+        for (train, index), delay in list(departure_delay.items()):
+            times = cascade.times[train]
+            for following in range(index + 1, len(times)):
+                if times[following][0] is not None:
+                    if delay > arrival_delay.get((train, following), 0):
+                        arrival_delay[(train, following)] = delay
+                        changed = True
+                    break
+            arrival, departure = times[index]
+            station = trains[train]['route'][index]['station_code']
+            for other, other_train in trains.items():
+                if other == train:
+                    continue
+                for other_index, stop in enumerate(other_train['route']):
+                    other_arrival = cascade.times[other][other_index][0]
+                    if stop['station_code'] != station or other_arrival is None:
+                        continue
+                    if (other_arrival, order[other], other_index) <= (arrival, order[train], index):
+                        other_arrival += 1440  # planned earlier in the day: reached only past midnight
+                    induced = delay - max(0, other_arrival - departure - margin)
+                    if induced > arrival_delay.get((other, other_index), 0):
+                        arrival_delay[(other, other_index)] = induced
+                        changed = True
+
+    final = {train_id: delay_minutes}
+    for (train, _), delay in arrival_delay.items():
+        if train != train_id:
+            final[train] = max(final.get(train, 0), delay)
+    return final
+
+
+def bench_cascade(args):
+    """Event-driven delay cascade vs first-order propagation, checked against a brute-force fixpoint"""
+    import contextlib
+    import io
+    from models.delay_propagator import DelayPropagator
+
+    schedules = _load_schedules(args)
+    if schedules is None:
+        return False
+    propagator = DelayPropagator(schedules)
+    rng = random.Random(args.seed)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    scenarios = []
+    for _ in range(args.queries):
+        train_id = rng.choice(list(schedules))
+        route = schedules[train_id]['route']
+        scenarios.append((train_id, route[rng.randrange(len(route))]['station_code'], rng.choice([10, 30, 60])))
+
+    with quiet:
+        _, t_build = timed(propagator._cascade_engine)
+        first_order, t_first = timed(lambda: [propagator.inject_primary_delay(*s) for s in scenarios])
+        cascades, t_cascade = timed(lambda: [propagator.inject_primary_delay(*s, cascade=True) for s in scenarios])
+
+    depths = [r['summary']['propagation_depth'] for r in cascades]
+    events = sum(r['summary']['events_processed'] for r in cascades)
+
+    print("=" * 60)
+    print(f"DELAY CASCADE BENCHMARK: {len(schedules)} trains, {len(scenarios)} primary delays")
+    print("=" * 60)
+    print(f"\n{'engine':12s} {'time/call':>10s} {'affected':>9s} {'max depth':>10s}")
+    print(f"{'first-order':12s} {t_first / len(scenarios):9.4f}s "
+          f"{sum(r['summary']['affected_trains'] for r in first_order):9d} {1:10d}")
+    print(f"{'cascade':12s} {t_cascade / len(scenarios):9.4f}s "
+          f"{sum(r['summary']['affected_trains'] for r in cascades):9d} {max(depths):10d}")
+    print(f"\ncascade index built in {t_build:.3f}s, {events} events processed")
+
+    # The fixpoint is quadratic per station, so only on small timetables
+    ok = True
+    if len(schedules) <= 2000:
+        engine = propagator._cascade_engine()
+        identical = True
+        for (train_id, station_code, delay), result in zip(scenarios, cascades):
+            index = next(i for i, stop in enumerate(schedules[train_id]['route']) if stop['station_code'] == station_code)
+            final = _cascade_brute_force(engine, train_id, index, delay)
+            identical = identical and result['final_delays'] == final
+            identical = identical and result['summary']['total_network_delay'] == sum(final.values())
+        print(f"same final delays and totals as the brute-force fixpoint: {identical}")
+        ok = identical
+
+    return ok
+
+
+def _secondary_delays_scan(propagator, delayed_train_id, updated_schedule, delay_start_index):
+    """
+    Reference secondary delay search (previous implementation): every
+    stop of every other train is scanned at each remaining station
+    """
+    secondary_delays = []
+
+    # Check each station in the delayed train's remaining route
+    for i in range(delay_start_index, len(updated_schedule)):
+        station = updated_schedule[i]
+        station_code = station['station_code']
+        station_id = propagator.registry.id_of(station_code)
+        delayed_departure = station['departure_minutes']
+
+        if delayed_departure is None:
+            continue
+
+        # Check all other trains
+        for train_id, train in propagator.trains.items():
+            if train_id == delayed_train_id:
+                continue
+
+            # Check if this train passes through the same station
+            for other_station, other_station_id in zip(train['route'], propagator.route_station_ids[train_id]):
+                if other_station_id == station_id:
+                    other_arrival = other_station['arrival_minutes']
+
+                    if other_arrival is None:
+                        continue
+
+                    # Check for conflict (other train arrives while delayed train still there)
+                    if other_arrival < delayed_departure + propagator.safety_margin:
+                        # Calculate secondary delay
+                        required_wait = (delayed_departure + propagator.safety_margin) - other_arrival
+
+                        if required_wait > 0:
+                            secondary_delays.append({
+                                "train_id": train_id,
+                                "train_name": train['train_name'],
+                                "station": station_code,
+                                "delay_minutes": required_wait,
+                                "cause": "track_occupancy",
+                                "caused_by": delayed_train_id,
+                                "type": "secondary"
+                            })
+
+                            print(f"   ⚠️  Secondary delay: Train {train_id} at {station_code} (+{required_wait} min)")
+
+    return secondary_delays
+
+
+def bench_secondary(args):
+    """First-order secondary delays: station index + bisect vs scanning every train's stops"""
+    import contextlib
+    import io
+    from models.delay_propagator import DelayPropagator
+
+    schedules = _load_schedules(args)
+    if schedules is None:
+        return False
+    with contextlib.redirect_stdout(io.StringIO()):
+        propagator, t_build = timed(DelayPropagator, schedules)
+    rng = random.Random(args.seed)
+
+    scenarios = []
+    for _ in range(args.queries):
+        train_id = rng.choice(list(schedules))
+        index = rng.randrange(len(schedules[train_id]['route']))
+        updated = propagator._update_train_schedule(schedules[train_id], index, rng.choice([10, 30, 60]))
+        scenarios.append((train_id, updated, index))
+
+    def key(delay):
+        return (delay['station'], delay['train_id'], delay['delay_minutes'])
+
+    lookback = propagator.lookback
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected, t_scan = timed(lambda: [_secondary_delays_scan(propagator, *s) for s in scenarios])
+        bounded, t_bounded = timed(lambda: [propagator._find_secondary_delays(*s) for s in scenarios])
+        propagator.lookback = None
+        unbounded, t_unbounded = timed(lambda: [propagator._find_secondary_delays(*s) for s in scenarios])
+        propagator.lookback = lookback
+
+    # Unbounded: exactly the scan; bounded: the scan's delays of trains that arrived within the lookback
+    identical = all(sorted(map(key, a)) == sorted(map(key, b)) for a, b in zip(expected, unbounded))
+    windowed = all(
+        sorted(map(key, b)) == sorted(key(d) for d in a if d['delay_minutes'] <= lookback + propagator.safety_margin)
+        for a, b in zip(expected, bounded)
+    )
+
+    print("=" * 60)
+    print(f"SECONDARY DELAY BENCHMARK: {len(schedules)} trains, {len(scenarios)} primary delays")
+    print("=" * 60)
+    print(f"\nstation index built in {t_build:.3f}s (whole DelayPropagator)")
+    print(f"\n{'search':26s} {'time/call':>10s} {'delays':>8s} {'max delay':>10s}")
+    for name, elapsed, results in (('scan all trains', t_scan, expected),
+                                   ('bisect, unbounded', t_unbounded, unbounded),
+                                   (f'bisect, {lookback} min lookback', t_bounded, bounded)):
+        worst = max((d['delay_minutes'] for r in results for d in r), default=0)
+        print(f"{name:26s} {elapsed / len(scenarios):9.5f}s {sum(map(len, results)):8d} {worst:10d}")
+    speedup = t_scan / t_bounded if t_bounded else float('inf')
+    print(f"\nspeedup {speedup:.1f}x, unbounded bisect finds the same delays as the scan: {identical}, "
+          f"lookback window keeps exactly the scan's recent arrivals: {windowed}")
+
+    return identical and windowed and (not args.min_speedup or speedup >= args.min_speedup)
+
+
+BENCHMARKS = {
+    'ingest': bench_ingest,
+    'stream': bench_stream,
+    'ga': bench_ga,
+    'islands': bench_islands,
+    'fitness': bench_fitness,
+    'route': bench_route,
+    'greedy': bench_greedy,
+    'warmstart': bench_warmstart,
+    'concurrency': bench_concurrency,
+    'platforms': bench_platforms,
+    'tracks': bench_tracks,
+    'incremental': bench_incremental,
+    'sharded': bench_sharded,
+    'queries': bench_queries,
+    'sections': bench_sections,
+    'cascade': bench_cascade,
+    'secondary': bench_secondary,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Railway optimization benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--csv', help="Train_details style CSV (default: auto-detect)")
+    parser.add_argument('--min-speedup', type=float, default=0,
+                        help="Fail unless every stage is at least this much faster")
+    parser.add_argument('--chunksize', type=int, default=20000, help="Rows per chunk for 'stream'")
+    parser.add_argument('--num-trains', type=int, default=30, help="Freight trains per schedule for the GA benchmarks")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for the GA benchmarks")
+    parser.add_argument('--workers', default='1,2,4,8,16', help="Worker counts for 'islands' and 'sharded'")
+    parser.add_argument('--sizes', default='10,100,1000,10000', help="Freight train counts for 'fitness' and 'greedy'")
+    parser.add_argument('--threads', type=int, default=8, help="Request threads for 'concurrency'")
+    parser.add_argument('--queries', type=int, default=200,
+                        help="Origin/destination pairs for 'route', delays for 'incremental', 'cascade' "
+                             "and 'secondary', "
+                             "keys per query kind for 'queries'")
+    args = parser.parse_args()
+
+    ok = BENCHMARKS[args.benchmark](args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
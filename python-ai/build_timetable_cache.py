@@ -0,0 +1,40 @@
+"""
+Pre-build the binary timetable cache
+Run once after Train_details.csv changes so the API starts instantly
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from utils.data_loader import find_train_csv
+from utils.timetable_cache import build_cache, cache_dir_for, is_cache_valid, read_cache_meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the binary timetable cache")
+    parser.add_argument('--csv', help="Source CSV (default: auto-detect Train_details.csv)")
+    parser.add_argument('--cache-dir', help="Cache root directory (default: data/cache/timetable)")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the cache is valid")
+    parser.add_argument('--chunksize', type=int,
+                        help="Stream the CSV in chunks of this many rows (bounded memory for huge files)")
+    args = parser.parse_args()
+
+    csv_path = args.csv or find_train_csv()
+    if not csv_path:
+        print("❌ Train_details.csv not found. Pass --csv PATH.")
+        sys.exit(1)
+
+    cache_dir = cache_dir_for(csv_path, args.cache_dir)
+    if not args.force and is_cache_valid(read_cache_meta(cache_dir), csv_path):
+        print(f"✓ Cache at {cache_dir} is up to date (use --force to rebuild)")
+        return
+
+    timetable = build_cache(csv_path, args.cache_dir, chunksize=args.chunksize)
+    print(f"✓ Cached {timetable.n_trains} trains / {timetable.n_stops} stops (version {timetable.version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,9 @@ RAW_DATA_PATH = os.getenv("RAW_DATA_PATH", "data/raw/Train_details.csv")
 PROCESSED_DATA_PATH = os.getenv("PROCESSED_DATA_PATH", "data/processed/")
 OUTPUT_DATA_PATH = os.getenv("OUTPUT_DATA_PATH", "data/output/")
 
+# Rows per chunk when streaming large timetable CSVs
+CSV_CHUNKSIZE = int(os.getenv("CSV_CHUNKSIZE", "100000"))
+
 # API settings
 API_DELAY = int(os.getenv("API_DELAY", "1"))  # Required by OpenStreetMap terms
 RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
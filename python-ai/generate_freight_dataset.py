@@ -6,12 +6,21 @@ Creates 50+ freight trains distributed across 24 hours
 import pandas as pd
 import json
 import random
+import shutil
 from datetime import datetime, timedelta
 
-# Load existing passenger train data
-print("Loading existing train data...")
-df = pd.read_csv('../backend/data/Train_details.csv')
-print(f"Loaded {len(df)} passenger train records")
+SOURCE_FILE = '../backend/data/Train_details.csv'
+CHUNKSIZE = 100000
+
+# Scan existing passenger train data in chunks (only the train number column is read)
+print("Scanning existing train data...")
+passenger_records = 0
+passenger_train_numbers = set()
+for chunk in pd.read_csv(SOURCE_FILE, usecols=['Train No'], chunksize=CHUNKSIZE):
+    passenger_records += len(chunk)
+    passenger_train_numbers.update(chunk['Train No'].dropna().unique().tolist())
+source_columns = pd.read_csv(SOURCE_FILE, nrows=0).columns
+print(f"Loaded {passenger_records} passenger train records")
 
 # Load stations
 with open('data/processed/stations_geocoded.json', 'r') as f:
@@ -129,36 +138,46 @@ freight_df = pd.DataFrame(freight_data)
 
 print(f"\n✅ Generated {len(freight_data)} freight train records ({len(freight_data)//2} trains)")
 
-# Combine with existing passenger trains
+# Combine with existing passenger trains by appending to a copy of the file,
+# so the passenger data is never loaded into memory
 print("\n📦 Combining with existing passenger trains...")
-combined_df = pd.concat([df, freight_df], ignore_index=True)
-
-# Save to new CSV
 output_file = '../backend/data/Train_details_with_freight.csv'
-combined_df.to_csv(output_file, index=False)
+shutil.copyfile(SOURCE_FILE, output_file)
+
+with open(output_file, 'rb+') as f:
+    f.seek(0, 2)
+    if f.tell() > 0:
+        f.seek(-1, 2)
+        if f.read(1) != b'\n':
+            f.write(b'\n')
+
+freight_df.reindex(columns=source_columns).to_csv(output_file, mode='a', header=False, index=False)
+
+num_passenger_trains = len(passenger_train_numbers)
+num_freight_trains = freight_df['Train No'].nunique()
+num_total_trains = len(passenger_train_numbers | set(freight_df['Train No'].unique().tolist()))
 
 print(f"\n💾 Saved combined dataset to: {output_file}")
-print(f"   Total trains: {len(combined_df['Train No'].unique())}")
-print(f"   Passenger trains: {len(df['Train No'].unique())}")
-print(f"   Freight trains: {len(freight_df['Train No'].unique())}")
+print(f"   Total trains: {num_total_trains}")
+print(f"   Passenger trains: {num_passenger_trains}")
+print(f"   Freight trains: {num_freight_trains}")
 
 # Create backup of original
-import shutil
 backup_file = '../backend/data/Train_details_BACKUP.csv'
-shutil.copy('../backend/data/Train_details.csv', backup_file)
+shutil.copy(SOURCE_FILE, backup_file)
 print(f"\n📋 Backup of original saved to: {backup_file}")
 
 # Replace original with combined
-shutil.copy(output_file, '../backend/data/Train_details.csv')
+shutil.copy(output_file, SOURCE_FILE)
 print(f"✅ Replaced Train_details.csv with combined dataset")
 
 print("\n" + "="*60)
 print("🎉 SUCCESS! Freight trains added to dataset")
 print("="*60)
 print("\nYour dataset now includes:")
-print(f"  • {len(df['Train No'].unique())} Passenger trains")
-print(f"  • {len(freight_df['Train No'].unique())} Freight trains")
-print(f"  • Total: {len(combined_df['Train No'].unique())} trains")
+print(f"  • {num_passenger_trains} Passenger trains")
+print(f"  • {num_freight_trains} Freight trains")
+print(f"  • Total: {num_total_trains} trains")
 print("\nFreight trains are distributed across 24 hours")
 print("You can now optimize at any time!")
 print("\nNext steps:")
@@ -4,32 +4,222 @@ Detects various types of conflicts in train schedules
 """
 
 import json
+import numpy as np
+
+from models.conflict_index import ConflictIndex
+from models.section_occupancy import section_intervals, section_conflicts
+from utils.station_registry import StationRegistry
+from utils.worker_pool import WorkerPool
+
+
+# Array kernels shared by the serial detectors and the station-sharded
+# worker processes: they see only flat per-stop arrays, never train dicts
+
+def _first_seen_ranks(station_ids):
+    """Rank of each stop's station by order of first appearance"""
+    _, first_seen, inverse = np.unique(station_ids, return_index=True, return_inverse=True)
+    return np.argsort(np.argsort(first_seen))[inverse.reshape(-1)]
+
+
+def _whole_minutes(minutes):
+    """Integer minutes as int64 (the NaN-capable float64 route arrays hold them as floats)"""
+    if np.array_equal(minutes, np.round(minutes)):
+        return minutes.astype(np.int64)
+    return minutes
+
+
+def _overlapping_pairs(station_keys, arrivals, departures, margin):
+    """
+    Stop pairs (i, j) at the same station where j arrives no earlier than
+    i (ties in input order) and before departure_i + margin
+
+    Stops are sorted by (station key, arrival) once; one searchsorted over
+    (station key, arrival) composite values finds every stop's overlap
+    range, so the cost is O(n log n + pairs).
+
+    Returns:
+        (firsts, seconds) indices into the input arrays, ordered by
+        station key, then by the first stop's arrival
+    """
+    n = len(station_keys)
+    if n < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    order = np.lexsort((arrivals, station_keys))
+    keys = station_keys[order].astype(np.float64)
+    arrivals = arrivals[order].astype(np.float64)
+    departures = departures[order].astype(np.float64)
+
+    # Wide enough that a search never leaves its own station's block upwards
+    low = arrivals.min()
+    span = max(arrivals.max(), departures.max() + margin) - low + 1
+    composite = keys * span + (arrivals - low)
+    ends = np.searchsorted(composite, keys * span + (departures + margin - low), side='left')
+    counts = np.maximum(ends - np.arange(n) - 1, 0)
+
+    firsts = np.repeat(np.arange(n), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return order[firsts], order[firsts + 1 + offsets]
+
+
+def _overcrowded_intervals(station_ids, arrivals, departures, capacities):
+    """
+    Maximal intervals in which more stops are present at a station than
+    its capacity
+
+    Sweep over arrive (+1) / depart (-1) events sorted per station: a stop
+    occupies minutes int(arrival)..int(departure), so it leaves at
+    int(departure) + 1. capacities holds each stop's station capacity.
+
+    Returns:
+        dict of arrays: 'station', 'start', 'end', 'peak', 'capacity' per
+        interval (ordered by station id, then time) and 'members' (indices
+        into the input arrays) split by 'member_counts'
+    """
+    starts = arrivals.astype(np.int64)
+    ends = departures.astype(np.int64) + 1
+    keep = np.flatnonzero(ends > starts)
+    empty = np.zeros(0, dtype=np.int64)
+    result = {key: empty for key in ('station', 'start', 'end', 'peak', 'capacity', 'members', 'member_counts')}
+    if not len(keep):
+        return result
+
+    stations, starts, ends, capacities = station_ids[keep], starts[keep], ends[keep], capacities[keep]
+    n = len(stations)
+
+    # Events per station by time, departures before arrivals at the same minute
+    event_stations = np.concatenate([stations, stations])
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([np.ones(n, dtype=np.int64), -np.ones(n, dtype=np.int64)])
+    event_capacity = np.concatenate([capacities, capacities])
+    order = np.lexsort((deltas, times, event_stations))
+    event_stations, times, event_capacity = event_stations[order], times[order], event_capacity[order]
+    occupancy = np.cumsum(deltas[order])  # back to 0 after each station's last departure
+
+    # Occupancy only counts once every event of a minute is applied
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = (event_stations[1:] != event_stations[:-1]) | (times[1:] != times[:-1])
+    event_stations, times, occupancy, event_capacity = (
+        event_stations[last], times[last], occupancy[last], event_capacity[last]
+    )
+
+    over = occupancy > event_capacity
+    before = np.concatenate([[False], over[:-1]])
+    after = np.concatenate([over[1:], [False]])
+    firsts = np.flatnonzero(over & ~before)
+    lasts = np.flatnonzero(over & ~after)
+    if not len(firsts):
+        return result
+
+    # Stays by (station, arrival) to list the stops of each interval
+    by_station = np.lexsort((starts, stations))
+    sorted_stations = stations[by_station]
+    sorted_starts = starts[by_station]
+    longest = int((ends - starts).max())
+
+    interval_ends = times[lasts + 1] - 1  # the interval closes at the next minute's events
+    # Each station's last time point is back at 0, so lasts + 1 stays in range
+    peaks = np.maximum.reduceat(occupancy, np.ravel(np.column_stack([firsts, lasts + 1])))[::2]
+    members = []
+    for first, station_id, start, end in zip(firsts.tolist(), event_stations[firsts].tolist(),
+                                             times[firsts].tolist(), interval_ends.tolist()):
+        lo, hi = np.searchsorted(sorted_stations, [station_id, station_id + 1])
+        block = sorted_starts[lo:hi]
+        candidates = by_station[lo + np.searchsorted(block, start - longest, side='right'):
+                                lo + np.searchsorted(block, end, side='right')]
+        members.append(keep[candidates[ends[candidates] > start]])
+
+    return {
+        'station': event_stations[firsts],
+        'start': times[firsts],
+        'end': interval_ends,
+        'peak': peaks,
+        'capacity': event_capacity[firsts],
+        'members': np.concatenate(members),
+        'member_counts': np.asarray([len(m) for m in members], dtype=np.int64)
+    }
+
+
+def _detect_shard(shard):
+    """Track pairs and platform intervals for one shard of stations (worker process)"""
+    pairs = _overlapping_pairs(shard['ranks'], shard['arrivals'], shard['departures'], shard['margin'])
+    intervals = _overcrowded_intervals(shard['station_ids'], shard['arrivals'], shard['departures'],
+                                       shard['capacities'])
+    return pairs, intervals
+
 
 class ConflictDetector:
-    def __init__(self, train_schedules):
+    # Platforms assumed at stations missing from platform_counts
+    DEFAULT_PLATFORMS = 2
+    
+    # Minutes a following train must keep clear of a departure
+    TRACK_MARGIN = 5
+    
+    # Minutes between two trains entering or leaving the same block section
+    SECTION_HEADWAY = 5
+    
+    # Conflict types that depend only on the stops at their station
+    ROUTE_TYPES = ('track_occupancy', 'platform_conflict')
+    
+    # Conflict types that depend only on the trains in their block section
+    SECTION_TYPES = ('section_overtaking', 'section_headway')
+    
+    # update_train() re-detects everything once the trains calling at the
+    # changed stations exceed this share of the timetable
+    FULL_RECHECK_SHARE = 0.5
+    
+    # Worker processes of _detect_parallel, started on first use and shared
+    # by all detectors
+    _pool = WorkerPool()
+    
+    def __init__(self, train_schedules, registry=None, platform_counts=None):
         """
         Initialize with train schedules
+        registry: shared StationRegistry (built from the schedules if omitted)
+        platform_counts: {station code: number of platforms}; others get DEFAULT_PLATFORMS
         """
-        self.trains = train_schedules
-        self.conflicts = []
+        # Own copy of the schedule dict: update_train() replaces entries in it
+        self.trains = dict(train_schedules)
+        self.registry = registry or StationRegistry.build(trains=train_schedules)
         self.conflict_id_counter = 1
         
-    def detect_all_conflicts(self):
+        # Last detection, kept current by update_train()
+        self.index = ConflictIndex()
+        self._detected = False
+        self._calls = None
+        self._all_stops = None
+        self._all_routes = None
+        self._train_order = {train_id: i for i, train_id in enumerate(train_schedules)}
+        
+        # Platform capacity per station id
+        self.platforms = [self.DEFAULT_PLATFORMS] * len(self.registry)
+        for code, count in (platform_counts or {}).items():
+            station_id = self.registry.id_of(code)
+            if station_id >= 0:
+                self.platforms[station_id] = count
+        
+    def detect_all_conflicts(self, workers=None):
         """
         Detect all types of conflicts in the schedule
         
+        Args:
+            workers: worker processes for the track and platform checks
+                (default: one process); results are identical either way
+        
         Returns:
             dict with all detected conflicts
         """
         print("\n🔍 Detecting Conflicts...")
         
-        self.conflicts = []
-        
-        # Type 1: Track Occupancy Conflicts
-        track_conflicts = self._detect_track_occupancy()
-        
-        # Type 2: Platform Conflicts
-        platform_conflicts = self._detect_platform_conflicts()
+        if workers and workers > 1:
+            # Types 1 and 2, stations sharded across processes
+            track_conflicts, platform_conflicts = self._detect_parallel(workers)
+        else:
+            # Type 1: Track Occupancy Conflicts
+            track_conflicts = self._detect_track_occupancy()
+            
+            # Type 2: Platform Conflicts
+            platform_conflicts = self._detect_platform_conflicts()
         
         # Type 3: Early Arrivals
         early_arrivals = self._detect_early_arrivals()
@@ -37,17 +227,24 @@ class ConflictDetector:
         # Type 4: Excessive Delays
         excessive_delays = self._detect_excessive_delays()
         
+        # Type 5: Block Section (between-station) Conflicts
+        section_conflicts = self._detect_section_conflicts()
+        
         all_conflicts = (
             track_conflicts + 
             platform_conflicts + 
             early_arrivals + 
-            excessive_delays
+            excessive_delays + 
+            section_conflicts
         )
+        self.index.clear()
+        self.index.extend(all_conflicts)
+        self._detected = True
         
         # Categorize by severity
-        high_severity = [c for c in all_conflicts if c['severity'] == 'high']
-        medium_severity = [c for c in all_conflicts if c['severity'] == 'medium']
-        low_severity = [c for c in all_conflicts if c['severity'] == 'low']
+        high_severity = self.index.with_severity('high')
+        medium_severity = self.index.with_severity('medium')
+        low_severity = self.index.with_severity('low')
         
         print(f"\n📊 Conflict Summary:")
         print(f"   Total Conflicts: {len(all_conflicts)}")
@@ -67,112 +264,460 @@ class ConflictDetector:
                 "track_occupancy": track_conflicts,
                 "platform_conflict": platform_conflicts,
                 "early_arrival": early_arrivals,
-                "excessive_delay": excessive_delays
+                "excessive_delay": excessive_delays,
+                "section_overtaking": [c for c in section_conflicts if c['type'] == 'section_overtaking'],
+                "section_headway": [c for c in section_conflicts if c['type'] == 'section_headway']
             }
         }
     
-    def _detect_track_occupancy(self):
-        """Detect when two trains want same track section at same time"""
-        conflicts = []
+    def _stop_arrays(self, station_ids=None):
+        """
+        Every stop with both times known, as flat arrays
         
-        print("\n   Checking track occupancy conflicts...")
+        station_ids: only stops at these station ids (all stations if omitted);
+            only the trains calling there are visited
+        
+        Returns:
+            (station ids, arrival minutes, departure minutes, train ids);
+            stations in order of first appearance, like the old per-station dicts.
+            Sliced from _route_arrays(), so the schedules are walked only
+            once; the full set is cached until update_train() changes a route.
+        """
+        if station_ids is None and self._all_stops is not None:
+            return self._all_stops
         
-        # Build station timeline
-        station_timeline = {}
+        if station_ids is None:
+            routes = self._route_arrays()
+        else:
+            calls = self._calls_index()
+            callers = {train_id for station_id in station_ids for train_id in calls.get(station_id, ())}
+            routes = self._route_arrays(sorted(callers, key=self._train_order.get))
+        _, stop_stations, arrivals, departures, row_trains = routes
         
-        for train_id, train in self.trains.items():
-            for station in train['route']:
-                station_code = station['station_code']
+        keep = ~(np.isnan(arrivals) | np.isnan(departures))
+        if station_ids is not None:
+            keep &= np.isin(stop_stations, np.fromiter(station_ids, dtype=np.int64))
+        rows = np.flatnonzero(keep)
+        
+        stops = (
+            stop_stations[rows],
+            _whole_minutes(arrivals[rows]),
+            _whole_minutes(departures[rows]),
+            [row_trains[row] for row in rows.tolist()]
+        )
+        if station_ids is None:
+            self._all_stops = stops
+        return stops
+    
+    def _calls_index(self):
+        """{station id: set of train ids calling there}, built on first use"""
+        if self._calls is None:
+            calls = {}
+            for train_id, train in self.trains.items():
+                for station_id in self._route_station_ids(train['route']):
+                    calls.setdefault(station_id, set()).add(train_id)
+            self._calls = calls
+        return self._calls
+    
+    def _route_station_ids(self, route):
+        """Distinct station ids on a route"""
+        return {self.registry.id_of(station['station_code']) for station in route}
+    
+    def _route_sections(self, route):
+        """Distinct directed (from id, to id) sections between consecutive stops"""
+        ids = [self.registry.id_of(station['station_code']) for station in route]
+        return set(zip(ids, ids[1:]))
+    
+    def _route_arrays(self, train_ids=None):
+        """
+        Routes as CSR arrays (the Timetable layout), missing times as NaN
+        
+        train_ids: only these trains, in this order (all if omitted)
+        
+        Returns:
+            (offsets, station ids, arrival minutes, departure minutes,
+            train id of each row); the full set is cached like _stop_arrays()
+        """
+        if train_ids is None and self._all_routes is not None:
+            return self._all_routes
+        
+        offsets = [0]
+        station_ids = []
+        arrivals = []
+        departures = []
+        row_trains = []
+        id_of = self.registry.id_of
+        nan = float('nan')
+        for train_id in (self.trains if train_ids is None else train_ids):
+            route = self.trains[train_id]['route']
+            for station in route:
                 arrival = station['arrival_minutes']
                 departure = station['departure_minutes']
-                
-                if station_code not in station_timeline:
-                    station_timeline[station_code] = []
-                
-                if arrival is not None and departure is not None:
-                    station_timeline[station_code].append({
-                        'train_id': train_id,
-                        'train_name': train['train_name'],
-                        'arrival': arrival,
-                        'departure': departure
-                    })
-        
-        # Check for overlaps
-        for station_code, trains_at_station in station_timeline.items():
-            # Sort by arrival time
-            trains_at_station.sort(key=lambda x: x['arrival'])
-            
-            # Check consecutive trains
-            for i in range(len(trains_at_station) - 1):
-                train1 = trains_at_station[i]
-                train2 = trains_at_station[i + 1]
-                
-                # If train2 arrives before train1 departs (with safety margin)
-                if train2['arrival'] < train1['departure'] + 5:
-                    conflict = {
-                        'conflict_id': f"C{self.conflict_id_counter:03d}",
-                        'type': 'track_occupancy',
-                        'severity': 'high',
-                        'station': station_code,
-                        'trains_involved': [train1['train_id'], train2['train_id']],
-                        'train_names': [train1['train_name'], train2['train_name']],
-                        'description': f"Trains {train1['train_id']} and {train2['train_id']} overlap at {station_code}",
-                        'time_gap': train2['arrival'] - train1['departure'],
-                        'recommended_gap': 5
-                    }
-                    conflicts.append(conflict)
-                    self.conflict_id_counter += 1
-                    
-                    print(f"      ⚠️  Conflict at {station_code}: {train1['train_id']} vs {train2['train_id']}")
+                station_ids.append(id_of(station['station_code']))
+                arrivals.append(nan if arrival is None else arrival)
+                departures.append(nan if departure is None else departure)
+            row_trains.extend([train_id] * len(route))
+            offsets.append(offsets[-1] + len(route))
         
-        return conflicts
+        routes = (
+            np.asarray(offsets, dtype=np.int64),
+            np.asarray(station_ids, dtype=np.int64),
+            np.asarray(arrivals, dtype=np.float64),
+            np.asarray(departures, dtype=np.float64),
+            row_trains
+        )
+        if train_ids is None:
+            self._all_routes = routes
+        return routes
     
-    def _detect_platform_conflicts(self):
-        """Detect platform availability conflicts"""
+    def _detect_track_occupancy(self, station_ids=None):
+        """
+        Detect when two trains want same track section at same time
+        (at the given station ids only, if passed)
+        
+        Reports every pair at a station where the later arrival comes
+        before the earlier train's departure plus TRACK_MARGIN, not just
+        consecutive arrivals: a long dwell overlapping several later
+        trains gives one conflict per overlapped train.
+        """
+        print("\n   Checking track occupancy conflicts...")
+        
+        stations, arrivals, departures, train_ids = self._stop_arrays(station_ids)
+        if len(stations) < 2:
+            return []
+        
+        # Stations in order of first appearance, arrivals sorted (stably) within
+        firsts, seconds = _overlapping_pairs(_first_seen_ranks(stations), arrivals, departures, self.TRACK_MARGIN)
+        return self._track_conflicts(firsts, seconds, stations, arrivals, departures, train_ids)
+    
+    def _track_conflicts(self, firsts, seconds, stations, arrivals, departures, train_ids):
+        """Track conflict dicts for stop pairs from _overlapping_pairs()"""
         conflicts = []
+        codes = [self.registry.code(station_id) for station_id in stations[firsts].tolist()]
+        gaps = (arrivals[seconds] - departures[firsts]).tolist()
+        for i, j, station_code, gap in zip(firsts.tolist(), seconds.tolist(), codes, gaps):
+            train1 = train_ids[i]
+            train2 = train_ids[j]
+            conflicts.append({
+                'conflict_id': f"C{self.conflict_id_counter:03d}",
+                'type': 'track_occupancy',
+                'severity': 'high',
+                'station': station_code,
+                'trains_involved': [train1, train2],
+                'train_names': [self.trains[train1]['train_name'], self.trains[train2]['train_name']],
+                'description': f"Trains {train1} and {train2} overlap at {station_code}",
+                'time_gap': gap,
+                'recommended_gap': self.TRACK_MARGIN
+            })
+            self.conflict_id_counter += 1
+        
+        if conflicts:
+            print(f"      ⚠️  {len(conflicts)} overlapping train pairs at "
+                  f"{len({c['station'] for c in conflicts})} stations")
         
+        return conflicts
+    
+    def _detect_platform_conflicts(self, station_ids=None):
+        """
+        Detect platform availability conflicts (at the given station ids
+        only, if passed)
+        
+        Every maximal interval in which more trains are present than the
+        station has platforms gives one conflict, listing all trains
+        present at some point of the interval. O(n log n) in the number
+        of stops.
+        """
         print("\n   Checking platform conflicts...")
         
-        # Simplified: Assume each station has limited platforms
-        # If more than 2 trains at same time, conflict
+        stations, arrivals, departures, train_ids = self._stop_arrays(station_ids)
+        intervals = _overcrowded_intervals(stations, arrivals, departures, self._capacities(stations))
+        return self._platform_conflicts(intervals, train_ids)
+    
+    def _detect_section_conflicts(self, sections=None):
+        """
+        Detect headway and overtaking conflicts on the line between two
+        consecutive stops (on the given (from id, to id) sections only, if
+        passed)
         
-        station_occupancy = {}
+        Each pair of consecutive stops becomes a (from, to, enter, exit)
+        interval on its directed section. A following train that leaves
+        the section before the train ahead of it is an overtaking (high);
+        two trains entering or leaving less than SECTION_HEADWAY minutes
+        apart break the headway (medium).
+        """
+        print("\n   Checking block section conflicts...")
         
-        for train_id, train in self.trains.items():
-            for station in train['route']:
-                station_code = station['station_code']
-                arrival = station['arrival_minutes']
-                departure = station['departure_minutes']
-                
-                if arrival is None or departure is None:
-                    continue
-                
-                # Check each minute
-                for minute in range(int(arrival), int(departure) + 1):
-                    key = f"{station_code}_{minute}"
-                    if key not in station_occupancy:
-                        station_occupancy[key] = []
-                    station_occupancy[key].append(train_id)
-        
-        # Find conflicts (more than 2 trains at same time)
-        for key, trains in station_occupancy.items():
-            if len(trains) > 2:
-                station_code = key.split('_')[0]
-                conflict = {
-                    'conflict_id': f"C{self.conflict_id_counter:03d}",
-                    'type': 'platform_conflict',
-                    'severity': 'medium',
-                    'station': station_code,
-                    'trains_involved': trains,
-                    'description': f"{len(trains)} trains at {station_code} simultaneously",
-                    'platform_capacity': 2,
-                    'trains_present': len(trains)
-                }
-                conflicts.append(conflict)
-                self.conflict_id_counter += 1
+        if sections is None:
+            routes = self._route_arrays()
+        else:
+            calls = self._calls_index()
+            callers = {train_id for from_id, _ in sections for train_id in calls.get(from_id, ())}
+            routes = self._route_arrays(sorted(callers, key=self._train_order.get))
+        offsets, station_ids, arrivals, departures, row_trains = routes
+        
+        intervals = section_intervals(offsets, station_ids, arrivals, departures)
+        if sections is not None:
+            keep = np.fromiter(
+                (section in sections for section in zip(intervals['from'].tolist(), intervals['to'].tolist())),
+                dtype=bool, count=len(intervals['from'])
+            )
+            intervals = {key: values[keep] for key, values in intervals.items()}
+        
+        firsts, seconds, overtaking = section_conflicts(
+            intervals['from'], intervals['to'], intervals['enter'], intervals['exit'], self.SECTION_HEADWAY
+        )
+        
+        conflicts = []
+        code = self.registry.code
+        from_codes = [code(station_id) for station_id in intervals['from'][firsts].tolist()]
+        to_codes = [code(station_id) for station_id in intervals['to'][firsts].tolist()]
+        trains1 = [row_trains[row] for row in intervals['row'][firsts].tolist()]
+        trains2 = [row_trains[row] for row in intervals['row'][seconds].tolist()]
+        entry_gaps = (intervals['enter'][seconds] - intervals['enter'][firsts]).tolist()
+        exit_gaps = (intervals['exit'][seconds] - intervals['exit'][firsts]).tolist()
+        for train1, train2, from_code, to_code, overtakes, entry_gap, exit_gap in zip(
+                trains1, trains2, from_codes, to_codes, overtaking.tolist(), entry_gaps, exit_gaps):
+            if overtakes:
+                description = f"Train {train2} overtakes {train1} between {from_code} and {to_code}"
+            else:
+                description = (f"Trains {train1} and {train2} less than {self.SECTION_HEADWAY} min apart "
+                               f"between {from_code} and {to_code}")
+            conflicts.append({
+                'conflict_id': f"C{self.conflict_id_counter:03d}",
+                'type': 'section_overtaking' if overtakes else 'section_headway',
+                'severity': 'high' if overtakes else 'medium',
+                'station': from_code,
+                'section': f"{from_code}-{to_code}",
+                'from_station': from_code,
+                'to_station': to_code,
+                'trains_involved': [train1, train2],
+                'train_names': [self.trains[train1]['train_name'], self.trains[train2]['train_name']],
+                'description': description,
+                'entry_gap': entry_gap,
+                'exit_gap': exit_gap,
+                'recommended_gap': self.SECTION_HEADWAY
+            })
+            self.conflict_id_counter += 1
+        
+        if conflicts:
+            overtakings = int(overtaking.sum())
+            print(f"      ⚠️  {overtakings} overtakings, {len(conflicts) - overtakings} headway "
+                  f"violations on {len({c['section'] for c in conflicts})} sections")
         
         return conflicts
     
+    def _capacities(self, stations):
+        """Platform capacity of each stop's station"""
+        # Trailing entry: default capacity for unknown stations (id -1)
+        return np.asarray(self.platforms + [self.DEFAULT_PLATFORMS], dtype=np.int64)[stations]
+    
+    def _platform_conflicts(self, intervals, train_ids):
+        """Platform conflict dicts for intervals from _overcrowded_intervals()"""
+        members = np.split(intervals['members'], np.cumsum(intervals['member_counts'])[:-1])
+        return [
+            self._platform_conflict(station_id, start, end, peak, capacity,
+                                    list(dict.fromkeys(train_ids[i] for i in stops.tolist())))
+            for station_id, start, end, peak, capacity, stops in zip(
+                intervals['station'].tolist(), intervals['start'].tolist(), intervals['end'].tolist(),
+                intervals['peak'].tolist(), intervals['capacity'].tolist(), members
+            )
+        ]
+    
+    def _detect_parallel(self, workers):
+        """
+        Track and platform conflicts with stations sharded across processes
+        
+        Stations are cut into contiguous runs of about equal stop counts
+        (a few per worker). Workers only receive per-stop arrays and send
+        back stop indices, so conflict dicts and ids are built here in the
+        same order as the serial detectors.
+        
+        Returns:
+            (track conflicts, platform conflicts)
+        """
+        print("\n   Checking track and platform conflicts "
+              f"({workers} workers)...")
+        
+        stations, arrivals, departures, train_ids = self._stop_arrays()
+        if not len(stations):
+            return [], []
+        ranks = _first_seen_ranks(stations)
+        capacities = self._capacities(stations)
+        
+        # Contiguous rank ranges, so per-station results stay together and in order
+        by_rank = np.argsort(ranks, kind='stable')
+        sorted_ranks = ranks[by_rank]
+        targets = np.linspace(0, len(by_rank), workers * 4 + 1)[1:-1].astype(np.int64)
+        cuts = np.unique(np.searchsorted(sorted_ranks, sorted_ranks[targets], side='left'))
+        shards = [stops for stops in np.split(by_rank, cuts) if len(stops)]
+        
+        tasks = [{
+            'ranks': ranks[stops],
+            'station_ids': stations[stops],
+            'arrivals': arrivals[stops],
+            'departures': departures[stops],
+            'capacities': capacities[stops],
+            'margin': self.TRACK_MARGIN
+        } for stops in shards]
+        results = list(self._pool.get(workers).map(_detect_shard, tasks))
+        
+        # Track pairs: shards are already in rank order
+        firsts = np.concatenate([stops[pairs[0]] for stops, (pairs, _) in zip(shards, results)])
+        seconds = np.concatenate([stops[pairs[1]] for stops, (pairs, _) in zip(shards, results)])
+        
+        # Platform intervals: the serial sweep orders them by station id
+        intervals = {key: np.concatenate([part[key] for _, part in results])
+                     for key in ('station', 'start', 'end', 'peak', 'capacity', 'member_counts')}
+        intervals['members'] = np.concatenate([stops[part['members']] for stops, (_, part) in zip(shards, results)])
+        by_station = np.argsort(intervals['station'], kind='stable')
+        offsets = np.cumsum(intervals['member_counts']) - intervals['member_counts']
+        intervals['members'] = np.concatenate(
+            [intervals['members'][offsets[i]:offsets[i] + intervals['member_counts'][i]] for i in by_station.tolist()]
+        ) if len(by_station) else intervals['members']
+        for key in ('station', 'start', 'end', 'peak', 'capacity', 'member_counts'):
+            intervals[key] = intervals[key][by_station]
+        
+        return (
+            self._track_conflicts(firsts, seconds, stations, arrivals, departures, train_ids),
+            self._platform_conflicts(intervals, train_ids)
+        )
+    
+    def _platform_conflict(self, station_id, start, end, peak, capacity, trains):
+        """One merged platform conflict for an over-capacity interval"""
+        station_code = self.registry.code(station_id)
+        conflict = {
+            'conflict_id': f"C{self.conflict_id_counter:03d}",
+            'type': 'platform_conflict',
+            'severity': 'medium',
+            'station': station_code,
+            'trains_involved': trains,
+            'description': f"{peak} trains at {station_code} simultaneously (minutes {start}-{end})",
+            'platform_capacity': capacity,
+            'trains_present': peak,
+            'start_minute': start,
+            'end_minute': end,
+            'duration_minutes': end - start + 1
+        }
+        self.conflict_id_counter += 1
+        return conflict
+    
+    def update_train(self, train_id, new_route):
+        """
+        Replace one train's route and recheck only the stations it touches
+        
+        Track and platform conflicts at a station depend only on the stops
+        at that station, so just the stations on the old and new route are
+        re-detected and compared with the stored conflicts; likewise only
+        the block sections on the old and new route. When the trains calling
+        at those stations make up more than FULL_RECHECK_SHARE of the
+        timetable, a scoped recheck would cost as much as a full one, so
+        every station and section is re-detected instead (same result).
+        A conflict is the same one while its type, station (or section)
+        and set of trains stay the same: it keeps its conflict_id, and
+        shows up in 'updated' if any detail (time gap, minutes, peak,
+        train order) changed. New conflicts get fresh ids. The first call
+        runs detect_all_conflicts() for the baseline. The schedules passed
+        to the constructor are left untouched.
+        
+        Args:
+            train_id: ID of a train in the schedules
+            new_route: its new list of stops (same fields as the schedules)
+        
+        Returns:
+            dict with 'added', 'removed' and 'updated' conflicts, and
+            'full_recheck' telling whether every station was re-detected
+        """
+        if train_id not in self.trains:
+            raise KeyError(f"Unknown train {train_id}")
+        new_stations = self._route_station_ids(new_route)
+        if self.registry.MISSING in new_stations:
+            raise ValueError(f"Route of train {train_id} has stations missing from the registry")
+        
+        if not self._detected:
+            self.detect_all_conflicts()
+        
+        calls = self._calls_index()
+        old_route = self.trains[train_id]['route']
+        old_stations = self._route_station_ids(old_route)
+        sections = self._route_sections(old_route) | self._route_sections(new_route)
+        for station_id in old_stations:
+            calls[station_id].discard(train_id)
+        for station_id in new_stations:
+            calls.setdefault(station_id, set()).add(train_id)
+        self.trains[train_id] = {**self.trains[train_id], 'route': new_route}
+        self._all_stops = None
+        self._all_routes = None
+        
+        affected = sorted(old_stations | new_stations)
+        callers = {caller for station_id in affected for caller in calls.get(station_id, ())}
+        full_recheck = len(callers) > self.FULL_RECHECK_SHARE * len(self.trains)
+        
+        previous = {}
+        if full_recheck:
+            for conflict in self.index:
+                if conflict['type'] in self.ROUTE_TYPES + self.SECTION_TYPES:
+                    previous.setdefault(self._conflict_key(conflict), []).append(conflict)
+        else:
+            for station_id in affected:
+                for conflict in self.index.at_station(self.registry.code(station_id)):
+                    if conflict['type'] in self.ROUTE_TYPES:
+                        previous.setdefault(self._conflict_key(conflict), []).append(conflict)
+            for from_id in sorted({from_id for from_id, _ in sections}):
+                for conflict in self.index.at_station(self.registry.code(from_id)):
+                    section = (from_id, self.registry.id_of(conflict.get('to_station')))
+                    if conflict['type'] in self.SECTION_TYPES and section in sections:
+                        previous.setdefault(self._conflict_key(conflict), []).append(conflict)
+        
+        # Ids are handed out below, once matched against the stored conflicts
+        counter = self.conflict_id_counter
+        if full_recheck:
+            fresh = (
+                self._detect_track_occupancy() +
+                self._detect_platform_conflicts() +
+                self._detect_section_conflicts()
+            )
+        else:
+            fresh = (
+                self._detect_track_occupancy(affected) +
+                self._detect_platform_conflicts(affected) +
+                self._detect_section_conflicts(sections)
+            )
+        self.conflict_id_counter = counter
+        
+        added = []
+        updated = []
+        for conflict in fresh:
+            matches = previous.get(self._conflict_key(conflict))
+            if matches:
+                prior = matches.pop(0)
+                conflict['conflict_id'] = prior['conflict_id']
+                if conflict != prior:
+                    updated.append(conflict)
+            else:
+                conflict['conflict_id'] = f"C{self.conflict_id_counter:03d}"
+                self.conflict_id_counter += 1
+                added.append(conflict)
+        
+        removed = [conflict for matches in previous.values() for conflict in matches]
+        for conflict in removed:
+            self.index.remove(conflict['conflict_id'])
+        # Unchanged conflicts stay filed as they are
+        self.index.extend(added + updated)
+        return {
+            'train_id': train_id,
+            'full_recheck': full_recheck,
+            'stations_checked': [self.registry.code(station_id) for station_id in affected],
+            'sections_checked': [f"{self.registry.code(a)}-{self.registry.code(b)}" for a, b in sorted(sections)],
+            'added': added,
+            'removed': removed,
+            'updated': updated
+        }
+    
+    @staticmethod
+    def _conflict_key(conflict):
+        """Identity of a conflict across updates; the order of its trains does not matter"""
+        return (conflict['type'], conflict.get('section', conflict['station']), tuple(sorted(conflict['trains_involved'])))
+    
     def _detect_early_arrivals(self):
         """Detect trains arriving earlier than scheduled"""
         conflicts = []
@@ -195,14 +740,23 @@ class ConflictDetector:
         
         return conflicts
     
+    @property
+    def conflicts(self):
+        """Conflicts from the last detection, with update_train() changes applied"""
+        return list(self.index)
+    
     def get_conflicts_by_station(self, station_code):
         """Get all conflicts at a specific station"""
-        return [c for c in self.conflicts if c.get('station') == station_code]
+        return self.index.at_station(station_code)
     
     def get_conflicts_by_train(self, train_id):
         """Get all conflicts involving a specific train"""
-        return [c for c in self.conflicts if train_id in c.get('trains_involved', [])]
+        return self.index.for_train(train_id)
+    
+    def get_conflicts_by_type(self, conflict_type):
+        """Get all conflicts of one type"""
+        return self.index.of_type(conflict_type)
     
     def get_high_priority_conflicts(self):
         """Get only high severity conflicts"""
-        return [c for c in self.conflicts if c['severity'] == 'high']
+        return self.index.with_severity('high')
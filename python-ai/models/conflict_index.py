@@ -0,0 +1,88 @@
+"""
+Conflict Index
+Detected conflicts indexed by station, train, type and severity
+"""
+
+from typing import Dict, Iterable, Iterator, List
+
+
+class ConflictIndex:
+    """
+    Conflict dicts keyed by conflict_id, plus one inverted index per
+    query field.
+
+    Every index maps a value (station code, train id, type, severity) to
+    an insertion-ordered {conflict_id: conflict} dict, so adding or
+    removing a conflict is O(1) per indexed value and a query costs O(1)
+    plus the size of its answer. Results keep the order in which the
+    conflicts were added.
+    """
+
+    def __init__(self, conflicts: Iterable[Dict] = ()):
+        self.conflicts: Dict[str, Dict] = {}
+        self.by_station: Dict[str, Dict[str, Dict]] = {}
+        self.by_train: Dict[str, Dict[str, Dict]] = {}
+        self.by_type: Dict[str, Dict[str, Dict]] = {}
+        self.by_severity: Dict[str, Dict[str, Dict]] = {}
+        self.extend(conflicts)
+
+    def __len__(self):
+        return len(self.conflicts)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.conflicts.values())
+
+    def __contains__(self, conflict_id):
+        return conflict_id in self.conflicts
+
+    def _keys(self, conflict: Dict):
+        """(index, value) pairs a conflict is filed under"""
+        if conflict.get('station') is not None:
+            yield self.by_station, conflict['station']
+        for train_id in dict.fromkeys(conflict.get('trains_involved', [])):
+            yield self.by_train, train_id
+        yield self.by_type, conflict['type']
+        yield self.by_severity, conflict['severity']
+
+    def add(self, conflict: Dict):
+        """Add a conflict, replacing any stored one with the same conflict_id"""
+        conflict_id = conflict['conflict_id']
+        if conflict_id in self.conflicts:
+            self.remove(conflict_id)
+        self.conflicts[conflict_id] = conflict
+        for index, value in self._keys(conflict):
+            index.setdefault(value, {})[conflict_id] = conflict
+
+    def extend(self, conflicts: Iterable[Dict]):
+        for conflict in conflicts:
+            self.add(conflict)
+
+    def remove(self, conflict_id: str) -> Dict:
+        """Remove and return a conflict (KeyError if unknown)"""
+        conflict = self.conflicts.pop(conflict_id)
+        for index, value in self._keys(conflict):
+            entries = index[value]
+            del entries[conflict_id]
+            if not entries:
+                del index[value]
+        return conflict
+
+    def clear(self):
+        for store in (self.conflicts, self.by_station, self.by_train, self.by_type, self.by_severity):
+            store.clear()
+
+    @staticmethod
+    def _lookup(index: Dict[str, Dict[str, Dict]], value) -> List[Dict]:
+        return list(index.get(value, {}).values())
+
+    def at_station(self, station_code: str) -> List[Dict]:
+        return self._lookup(self.by_station, station_code)
+
+    def for_train(self, train_id: str) -> List[Dict]:
+        return self._lookup(self.by_train, train_id)
+
+    def of_type(self, conflict_type: str) -> List[Dict]:
+        return self._lookup(self.by_type, conflict_type)
+
+    def with_severity(self, severity: str) -> List[Dict]:
+        return self._lookup(self.by_severity, severity)
@@ -0,0 +1,176 @@
+"""
+CP-SAT Freight Slot Assignment
+Exact assignment of freight trains to time gaps with OR-Tools CP-SAT
+"""
+
+import os
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # optional: optimize() falls back to greedy without it
+    cp_model = None
+
+
+def headway_cliques(keys: np.ndarray, times: np.ndarray, min_headway: float) -> List[np.ndarray]:
+    """
+    Groups of items that pairwise conflict on headway
+
+    Two items conflict when they share a key (station) and their times
+    differ by less than min_headway. Every conflicting pair lies in the
+    window [t, t + min_headway) starting at the earlier time, so one
+    AtMostOne per maximal window covers all of them exactly.
+    """
+    if len(times) == 0:
+        return []
+
+    order = np.lexsort((times, keys))
+    sorted_keys = keys[order].astype(np.float64)
+    sorted_times = times[order].astype(np.float64)
+
+    # Spread the keys into disjoint bands of one flat sorted axis, then
+    # find where each item's window ends with a single searchsorted
+    span = sorted_times.max() - sorted_times.min() + min_headway + 1
+    flat = (sorted_keys - sorted_keys.min()) * span + (sorted_times - sorted_times.min())
+    ends = np.searchsorted(flat, flat + min_headway, side='left')
+
+    cliques = []
+    last_end = 0
+    for start, end in enumerate(ends.tolist()):
+        if end - start >= 2 and end > last_end:
+            cliques.append(order[start:end])
+            last_end = end
+    return cliques
+
+
+class CPSatScheduler:
+    """
+    CP-SAT model of the freight slot assignment.
+
+    A freight train is an (origin gap, destination station) pair: its
+    departure is the gap start and its arrival follows from the distance.
+    One boolean per candidate pair; each origin gap keeps only its
+    `candidates_per_gap` best-scoring destinations. Headway conflicts at
+    origins and destinations are hard AtMostOne constraints, and the
+    objective is the per-train part of FreightOptimizer.fitness_function()
+    (train count, distance and gap utilization).
+    """
+
+    # Objective coefficients are integers: fitness points * SCALE
+    SCALE = 100
+
+    def __init__(self, gap_stations, gap_starts, gap_sizes, station_distances, num_trains: int,
+                 min_headway: int = 5, freight_avg_speed: float = 40, candidates_per_gap: int = 10):
+        self.gap_stations = np.asarray(gap_stations, dtype=np.int64)
+        self.gap_starts = np.asarray(gap_starts, dtype=np.float64)
+        self.gap_sizes = np.asarray(gap_sizes, dtype=np.float64)
+        self.station_distances = np.asarray(station_distances, dtype=np.float32)
+        self.num_trains = num_trains
+        self.min_headway = min_headway
+        self.freight_avg_speed = freight_avg_speed
+        self.candidates_per_gap = candidates_per_gap
+
+        # First gap at every local station (destination gap used for decoding)
+        self.station_gap = np.full(len(self.station_distances), -1, dtype=np.int64)
+        first = np.unique(self.gap_stations, return_index=True)
+        self.station_gap[first[0]] = first[1]
+
+    def pair_scores(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Fitness contribution and travel time of every (origin gap, destination station)"""
+        distance = self.station_distances[self.gap_stations].astype(np.float64)
+        travel_time = (distance / self.freight_avg_speed) * 60
+
+        utilization = (np.round(travel_time, 2) / self.gap_sizes[:, None]) * 100
+        score = 100 + np.round(distance, 2) * 2 + np.where(
+            (utilization >= 50) & (utilization <= 90), 50, -np.abs(utilization - 70)
+        )
+
+        # A train cannot end at its origin station
+        score[np.arange(len(self.gap_stations)), self.gap_stations] = -np.inf
+        return score, travel_time
+
+    def candidates(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Top-K destinations per origin gap: (gap, station, score, arrival) arrays"""
+        score, travel_time = self.pair_scores()
+        n_stations = score.shape[1]
+        k = min(self.candidates_per_gap, n_stations - 1)
+
+        best = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        gaps = np.repeat(np.arange(len(score)), best.shape[1])
+        stations = best.ravel()
+
+        scores = score[gaps, stations]
+        keep = np.isfinite(scores)
+        gaps, stations, scores = gaps[keep], stations[keep], scores[keep]
+        arrivals = self.gap_starts[gaps] + travel_time[gaps, stations]
+        return gaps, stations, scores, arrivals
+
+    def solve(self, time_limit_s: float = 10.0, workers: Optional[int] = None,
+              hint: Optional[List[Tuple[int, int]]] = None) -> Dict:
+        """
+        Build and solve the model
+
+        Args:
+            time_limit_s: solver wall-clock limit
+            workers: parallel search workers (default: CPU count)
+            hint: (origin gap, destination gap) pairs of a known solution
+
+        Returns:
+            dict with 'status', 'genes' ((origin gap, destination gap) pairs,
+            empty if no solution was found), 'objective', 'best_bound',
+            'optimality_gap', 'wall_time_ms' and 'candidates'
+        """
+        if cp_model is None:
+            raise ImportError("ortools is not installed (pip install ortools)")
+
+        started = time.monotonic()
+        gaps, stations, scores, arrivals = self.candidates()
+        model = cp_model.CpModel()
+        x = [model.new_bool_var(f'x{i}') for i in range(len(gaps))]
+
+        model.add(cp_model.LinearExpr.sum(x) <= self.num_trains)
+
+        # No double booking: headway at the origin (departures) and destination (arrivals)
+        for clique in headway_cliques(self.gap_stations[gaps], self.gap_starts[gaps], self.min_headway):
+            model.add_at_most_one([x[i] for i in clique.tolist()])
+        for clique in headway_cliques(stations, arrivals, self.min_headway):
+            model.add_at_most_one([x[i] for i in clique.tolist()])
+
+        coefficients = np.round(scores * self.SCALE).astype(np.int64).tolist()
+        model.maximize(cp_model.LinearExpr.weighted_sum(x, coefficients))
+
+        if hint:
+            index = {(g, s): i for i, (g, s) in enumerate(zip(gaps.tolist(), stations.tolist()))}
+            for origin, dest in hint:
+                i = index.get((origin, int(self.gap_stations[dest])))
+                if i is not None:
+                    model.add_hint(x[i], True)
+
+        # Model building counts against the time limit
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(time_limit_s - (time.monotonic() - started), 0.01)
+        solver.parameters.num_workers = workers or os.cpu_count() or 1
+        status = solver.solve(model)
+
+        result = {
+            'status': solver.status_name(status),
+            'genes': [],
+            'objective': None,
+            'best_bound': None,
+            'optimality_gap': None,
+            'wall_time_ms': round(solver.wall_time * 1000, 2),
+            'candidates': len(x)
+        }
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            chosen = [i for i in range(len(x)) if solver.boolean_value(x[i])]
+            objective = solver.objective_value / self.SCALE
+            bound = solver.best_objective_bound / self.SCALE
+            result.update({
+                'genes': [(int(gaps[i]), int(self.station_gap[stations[i]])) for i in chosen],
+                'objective': round(objective, 2),
+                'best_bound': round(bound, 2),
+                'optimality_gap': round(abs(bound - objective) / max(1.0, abs(objective)), 6)
+            })
+        return result
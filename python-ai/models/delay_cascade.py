@@ -0,0 +1,206 @@
+"""
+Delay Cascade
+Event-driven, multi-level propagation of a primary delay through the timetable
+"""
+
+import heapq
+from bisect import bisect_left
+from itertools import count
+
+ARRIVAL = 0
+DEPARTURE = 1
+
+MINUTES_PER_DAY = 1440
+
+
+def build_station_index(trains, registry):
+    """
+    Every stop with a known time, per station id, sorted by time
+
+    Returns:
+        {station id: (times, stops)}: `times` is the sorted list to bisect
+        (arrival, or departure at a train's origin) and `stops` holds
+        (train id, stop index, arrival, departure) in the same order, ties
+        broken by train order and stop index
+    """
+    stops_at = {}
+    for order, (train_id, train) in enumerate(trains.items()):
+        for index, stop in enumerate(train['route']):
+            arrival, departure = stop['arrival_minutes'], stop['departure_minutes']
+            time = departure if arrival is None else arrival
+            if time is not None:
+                station_id = registry.id_of(stop['station_code'])
+                stops_at.setdefault(station_id, []).append((time, order, index, train_id, arrival, departure))
+
+    index = {}
+    for station_id, stops in stops_at.items():
+        stops.sort(key=lambda stop: stop[:3])
+        index[station_id] = (
+            [stop[0] for stop in stops],
+            [(train_id, stop_index, arrival, departure) for _, _, stop_index, train_id, arrival, departure in stops]
+        )
+    return index
+
+
+class DelayCascade:
+    """
+    Discrete-event knock-on delay propagation.
+
+    Delayed arrivals and departures are events in a priority queue keyed
+    by their delayed time. An arrival turns into a departure after the
+    dwell slack (dwell beyond MIN_DWELL) has absorbed what it can; a
+    departure carries the delay to the train's next stop and to every
+    train that follows it into the same station within the delay: such
+    a follower loses the delay minus its buffer (the minutes it was
+    planned after departure + safety margin). Trains that arrived before
+    the delayed train are never touched. Times are minutes of the day: a
+    delay window that runs past midnight also reaches the trains planned
+    just after midnight, a day later.
+
+    Delays only grow and never exceed the primary delay, so each stop is
+    re-queued only when its delay increases and the cascade stops once
+    every buffer and slack has absorbed it. Followers come from a
+    per-station list sorted by scheduled arrival, so the cost grows with
+    the number of affected events, not with the size of the network.
+    """
+
+    # Minutes of every scheduled dwell that cannot absorb delay
+    MIN_DWELL = 1
+
+    def __init__(self, trains, registry, safety_margin=5, station_index=None):
+        """
+        Args:
+            trains: dict of train objects (ScheduleBuilder format)
+            registry: StationRegistry covering every station code
+            safety_margin: minutes a follower must keep after a departure
+            station_index: build_station_index() output to share (built if omitted)
+        """
+        self.trains = trains
+        self.safety_margin = safety_margin
+
+        # Scheduled (arrival, departure) per stop; a missing time falls back to the other
+        self.times = {}
+        for train_id, train in trains.items():
+            times = []
+            for stop in train['route']:
+                arrival, departure = stop['arrival_minutes'], stop['departure_minutes']
+                arrival = departure if arrival is None else arrival
+                departure = arrival if departure is None else departure
+                times.append((arrival, departure))
+            self.times[train_id] = times
+
+        # Per station: stops by (arrival, train order, stop index), their
+        # arrivals for bisect, and where each (train, stop) sits in them
+        if station_index is None:
+            station_index = build_station_index(trains, registry)
+        self.station_stops = {}
+        self.station_arrivals = {}
+        self.position = {}
+        for station_id, (arrivals, stops) in station_index.items():
+            self.station_stops[station_id] = [(train_id, index) for train_id, index, _, _ in stops]
+            self.station_arrivals[station_id] = arrivals
+            for pos, (train_id, index, _, _) in enumerate(stops):
+                self.position[(train_id, index)] = (station_id, pos)
+
+    def run(self, train_id, stop_index, delay_minutes):
+        """
+        Propagate a delay of `delay_minutes` on departure from stop
+        `stop_index` of `train_id`
+
+        Returns:
+            dict with 'secondary_delays' (one record per increase of a
+            follower's delay, with its causal chain and depth), 'depth',
+            'final_delays' ({train id: largest delay reached}) and
+            'events_processed'
+        """
+        arrival_delay = {}
+        departure_delay = {}
+        final_delays = {train_id: delay_minutes}
+        secondary_delays = []
+        queue = []
+        sequence = count()
+        now = float('-inf')
+
+        def push(kind, train, index, delay, chain):
+            arrival, departure = self.times[train][index]
+            scheduled = arrival if kind == ARRIVAL else departure
+            heapq.heappush(queue, (max(scheduled + delay, now), next(sequence), kind, train, index, delay, chain))
+
+        if self.times[train_id][stop_index][1] is None:
+            return {"secondary_delays": [], "depth": 0, "final_delays": final_delays, "events_processed": 0}
+        departure_delay[(train_id, stop_index)] = delay_minutes
+        push(DEPARTURE, train_id, stop_index, delay_minutes, (train_id,))
+
+        events = 0
+        while queue:
+            now, _, kind, train, index, delay, chain = heapq.heappop(queue)
+            key = (train, index)
+            events += 1
+
+            if kind == ARRIVAL:
+                if delay != arrival_delay.get(key):
+                    continue  # superseded by a larger delay
+                arrival, departure = self.times[train][index]
+                if index == len(self.times[train]) - 1 or arrival is None:
+                    continue
+                remaining = delay - max(0, departure - arrival - self.MIN_DWELL)
+                if remaining > departure_delay.get(key, 0):
+                    departure_delay[key] = remaining
+                    push(DEPARTURE, train, index, remaining, chain)
+                continue
+
+            if delay != departure_delay.get(key):
+                continue
+
+            # The same train, at its next stop with known times
+            times = self.times[train]
+            following = next((i for i in range(index + 1, len(times)) if times[i][0] is not None), None)
+            if following is not None and delay > arrival_delay.get((train, following), 0):
+                arrival_delay[(train, following)] = delay
+                push(ARRIVAL, train, following, delay, chain)
+
+            # Trains planned into this station after it, until the delay is absorbed
+            if key not in self.position:
+                continue
+            station_id, pos = self.position[key]
+            departure = times[index][1]
+            arrivals = self.station_arrivals[station_id]
+            stops = self.station_stops[station_id]
+            window_end = departure + self.safety_margin + delay
+            followers = [(stop, 0) for stop in stops[pos + 1:bisect_left(arrivals, window_end, pos + 1)]]
+            if window_end > MINUTES_PER_DAY:
+                wrapped = bisect_left(arrivals, window_end - MINUTES_PER_DAY, 0, pos)
+                followers.extend((stop, MINUTES_PER_DAY) for stop in stops[:wrapped])
+            for (follower, follower_index), day in followers:
+                if follower == train:
+                    continue
+                follower_arrival = self.times[follower][follower_index][0] + day
+                buffer = max(0, follower_arrival - departure - self.safety_margin)
+                induced = delay - buffer
+                follower_key = (follower, follower_index)
+                previous = arrival_delay.get(follower_key, 0)
+                if induced <= previous:
+                    continue
+                arrival_delay[follower_key] = induced
+                final_delays[follower] = max(final_delays.get(follower, 0), induced)
+                follower_chain = chain + (follower,)
+                secondary_delays.append({
+                    "train_id": follower,
+                    "train_name": self.trains[follower]['train_name'],
+                    "station": self.trains[follower]['route'][follower_index]['station_code'],
+                    "delay_minutes": induced - previous,
+                    "arrival_delay": induced,
+                    "cause": "track_occupancy",
+                    "caused_by": train,
+                    "type": "secondary",
+                    "depth": len(chain),
+                    "chain": list(follower_chain)
+                })
+                push(ARRIVAL, follower, follower_index, induced, follower_chain)
+
+        return {
+            "secondary_delays": secondary_delays,
+            "depth": max((d['depth'] for d in secondary_delays), default=0),
+            "final_delays": final_delays,
+            "events_processed": events
+        }
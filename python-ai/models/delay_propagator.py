@@ -4,18 +4,39 @@ Calculates how primary delays cause secondary delays (domino effect)
 """
 
 import json
+from bisect import bisect_left
 from datetime import datetime, timedelta
 
+from models.delay_cascade import DelayCascade, build_station_index
+from utils.station_registry import StationRegistry
+
 class DelayPropagator:
-    def __init__(self, train_schedules):
+    def __init__(self, train_schedules, registry=None, lookback=30):
         """
         Initialize with train schedules
         train_schedules: dict of train objects from Phase 1
+        registry: shared StationRegistry (built from the schedules if omitted)
+        lookback: minutes before a delayed departure in which arriving trains
+            can still be held up (None: every earlier arrival, like the old scan)
         """
         self.trains = train_schedules
         self.safety_margin = 5  # Minutes between trains
+        self.lookback = lookback
+        self.registry = registry or StationRegistry.build(trains=train_schedules)
+        
+        # Integer station id of every stop, per train
+        self.route_station_ids = {
+            train_id: self.registry.ids_of([stop['station_code'] for stop in train['route']]).tolist()
+            for train_id, train in self.trains.items()
+        }
         
-    def inject_primary_delay(self, train_id, station_code, delay_minutes, cause="unknown"):
+        # Stops per station id sorted by time, for bisect lookups
+        self.station_index = build_station_index(self.trains, self.registry)
+        
+        # Event-driven multi-level engine, built on first cascade request
+        self._cascade = None
+        
+    def inject_primary_delay(self, train_id, station_code, delay_minutes, cause="unknown", cascade=False):
         """
         Inject a primary delay and calculate propagation
         
@@ -24,6 +45,8 @@ class DelayPropagator:
             station_code: Station where delay occurs
             delay_minutes: Amount of delay in minutes
             cause: Reason for delay (weather, technical, etc.)
+            cascade: follow knock-on delays through every level with
+                DelayCascade (default: first-order delays only)
         
         Returns:
             dict with primary delay and all secondary delays
@@ -67,16 +90,26 @@ class DelayPropagator:
             delay_minutes
         )
         
-        # Find secondary delays (trains affected by this delay)
-        secondary_delays = self._find_secondary_delays(
-            train_id,
-            updated_schedule,
-            delay_station_index
-        )
+        if cascade:
+            # Knock-on delays at every level, with their causal chains
+            cascade_result = self._cascade_engine().run(train_id, delay_station_index, delay_minutes)
+            secondary_delays = cascade_result['secondary_delays']
+            affected_trains = len(cascade_result['final_delays'])
+        else:
+            # Find secondary delays (trains affected by this delay)
+            secondary_delays = self._find_secondary_delays(
+                train_id,
+                updated_schedule,
+                delay_station_index
+            )
+            affected_trains = len(secondary_delays) + 1
         
         # Calculate total impact
-        total_delay = delay_minutes + sum(d['delay_minutes'] for d in secondary_delays)
-        affected_trains = len(secondary_delays) + 1
+        if cascade:
+            # A train delayed at several stops or levels counts once, at its largest delay
+            total_delay = sum(cascade_result['final_delays'].values())
+        else:
+            total_delay = delay_minutes + sum(d['delay_minutes'] for d in secondary_delays)
         
         result = {
             "primary_delay": primary_delay,
@@ -88,6 +121,9 @@ class DelayPropagator:
                 "propagation_depth": self._calculate_depth(secondary_delays)
             }
         }
+        if cascade:
+            result["final_delays"] = cascade_result['final_delays']
+            result["summary"]["events_processed"] = cascade_result['events_processed']
         
         print(f"\n📊 Impact Summary:")
         print(f"   Total Network Delay: {total_delay} minutes")
@@ -122,10 +158,17 @@ class DelayPropagator:
         return updated_route
     
     def _find_secondary_delays(self, delayed_train_id, updated_schedule, delay_start_index):
-        """Find trains that get delayed due to the primary delay"""
+        """
+        Find trains that get delayed due to the primary delay
+        
+        At each remaining station, the trains arriving in
+        [delayed departure - lookback, delayed departure + safety margin]
+        are found by bisecting the station index; earlier arrivals have
+        left by then. With lookback None the window is open at the start,
+        like the previous scan over every other train's stops.
+        """
         secondary_delays = []
         
-        # Check each station in the delayed train's remaining route
         for i in range(delay_start_index, len(updated_schedule)):
             station = updated_schedule[i]
             station_code = station['station_code']
@@ -134,43 +177,40 @@ class DelayPropagator:
             if delayed_departure is None:
                 continue
             
-            # Check all other trains
-            for train_id, train in self.trains.items():
-                if train_id == delayed_train_id:
+            times, stops = self.station_index.get(self.route_station_ids[delayed_train_id][i], ((), ()))
+            limit = delayed_departure + self.safety_margin
+            start = 0 if self.lookback is None else bisect_left(times, delayed_departure - self.lookback)
+            
+            for train_id, _, other_arrival, _ in stops[start:bisect_left(times, limit)]:
+                if train_id == delayed_train_id or other_arrival is None:
                     continue
                 
-                # Check if this train passes through the same station
-                for other_station in train['route']:
-                    if other_station['station_code'] == station_code:
-                        other_arrival = other_station['arrival_minutes']
-                        
-                        if other_arrival is None:
-                            continue
-                        
-                        # Check for conflict (other train arrives while delayed train still there)
-                        if other_arrival < delayed_departure + self.safety_margin:
-                            # Calculate secondary delay
-                            required_wait = (delayed_departure + self.safety_margin) - other_arrival
-                            
-                            if required_wait > 0:
-                                secondary_delays.append({
-                                    "train_id": train_id,
-                                    "train_name": train['train_name'],
-                                    "station": station_code,
-                                    "delay_minutes": required_wait,
-                                    "cause": "track_occupancy",
-                                    "caused_by": delayed_train_id,
-                                    "type": "secondary"
-                                })
-                                
-                                print(f"   ⚠️  Secondary delay: Train {train_id} at {station_code} (+{required_wait} min)")
+                # The other train arrives while the delayed train is still there
+                required_wait = limit - other_arrival
+                if required_wait > 0:
+                    secondary_delays.append({
+                        "train_id": train_id,
+                        "train_name": self.trains[train_id]['train_name'],
+                        "station": station_code,
+                        "delay_minutes": required_wait,
+                        "cause": "track_occupancy",
+                        "caused_by": delayed_train_id,
+                        "type": "secondary"
+                    })
+                    
+                    print(f"   ⚠️  Secondary delay: Train {train_id} at {station_code} (+{required_wait} min)")
         
         return secondary_delays
     
+    def _cascade_engine(self):
+        if self._cascade is None:
+            self._cascade = DelayCascade(self.trains, self.registry, self.safety_margin, self.station_index)
+        return self._cascade
+    
     def _calculate_depth(self, secondary_delays):
         """Calculate propagation depth (how many levels of delays)"""
-        # For now, simple count. Can be enhanced to track actual chain depth
-        return min(len(secondary_delays), 3)
+        # First-order delays carry no depth: they are all one level down
+        return max((d.get('depth', 1) for d in secondary_delays), default=0)
     
     def _minutes_to_time(self, minutes):
         """Convert minutes from midnight to HH:MM:SS format"""
@@ -1,21 +1,67 @@
 """
 Advanced Freight Path Optimization System
 Combines multiple AI algorithms:
-- Genetic Algorithm for optimization
+- Genetic Algorithm for optimization (list-based and vectorized)
 - Constraint Satisfaction Problem (CSP) for validation
-- Dynamic Programming for path finding
+- Time-expanded network shortest paths for routing
 - Greedy Heuristic for quick solutions
 """
+import heapq
 import json
 import random
+import threading
+import time
 import numpy as np
+from bisect import insort
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
 
+from models.cpsat_scheduler import CPSatScheduler
+from models.gap_index import GapIndex, MINUTES_PER_DAY
+from models.incremental_fitness import ScheduleFitness, count_close, count_headway_violations, gene_key
+from models.island_ga import IslandGA
+from models.stop_condition import StopCondition, TIME_BUDGET
+from models.time_expanded_network import TimeExpandedNetwork
+from models.vectorized_ga import VectorizedGA
+from models.warm_start import WarmStartStore
+from utils.station_registry import StationRegistry
+from utils.worker_pool import WorkerPool
+
+# Integer station ids used inside the engine; stripped from API output
+INTERNAL_KEYS = ('station_id', 'origin_id', 'destination_id')
+
+
+def to_public(records: List[Dict]) -> List[Dict]:
+    """Drop engine-internal station ids from gap / freight train dicts"""
+    return [{k: v for k, v in record.items() if k not in INTERNAL_KEYS} for record in records]
+
+
 class FreightOptimizer:
+    # GapIndex per dataset version, shared by all instances (see gap_index)
+    _shared_gap_indexes = {}
+    # TimeExpandedNetwork per dataset version (see time_expanded_network)
+    _shared_networks = {}
+    # Best schedules of earlier calls per dataset version (see warm_start_genes)
+    _warm_starts = WarmStartStore()
+    # Guards builds of the shared caches above
+    _cache_lock = threading.Lock()
+    
     def __init__(self, passenger_trains: List[Dict], stations: Dict):
         self.passenger_trains = passenger_trains
         self.stations = stations
+        self._gap_index = None
+        self._network = None
+        # Per-thread state of the optimize() call in progress (see rng)
+        self._local = threading.local()
+        # Island GA worker processes, started on first use and kept for later calls
+        self._island_pool = WorkerPool()
+        
+        # Station codes -> dense integer ids (shared across instances per dataset)
+        timetable = getattr(passenger_trains, 'timetable', None)
+        if timetable is not None:
+            self.registry = StationRegistry.shared(stations, timetable)
+        else:
+            self.registry = StationRegistry.build(stations, trains=passenger_trains)
         
         # Railway constraints
         self.min_headway = 5  # minutes between trains
@@ -30,174 +76,360 @@ class FreightOptimizer:
         self.crossover_rate = 0.7
         self.elite_size = 10
         
-    def find_time_gaps(self) -> List[Dict]:
+        # Evaluated chromosomes remembered per GA run
+        self.fitness_memo_size = 20000
+        
+        # Early stopping (None = always run all generations)
+        self.stagnation_generations = None
+        self.min_improvement = 0.0
+        
+        # CP-SAT parameters
+        self.cpsat_time_limit_s = 10.0
+        self.cpsat_workers = None  # default: one per CPU
+        self.cpsat_candidates = 10  # destinations kept per origin gap
+        
+        # Island model parameters
+        self.islands = 4
+        self.migration_interval = 10
+        self.migration_size = 5
+        
+        # Warm start: seed GA populations with earlier best schedules and the greedy one
+        self.warm_start = True
+        self.warm_start_bucket_minutes = 30  # time windows starting this close share seeds
+        
+    @property
+    def rng(self) -> random.Random:
         """
-        CSP: Find valid time slots satisfying all constraints
-        Returns gaps between passenger trains at each station
+        Random source of the list-based GA and chromosome operators
+        
+        Inside optimize() this is a per-call random.Random, local to the
+        calling thread, so concurrent requests on one optimizer do not
+        share RNG state. Outside it falls back to the `random` module.
         """
-        gaps = []
-        station_schedules = {}
+        return getattr(self._local, 'rng', None) or random
+    
+    def _passenger_stops(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        """
+        Every passenger stop as flat arrays
         
-        # Build station-wise schedule
+        Returns:
+            (station ids, arrival minutes, train positions, train ids)
+        """
+        timetable = getattr(self.passenger_trains, 'timetable', None)
+        if timetable is not None:
+            return (
+                self.registry.translate(timetable),
+                timetable.arrival_minutes,
+                timetable.train_index,
+                timetable.train_ids
+            )
+        
+        station_ids = []
+        times = []
+        train_positions = []
+        train_ids = []
         for train in self.passenger_trains:
             if not train.get('route'):
                 continue
+            position = len(train_ids)
+            train_ids.append(train['train_id'])
             for stop in train['route']:
-                station = stop['station_code']
-                arrival_time = stop.get('arrival_minutes', 0)
-                
-                if station not in station_schedules:
-                    station_schedules[station] = []
-                
-                station_schedules[station].append({
-                    'train_id': train['train_id'],
-                    'train_name': train.get('train_name', ''),
-                    'time': arrival_time,
-                    'train_type': train.get('train_type', 'passenger')
-                })
+                station_ids.append(self.registry.id_of(stop['station_code']))
+                times.append(stop.get('arrival_minutes', 0))
+                train_positions.append(position)
+        
+        return (
+            np.asarray(station_ids, dtype=np.int32),
+            np.asarray(times, dtype=np.int64),
+            np.asarray(train_positions, dtype=np.int32),
+            train_ids
+        )
+    
+    def find_time_gaps(self, station: Optional[str] = None, start_time: Optional[int] = None,
+                       end_time: Optional[int] = None) -> List[Dict]:
+        """
+        CSP: Find valid time slots satisfying all constraints
+        Returns gaps between passenger trains at each station
         
-        # Find gaps satisfying headway constraints
-        for station, schedule in station_schedules.items():
-            schedule.sort(key=lambda x: x['time'])
-            
-            for i in range(len(schedule) - 1):
-                current_time = schedule[i]['time']
-                next_time = schedule[i+1]['time']
-                gap_size = next_time - current_time
-                
-                # CSP Constraint: Gap must be larger than 2 * headway
-                if gap_size > (self.min_headway * 2) and gap_size < self.max_headway:
-                    gaps.append({
-                        'station': station,
-                        'station_name': self.stations.get(station, {}).get('name', station),
-                        'start_time': current_time + self.min_headway,
-                        'end_time': next_time - self.min_headway,
-                        'gap_size': gap_size - (2 * self.min_headway),
-                        'before_train': schedule[i]['train_id'],
-                        'after_train': schedule[i+1]['train_id']
-                    })
+        Answered from the dataset's GapIndex; optionally only gaps at one
+        station and/or lying within [start_time, end_time].
+        """
+        index = self.gap_index()
+        if station is not None:
+            return index.at_station(self.registry.id_of(station), start_time, end_time)
+        if start_time is not None or end_time is not None:
+            return index.in_window(start_time or 0, end_time if end_time is not None else MINUTES_PER_DAY - 1)
+        return list(index.gaps)
+    
+    def gap_index(self) -> GapIndex:
+        """
+        Index of all time gaps, built once per dataset version
         
-        return gaps
+        Timetable-backed datasets share one index per (version, registry,
+        headway settings) across optimizer instances; plain train lists
+        get one index per optimizer.
+        """
+        timetable = getattr(self.passenger_trains, 'timetable', None)
+        key = (timetable.version if timetable is not None else None,
+               id(self.registry), self.min_headway, self.max_headway)
+        return self._cached('_gap_index', FreightOptimizer._shared_gap_indexes, key,
+                            lambda: GapIndex(self._compute_time_gaps()))
     
-    def calculate_distance(self, station1: str, station2: str) -> float:
-        """Calculate distance between two stations"""
-        s1 = self.stations.get(station1, {})
-        s2 = self.stations.get(station2, {})
+    def _cached(self, attr: str, shared: Dict, key: Tuple, build):
+        """
+        Per-instance cache in `attr` backed by a class-level `shared` dict
         
-        if not s1.get('latitude') or not s2.get('latitude'):
-            return 100  # default distance
+        Timetable-backed keys (version not None) are shared across
+        instances. Builds run under a lock, so concurrent requests on a
+        cold cache build each entry once.
+        """
+        cached = getattr(self, attr)
+        if cached is not None and cached[0] == key:
+            return cached[1]
         
-        # Haversine formula
-        lat1, lon1 = s1['latitude'], s1['longitude']
-        lat2, lon2 = s2['latitude'], s2['longitude']
+        if key[0] is None:
+            value = build()
+        else:
+            value = shared.get(key)
+            if value is None:
+                with FreightOptimizer._cache_lock:
+                    value = shared.get(key)
+                    if value is None:
+                        value = build()
+                        shared[key] = value
+        
+        # One tuple assignment: readers never see a key with another key's value
+        setattr(self, attr, (key, value))
+        return value
+    
+    def _compute_time_gaps(self) -> List[Dict]:
+        """Scan every passenger stop for gaps (see find_time_gaps)"""
+        station_ids, times, train_positions, train_ids = self._passenger_stops()
+        if len(station_ids) < 2:
+            return []
+        
+        # Build station-wise schedule: stations in order of first appearance,
+        # stops sorted by time within a station (stable, like list.sort)
+        present, first_seen = np.unique(station_ids, return_index=True)
+        station_rank = np.zeros(len(self.registry), dtype=np.int64)
+        station_rank[present] = np.argsort(np.argsort(first_seen))
+        order = np.lexsort((times, station_rank[station_ids]))
+        
+        sorted_stations = station_ids[order]
+        sorted_times = np.asarray(times, dtype=np.int64)[order]
+        sorted_trains = train_positions[order]
+        
+        # Find gaps satisfying headway constraints
+        # CSP Constraint: Gap must be larger than 2 * headway
+        gap_sizes = np.diff(sorted_times)
+        valid = (
+            (sorted_stations[1:] == sorted_stations[:-1]) &
+            (gap_sizes > self.min_headway * 2) &
+            (gap_sizes < self.max_headway)
+        )
         
-        R = 6371  # Earth radius in km
-        dlat = np.radians(lat2 - lat1)
-        dlon = np.radians(lon2 - lon1)
+        gaps = []
+        for i in np.flatnonzero(valid).tolist():
+            station_id = int(sorted_stations[i])
+            current_time = int(sorted_times[i])
+            next_time = int(sorted_times[i + 1])
+            gaps.append({
+                'station': self.registry.code(station_id),
+                'station_id': station_id,
+                'station_name': self.registry.name(station_id),
+                'start_time': current_time + self.min_headway,
+                'end_time': next_time - self.min_headway,
+                'gap_size': next_time - current_time - (2 * self.min_headway),
+                'before_train': train_ids[sorted_trains[i]],
+                'after_train': train_ids[sorted_trains[i + 1]]
+            })
         
-        a = np.sin(dlat/2)**2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(dlon/2)**2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+        return gaps
+    
+    def calculate_distance(self, station1: str, station2: str) -> float:
+        """Calculate distance between two stations"""
+        return self.station_distance(self.registry.id_of(station1), self.registry.id_of(station2))
+    
+    def station_distance(self, id1: int, id2: int) -> float:
+        """Distance between two stations given their registry ids
         
-        return R * c
+        Looked up in the registry's precomputed haversine matrix, which is
+        shared by every optimizer using the same dataset.
+        """
+        return self.registry.distance(id1, id2)
     
     def greedy_heuristic(self, gaps: List[Dict], num_trains: int = 5) -> List[Dict]:
         """
         Greedy Algorithm: Quick feasible solution
-        Select largest gaps first
+        Largest free gap first, from priority queues
+        
+        Stations are ranked by how often they have been used (as origin or
+        destination), then by their largest remaining gap, ties in input
+        order. While unused stations remain this places exactly what the
+        previous single-use linear scan did; after that each station takes
+        further trains in turn. A placement splits the origin gap: the
+        part after the freight departure (plus headway) stays available,
+        so a station can take several freight trains at non-overlapping
+        times. Destinations must keep headway with earlier freight
+        arrivals there; stations that do not are set aside and put back
+        after the placement. O(log n) per assignment plus the stations
+        set aside.
         """
         if len(gaps) < 2:
             return []
         
-        # Sort gaps by size (largest first)
-        sorted_gaps = sorted(gaps, key=lambda x: x['gap_size'], reverse=True)
+        # Per station, a heap of its gaps (largest first, then input order)
+        station_gaps = {}
+        for i, gap in enumerate(gaps):
+            station_gaps.setdefault(gap['station_id'], []).append((-gap['gap_size'], i, gap))
+        for entries in station_gaps.values():
+            heapq.heapify(entries)
+        order = len(gaps)
+        uses = dict.fromkeys(station_gaps, 0)
+        arrivals = {}
+        
+        # Stations by (uses, best gap); stale entries are skipped when popped
+        def station_entry(station_id):
+            neg_size, index, _ = station_gaps[station_id][0]
+            return (uses[station_id], neg_size, index, station_id)
+        
+        def is_current(entry):
+            entries = station_gaps[entry[3]]
+            return bool(entries) and entry == station_entry(entry[3])
+        
+        stations = [station_entry(station_id) for station_id in station_gaps]
+        heapq.heapify(stations)
         
         freight_paths = []
-        used_stations = set()
-        
-        for _ in range(num_trains):
-            # Find origin from unused stations
-            origin_gap = None
-            for gap in sorted_gaps:
-                if gap['station'] not in used_stations:
-                    origin_gap = gap
-                    break
-            
-            if not origin_gap:
-                break
+        while len(freight_paths) < num_trains and stations:
+            origin_entry = heapq.heappop(stations)
+            if not is_current(origin_entry):
+                continue
+            origin_id = origin_entry[3]
+            origin_gap = station_gaps[origin_id][0][2]
             
-            # Find destination from unused stations
-            dest_gap = None
-            for gap in sorted_gaps:
-                if gap['station'] != origin_gap['station'] and gap['station'] not in used_stations:
-                    dest_gap = gap
+            # Best station elsewhere whose arrival does not crowd an earlier one
+            skipped = []
+            path = None
+            while stations:
+                dest_entry = heapq.heappop(stations)
+                if not is_current(dest_entry):
+                    continue
+                skipped.append(dest_entry)
+                if dest_entry[3] == origin_id:
+                    continue
+                candidate = self._freight_path(f'FRT{1000 + len(freight_paths)}', origin_gap,
+                                               station_gaps[dest_entry[3]][0][2])
+                times = arrivals.get(candidate['destination_id'])
+                if not times or not count_close(times, candidate['arrival_time'], self.min_headway):
+                    path = candidate
                     break
+            for entry in skipped:
+                heapq.heappush(stations, entry)
             
-            if not dest_gap:
-                break
-            
-            distance = self.calculate_distance(origin_gap['station'], dest_gap['station'])
-            travel_time = (distance / self.freight_avg_speed) * 60  # minutes
-            
-            freight_paths.append({
-                'freight_id': f'FRT{1000 + len(freight_paths)}',
-                'origin': origin_gap['station'],
-                'origin_name': origin_gap['station_name'],
-                'destination': dest_gap['station'],
-                'destination_name': dest_gap['station_name'],
-                'departure_time': origin_gap['start_time'],
-                'arrival_time': origin_gap['start_time'] + travel_time,
-                'distance': round(distance, 2),
-                'travel_time': round(travel_time, 2),
-                'gap_utilization': round((travel_time / origin_gap['gap_size']) * 100, 2)
-            })
+            heapq.heappop(station_gaps[origin_id])
+            if path is not None:
+                path['gap_utilization'] = round((path['travel_time'] / origin_gap['gap_size']) * 100, 2)
+                freight_paths.append(path)
+                insort(arrivals.setdefault(path['destination_id'], []), path['arrival_time'])
+                uses[origin_id] += 1
+                uses[path['destination_id']] += 1
+                heapq.heappush(stations, station_entry(path['destination_id']))
+                
+                # What is left of the origin gap after this departure stays available
+                remainder_start = origin_gap['start_time'] + self.min_headway
+                if origin_gap['end_time'] - remainder_start >= self.min_loop_time:
+                    remainder = dict(origin_gap, start_time=remainder_start,
+                                     gap_size=origin_gap['end_time'] - remainder_start,
+                                     before_train=path['freight_id'])
+                    heapq.heappush(station_gaps[origin_id], (-remainder['gap_size'], order, remainder))
+                    order += 1
+            # else: no destination fits this origin gap, so it is dropped
             
-            used_stations.add(origin_gap['station'])
-            used_stations.add(dest_gap['station'])
+            if station_gaps[origin_id]:
+                heapq.heappush(stations, station_entry(origin_id))
         
         return freight_paths
     
     def dynamic_programming_path(self, gaps: List[Dict], origin: str, destination: str) -> Optional[Dict]:
         """
-        Dynamic Programming: Find optimal path through time-space network
-        """
-        # Build graph of possible transitions
-        graph = {}
-        for gap in gaps:
-            if gap['station'] not in graph:
-                graph[gap['station']] = []
-            graph[gap['station']].append(gap)
+        Shortest path through the time-expanded network of free capacity
         
-        if origin not in graph or destination not in graph:
+        Departs from one of the given gaps at the origin and follows the
+        timetable's line segments, waiting in free windows where needed,
+        to the earliest possible arrival at the destination.
+        """
+        origin_id = self.registry.id_of(origin)
+        destination_id = self.registry.id_of(destination)
+        departures = [gap['start_time'] for gap in gaps if gap['station_id'] == origin_id]
+        if not departures or destination_id < 0:
             return None
         
-        # DP: Find path with minimum conflicts
-        origin_gaps = graph[origin]
-        dest_gaps = graph[destination]
+        hops = self.time_expanded_network().shortest_path(origin_id, destination_id, departures)
+        if hops is None:
+            return None
         
-        best_path = None
-        min_cost = float('inf')
+        departure_time = hops[0]['departure_time']
+        arrival_time = hops[-1]['arrival_time']
+        return {
+            'origin': origin,
+            'destination': destination,
+            'departure_time': departure_time,
+            'arrival_time': arrival_time,
+            'distance': round(sum(hop['km'] for hop in hops), 2),
+            'travel_time': round(arrival_time - departure_time, 2),
+            'hops': len(hops) - 1,
+            'path': [
+                {
+                    'station': self.registry.code(hop['station_id']),
+                    'station_name': self.registry.name(hop['station_id']),
+                    'arrival_time': round(hop['arrival_time'], 2),
+                    'departure_time': round(hop['departure_time'], 2)
+                }
+                for hop in hops
+            ]
+        }
+    
+    def time_expanded_network(self) -> TimeExpandedNetwork:
+        """
+        Routing network of the passenger timetable, built once per dataset version
         
-        for o_gap in origin_gaps:
-            for d_gap in dest_gaps:
-                distance = self.calculate_distance(origin, destination)
-                travel_time = (distance / self.freight_avg_speed) * 60
-                
-                # Check time feasibility
-                if o_gap['start_time'] + travel_time <= d_gap['end_time']:
-                    cost = travel_time + (100 - o_gap['gap_size'])  # Prefer larger gaps
-                    
-                    if cost < min_cost:
-                        min_cost = cost
-                        best_path = {
-                            'origin': origin,
-                            'destination': destination,
-                            'departure_time': o_gap['start_time'],
-                            'arrival_time': o_gap['start_time'] + travel_time,
-                            'distance': round(distance, 2),
-                            'travel_time': round(travel_time, 2)
-                        }
-        
-        return best_path
+        Shared across optimizer instances like gap_index().
+        """
+        timetable = getattr(self.passenger_trains, 'timetable', None)
+        key = (timetable.version if timetable is not None else None,
+               id(self.registry), self.min_headway, self.freight_avg_speed)
+        return self._cached('_network', FreightOptimizer._shared_networks, key, self._build_network)
+    
+    def _build_network(self) -> TimeExpandedNetwork:
+        station_ids, times, _, _ = self._passenger_stops()
+        return TimeExpandedNetwork(self.registry, station_ids, times, self._route_segments(),
+                                   self.min_headway, self.freight_avg_speed)
+    
+    def _route_segments(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(from station ids, to station ids, km) of consecutive stops of every route"""
+        timetable = getattr(self.passenger_trains, 'timetable', None)
+        if timetable is not None:
+            station_ids = self.registry.translate(timetable)
+            distance = timetable.distance
+            train_index = timetable.train_index
+        else:
+            station_ids, distance, train_index = [], [], []
+            for position, train in enumerate(self.passenger_trains):
+                for stop in train.get('route') or []:
+                    station_ids.append(self.registry.id_of(stop['station_code']))
+                    distance.append(stop.get('distance', 0) or 0)
+                    train_index.append(position)
+            station_ids = np.asarray(station_ids, dtype=np.int32)
+            distance = np.asarray(distance, dtype=np.float64)
+            train_index = np.asarray(train_index, dtype=np.int32)
+        
+        same_train = train_index[1:] == train_index[:-1]
+        return (
+            station_ids[:-1][same_train],
+            station_ids[1:][same_train],
+            (distance[1:] - distance[:-1])[same_train]
+        )
     
     def create_chromosome(self, gaps: List[Dict], num_trains: int) -> List[Dict]:
         """Create a random freight schedule (chromosome for GA)"""
@@ -208,31 +440,37 @@ class FreightOptimizer:
             if len(available_gaps) < 2:
                 break
             
-            origin_gap = random.choice(available_gaps)
-            dest_gaps = [g for g in available_gaps if g['station'] != origin_gap['station']]
+            origin_gap = self.rng.choice(available_gaps)
+            dest_gaps = [g for g in available_gaps if g['station_id'] != origin_gap['station_id']]
             
             if not dest_gaps:
                 continue
             
-            dest_gap = random.choice(dest_gaps)
-            distance = self.calculate_distance(origin_gap['station'], dest_gap['station'])
-            travel_time = (distance / self.freight_avg_speed) * 60
-            
-            chromosome.append({
-                'freight_id': f'FRT{1000 + i}',
-                'origin': origin_gap['station'],
-                'origin_name': origin_gap['station_name'],
-                'destination': dest_gap['station'],
-                'destination_name': dest_gap['station_name'],
-                'departure_time': origin_gap['start_time'],
-                'arrival_time': origin_gap['start_time'] + travel_time,
-                'distance': round(distance, 2),
-                'travel_time': round(travel_time, 2),
-                'gap_size': origin_gap['gap_size']
-            })
+            dest_gap = self.rng.choice(dest_gaps)
+            chromosome.append(self._freight_path(f'FRT{1000 + i}', origin_gap, dest_gap))
         
         return chromosome
     
+    def _freight_path(self, freight_id: str, origin_gap: Dict, dest_gap: Dict) -> Dict:
+        """One freight train (chromosome gene) from an origin gap to a destination gap"""
+        distance = self.station_distance(origin_gap['station_id'], dest_gap['station_id'])
+        travel_time = (distance / self.freight_avg_speed) * 60
+        
+        return {
+            'freight_id': freight_id,
+            'origin': origin_gap['station'],
+            'origin_id': origin_gap['station_id'],
+            'origin_name': origin_gap['station_name'],
+            'destination': dest_gap['station'],
+            'destination_id': dest_gap['station_id'],
+            'destination_name': dest_gap['station_name'],
+            'departure_time': origin_gap['start_time'],
+            'arrival_time': origin_gap['start_time'] + travel_time,
+            'distance': round(distance, 2),
+            'travel_time': round(travel_time, 2),
+            'gap_size': origin_gap['gap_size']
+        }
+    
     def fitness_function(self, chromosome: List[Dict]) -> float:
         """
         Calculate fitness of a freight schedule
@@ -259,30 +497,49 @@ class FreightOptimizer:
                 fitness -= abs(utilization - 70)
         
         # Penalty: Conflicts (trains using same station at same time)
+        conflicts = self.count_conflicts(chromosome)
+        fitness -= conflicts * 200
+        
+        return max(0, fitness)
+    
+    def count_conflicts(self, chromosome: List[Dict]) -> int:
+        """
+        Pairs of freight trains closer than min_headway at a shared origin
+        (departures) or shared destination (arrivals)
+        
+        Sort-and-sweep per station, O(n log n); same count as
+        count_conflicts_pairwise().
+        """
+        return (
+            count_headway_violations([t['origin_id'] for t in chromosome],
+                                     [t['departure_time'] for t in chromosome], self.min_headway) +
+            count_headway_violations([t['destination_id'] for t in chromosome],
+                                     [t['arrival_time'] for t in chromosome], self.min_headway)
+        )
+    
+    def count_conflicts_pairwise(self, chromosome: List[Dict]) -> int:
+        """Reference O(n^2) conflict count (kept for benchmarks)"""
         conflicts = 0
         for i, train1 in enumerate(chromosome):
             for train2 in chromosome[i+1:]:
                 # Check if trains conflict at origin or destination
-                if train1['origin'] == train2['origin']:
+                if train1['origin_id'] == train2['origin_id']:
                     time_diff = abs(train1['departure_time'] - train2['departure_time'])
                     if time_diff < self.min_headway:
                         conflicts += 1
                 
-                if train1['destination'] == train2['destination']:
+                if train1['destination_id'] == train2['destination_id']:
                     time_diff = abs(train1['arrival_time'] - train2['arrival_time'])
                     if time_diff < self.min_headway:
                         conflicts += 1
-        
-        fitness -= conflicts * 200
-        
-        return max(0, fitness)
+        return conflicts
     
     def crossover(self, parent1: List[Dict], parent2: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
         """Single-point crossover"""
         if len(parent1) < 2 or len(parent2) < 2:
             return parent1, parent2
         
-        point = random.randint(1, min(len(parent1), len(parent2)) - 1)
+        point = self.rng.randint(1, min(len(parent1), len(parent2)) - 1)
         
         child1 = parent1[:point] + parent2[point:]
         child2 = parent2[:point] + parent1[point:]
@@ -295,113 +552,356 @@ class FreightOptimizer:
             return chromosome
         
         # Randomly select a train to mutate
-        idx = random.randint(0, len(chromosome) - 1)
+        idx = self.rng.randint(0, len(chromosome) - 1)
         
         # Replace with a new random path
-        origin_gap = random.choice(gaps)
-        dest_gaps = [g for g in gaps if g['station'] != origin_gap['station']]
+        origin_gap = self.rng.choice(gaps)
+        dest_gaps = [g for g in gaps if g['station_id'] != origin_gap['station_id']]
         
         if dest_gaps:
-            dest_gap = random.choice(dest_gaps)
-            distance = self.calculate_distance(origin_gap['station'], dest_gap['station'])
-            travel_time = (distance / self.freight_avg_speed) * 60
-            
-            chromosome[idx] = {
-                'freight_id': chromosome[idx]['freight_id'],
-                'origin': origin_gap['station'],
-                'origin_name': origin_gap['station_name'],
-                'destination': dest_gap['station'],
-                'destination_name': dest_gap['station_name'],
-                'departure_time': origin_gap['start_time'],
-                'arrival_time': origin_gap['start_time'] + travel_time,
-                'distance': round(distance, 2),
-                'travel_time': round(travel_time, 2),
-                'gap_size': origin_gap['gap_size']
-            }
+            dest_gap = self.rng.choice(dest_gaps)
+            chromosome[idx] = self._freight_path(chromosome[idx]['freight_id'], origin_gap, dest_gap)
         
         return chromosome
     
-    def genetic_algorithm(self, gaps: List[Dict], num_freight_trains: int = 10) -> Tuple[List[Dict], float]:
+    def genetic_algorithm(self, gaps: List[Dict], num_freight_trains: int = 10,
+                          stop: Optional[StopCondition] = None,
+                          seeds: Optional[List[List[Tuple[int, int]]]] = None) -> Tuple[List[Dict], float]:
         """
         Genetic Algorithm: Optimize freight train placement
+        
+        Runs self.generations generations unless `stop` ends it earlier
+        (time budget or stagnation). Chromosomes carry their fitness
+        components (ScheduleFitness), so crossover and mutation only
+        re-score the genes they change, and a memo keyed by the chromosome
+        skips schedules that were already evaluated.
+        
+        `seeds` ((origin gap, destination gap) index lists, see
+        warm_start_genes) replace part of the random initial population.
         """
-        # Initialize population
-        population = [self.create_chromosome(gaps, num_freight_trains) for _ in range(self.population_size)]
+        stop = stop or StopCondition(self.generations)
+        memo = {}
+        other_station_gaps = {}
+        
+        def evaluated(state):
+            known = memo.get(state.key)
+            if known is not None:
+                return known
+            if len(memo) >= self.fitness_memo_size:
+                memo.clear()
+            memo[state.key] = state
+            return state
+        
+        # Initialize population (warm-start seeds first); the time budget
+        # already runs, so a slow start ends with a smaller population
+        population = []
+        for genes in (seeds or [])[:self.population_size]:
+            if population and stop.expired():
+                break
+            population.append(evaluated(ScheduleFitness.from_genes(
+                self._seeded_chromosome(genes, gaps, num_freight_trains), self.min_headway)))
+        while len(population) < self.population_size and not (population and stop.expired()):
+            population.append(evaluated(ScheduleFitness.from_genes(
+                self.create_chromosome(gaps, num_freight_trains), self.min_headway)))
         
         best_solution = None
         best_fitness = 0
         
-        for generation in range(self.generations):
-            # Evaluate fitness
-            fitness_scores = [(chromosome, self.fitness_function(chromosome)) for chromosome in population]
+        generation = 0
+        while not stop.check(generation, best_fitness):
+            # Evaluate fitness (already known for every chromosome)
+            fitness_scores = [(state, state.fitness) for state in population]
             fitness_scores.sort(key=lambda x: x[1], reverse=True)
             
             # Track best solution
-            if fitness_scores[0][1] > best_fitness:
+            if best_solution is None or fitness_scores[0][1] > best_fitness:
                 best_fitness = fitness_scores[0][1]
-                best_solution = fitness_scores[0][0]
+                best_solution = fitness_scores[0][0].genes
             
             # Elitism: Keep top performers
-            new_population = [chromosome for chromosome, _ in fitness_scores[:self.elite_size]]
+            new_population = [state for state, _ in fitness_scores[:self.elite_size]]
             
             # Selection and reproduction
             while len(new_population) < self.population_size:
                 # Tournament selection
-                parent1 = random.choice(fitness_scores[:50])[0]
-                parent2 = random.choice(fitness_scores[:50])[0]
+                parent1 = self.rng.choice(fitness_scores[:50])[0]
+                parent2 = self.rng.choice(fitness_scores[:50])[0]
                 
                 # Crossover
-                if random.random() < self.crossover_rate:
-                    child1, child2 = self.crossover(parent1, parent2)
+                if self.rng.random() < self.crossover_rate and len(parent1) >= 2 and len(parent2) >= 2:
+                    point = self.rng.randint(1, min(len(parent1), len(parent2)) - 1)
+                    child1 = evaluated(parent1.splice(parent2, point))
+                    child2 = evaluated(parent2.splice(parent1, point))
                 else:
-                    child1, child2 = parent1[:], parent2[:]
+                    child1, child2 = parent1, parent2
                 
                 # Mutation
-                if random.random() < self.mutation_rate:
-                    child1 = self.mutate(child1, gaps)
-                if random.random() < self.mutation_rate:
-                    child2 = self.mutate(child2, gaps)
+                if self.rng.random() < self.mutation_rate:
+                    child1 = evaluated(self._mutate_state(child1, gaps, other_station_gaps))
+                if self.rng.random() < self.mutation_rate:
+                    child2 = evaluated(self._mutate_state(child2, gaps, other_station_gaps))
                 
                 new_population.extend([child1, child2])
             
             population = new_population[:self.population_size]
+            generation += 1
         
+        if best_solution is None:
+            # Out of time before the first generation: best of the initial population
+            best = max(population, key=lambda state: state.fitness)
+            best_solution, best_fitness = best.genes, best.fitness
         return best_solution, best_fitness
     
-    def optimize(self, num_freight_trains: int = 10, algorithm: str = 'genetic', time_window_hours: int = None) -> Dict:
+    def _mutate_state(self, state: ScheduleFitness, gaps: List[Dict],
+                      other_station_gaps: Dict[int, List[Dict]]) -> ScheduleFitness:
+        """mutate() on a ScheduleFitness; returns a new state with one gene replaced"""
+        if not state.genes or not gaps:
+            return state
+        
+        idx = self.rng.randint(0, len(state) - 1)
+        origin_gap = self.rng.choice(gaps)
+        
+        # Gaps at other stations, built once per origin station
+        dest_gaps = other_station_gaps.get(origin_gap['station_id'])
+        if dest_gaps is None:
+            dest_gaps = [g for g in gaps if g['station_id'] != origin_gap['station_id']]
+            other_station_gaps[origin_gap['station_id']] = dest_gaps
+        
+        if not dest_gaps:
+            return state
+        
+        dest_gap = self.rng.choice(dest_gaps)
+        return state.replace(idx, self._freight_path(state.genes[idx]['freight_id'], origin_gap, dest_gap))
+    
+    def genetic_algorithm_vectorized(self, gaps: List[Dict], num_freight_trains: int = 10,
+                                     seed: Optional[int] = None,
+                                     stop: Optional[StopCondition] = None,
+                                     seeds: Optional[List[List[Tuple[int, int]]]] = None) -> Tuple[List[Dict], float]:
+        """
+        Genetic Algorithm on NumPy arrays
+        
+        Same objective as genetic_algorithm(), but the population is an
+        integer matrix of (origin gap, destination gap) indices evolved with
+        batched operations (see models/vectorized_ga.py). Only the best
+        chromosome is decoded to freight train dicts.
+        """
+        if len({gap['station_id'] for gap in gaps}) < 2:
+            return [], 0
+        
+        engine = VectorizedGA(**self._ga_problem(gaps, num_freight_trains), seed=seed)
+        if seeds:
+            engine.seed_population(seeds)
+        best_genes, _ = engine.run(self.generations, stop)
+        
+        best_solution = self.decode_genes(best_genes, gaps)
+        return best_solution, self.fitness_function(best_solution)
+    
+    def genetic_algorithm_islands(self, gaps: List[Dict], num_freight_trains: int = 10,
+                                  islands: Optional[int] = None, migration_interval: Optional[int] = None,
+                                  seed: Optional[int] = None, workers: Optional[int] = None,
+                                  stop: Optional[StopCondition] = None,
+                                  seeds: Optional[List[List[Tuple[int, int]]]] = None) -> Tuple[List[Dict], float]:
+        """
+        Island-model Genetic Algorithm
+        
+        Several vectorized GA populations evolve in parallel worker
+        processes and exchange their best chromosomes every
+        migration_interval generations (see models/island_ga.py).
+        """
+        if len({gap['station_id'] for gap in gaps}) < 2:
+            return [], 0
+        
+        engine = IslandGA(
+            self._ga_problem(gaps, num_freight_trains),
+            islands=islands or self.islands,
+            migration_interval=migration_interval or self.migration_interval,
+            migration_size=self.migration_size,
+            seed=seed,
+            workers=workers,
+            pool=self._island_pool
+        )
+        if seeds:
+            engine.seed_population(seeds)
+        best_genes, _ = engine.run(self.generations, stop)
+        
+        best_solution = self.decode_genes(best_genes, gaps)
+        return best_solution, self.fitness_function(best_solution)
+    
+    def cpsat_assignment(self, gaps: List[Dict], num_freight_trains: int = 10,
+                         stop: Optional[StopCondition] = None) -> Tuple[List[Dict], float, Dict]:
+        """
+        Exact slot assignment with OR-Tools CP-SAT (see models/cpsat_scheduler.py)
+        
+        Solves within the remaining time budget (or self.cpsat_time_limit_s)
+        using self.cpsat_workers search workers, starting from the greedy
+        solution. If the solver finds no solution in time, or ortools is not
+        installed, the greedy solution is returned.
+        
+        Returns:
+            (freight trains, fitness, solver info)
+        """
+        greedy = self.greedy_heuristic(gaps, num_freight_trains)
+        if len({gap['station_id'] for gap in gaps}) < 2:
+            return greedy, self.fitness_function(greedy), {'status': 'NO_MODEL', 'fallback': 'greedy'}
+        
+        time_limit_s = self.cpsat_time_limit_s
+        if stop is not None and stop.deadline is not None:
+            time_limit_s = min(time_limit_s, stop.deadline - time.monotonic())
+        
+        problem = VectorizedGA.problem_from_gaps(gaps, self.registry)
+        scheduler = CPSatScheduler(
+            **problem,
+            num_trains=num_freight_trains,
+            min_headway=self.min_headway,
+            freight_avg_speed=self.freight_avg_speed,
+            candidates_per_gap=self.cpsat_candidates
+        )
+        
+        # Greedy solution as a hint, in gap index form (trains departing
+        # from a split gap have no gap of their own and are left out)
+        origin_gaps = {}
+        station_gaps = {}
+        for i, gap in enumerate(gaps):
+            origin_gaps.setdefault((gap['station_id'], gap['start_time']), i)
+            station_gaps.setdefault(gap['station_id'], i)
+        hint = [
+            (origin_gaps[(path['origin_id'], path['departure_time'])], station_gaps[path['destination_id']])
+            for path in greedy
+            if (path['origin_id'], path['departure_time']) in origin_gaps
+        ]
+        
+        try:
+            info = scheduler.solve(time_limit_s, self.cpsat_workers, hint)
+        except ImportError as e:
+            print(f"Warning: {e}; using greedy solution")
+            return greedy, self.fitness_function(greedy), {'status': 'UNAVAILABLE', 'fallback': 'greedy'}
+        
+        genes = info.pop('genes')
+        if not genes:
+            info['fallback'] = 'greedy'
+            return greedy, self.fitness_function(greedy), info
+        
+        solution = self.decode_genes(genes, gaps)
+        return solution, self.fitness_function(solution), info
+    
+    def _ga_problem(self, gaps: List[Dict], num_freight_trains: int) -> Dict:
+        """VectorizedGA arguments for this optimizer's gaps and GA parameters"""
+        return dict(
+            VectorizedGA.problem_from_gaps(gaps, self.registry),
+            num_trains=num_freight_trains,
+            population_size=self.population_size,
+            mutation_rate=self.mutation_rate,
+            crossover_rate=self.crossover_rate,
+            elite_size=self.elite_size,
+            min_headway=self.min_headway,
+            freight_avg_speed=self.freight_avg_speed
+        )
+    
+    def decode_genes(self, genes, gaps: List[Dict]) -> List[Dict]:
+        """(origin gap, destination gap) index pairs -> freight train dicts"""
+        return [
+            self._freight_path(f'FRT{1000 + i}', gaps[origin], gaps[destination])
+            for i, (origin, destination) in enumerate(np.asarray(genes).tolist())
+        ]
+    
+    def _seeded_chromosome(self, genes: List[Tuple[int, int]], gaps: List[Dict], num_trains: int) -> List[Dict]:
+        """Warm-start genes as freight trains, topped up with random genes to num_trains"""
+        chromosome = self.decode_genes(genes[:num_trains], gaps)
+        while len(chromosome) < num_trains:
+            origin_gap = self.rng.choice(gaps)
+            dest_gaps = [g for g in gaps if g['station_id'] != origin_gap['station_id']]
+            if not dest_gaps:
+                break
+            chromosome.append(self._freight_path(f'FRT{1000 + len(chromosome)}', origin_gap,
+                                                 self.rng.choice(dest_gaps)))
+        return chromosome
+    
+    def warm_start_key(self, num_freight_trains: int, window_start: Optional[int] = None,
+                       time_window_hours: Optional[int] = None) -> Optional[Tuple]:
+        """
+        Warm-start store key: (dataset version, time window bucket, num_trains)
+        
+        None for plain train lists, which have no dataset version.
+        """
+        timetable = getattr(self.passenger_trains, 'timetable', None)
+        if timetable is None:
+            return None
+        bucket = None
+        if time_window_hours:
+            bucket = (window_start // self.warm_start_bucket_minutes, time_window_hours)
+        return (timetable.version, bucket, num_freight_trains)
+    
+    def warm_start_genes(self, gaps: List[Dict], num_freight_trains: int, key: Optional[Tuple],
+                         greedy: Optional[List[Dict]] = None) -> List[List[Tuple[int, int]]]:
+        """
+        Initial chromosomes for the GA engines
+        
+        Stored best schedules for `key` (best first) followed by the greedy
+        schedule (computed unless passed), as (origin gap, destination gap)
+        index lists into `gaps`. Genes whose gap no longer exists are dropped.
+        """
+        chromosomes = FreightOptimizer._warm_starts.get(key) if key is not None else []
+        if greedy is None:
+            greedy = self.greedy_heuristic(gaps, num_freight_trains)
+        chromosomes = chromosomes + [tuple(gene_key(train) for train in greedy)]
+        return WarmStartStore.decode(chromosomes, gaps)
+    
+    def optimize(self, num_freight_trains: int = 10, algorithm: str = 'genetic', time_window_hours: int = None,
+                 islands: int = None, migration_interval: int = None, seed: int = None,
+                 time_budget_ms: float = None, stagnation_generations: int = None,
+                 min_improvement: float = None, warm_start: bool = None) -> Dict:
         """
         Main optimization function
         
         Args:
             num_freight_trains: Number of freight trains to generate
-            algorithm: 'genetic' or 'greedy'
+            algorithm: 'genetic', 'vectorized', 'island', 'cpsat' or 'greedy'
             time_window_hours: If specified, only optimize for next N hours from current time
+            islands: Number of island populations ('island' only)
+            migration_interval: Generations between migrations ('island' only)
+            seed: Random seed (the 'genetic' GA draws from a per-call generator seeded with it)
+            time_budget_ms: Wall-clock budget for the whole call; the GA returns
+                the best solution found when it runs out
+            stagnation_generations: Stop the GA after this many generations without improvement
+            min_improvement: Fitness gains up to this size do not count as improvement
+            warm_start: Seed the GA with earlier best schedules for the same dataset
+                version, time window and train count, plus the greedy schedule
+                (default: self.warm_start)
+        
+        Safe to call from several threads on one shared optimizer: the
+        gap index and routing network are immutable once built, shared
+        caches are built under a lock and every call has its own RNG.
         """
-        # Step 1: Filter trains by time window if specified
+        self._local.rng = random.Random(seed)
+        try:
+            return self._optimize(num_freight_trains, algorithm, time_window_hours, islands, migration_interval,
+                                  seed, time_budget_ms, stagnation_generations, min_improvement, warm_start)
+        finally:
+            self._local.rng = None
+    
+    def _optimize(self, num_freight_trains, algorithm, time_window_hours, islands, migration_interval, seed,
+                  time_budget_ms, stagnation_generations, min_improvement, warm_start) -> Dict:
+        """optimize() body, run with this call's RNG installed"""
+        # The budget covers gap finding as well as the search itself
+        stop = StopCondition(
+            self.generations,
+            time_budget_ms=time_budget_ms,
+            stagnation_generations=stagnation_generations or self.stagnation_generations,
+            min_improvement=min_improvement if min_improvement is not None else self.min_improvement
+        )
+        
+        # Step 1 & 2: Find valid time gaps (CSP), limited to the time window if specified
+        current_time_minutes = None
         if time_window_hours:
             current_time_minutes = self._get_current_time_minutes()
             end_time_minutes = current_time_minutes + (time_window_hours * 60)
             
-            # Filter passenger trains active in this window
-            active_trains = []
-            for train in self.passenger_trains:
-                if train.get('route'):
-                    # Check if train has any stops in the time window
-                    for stop in train['route']:
-                        arrival_time = stop.get('arrival_minutes', 0)
-                        if current_time_minutes <= arrival_time <= end_time_minutes:
-                            active_trains.append(train)
-                            break
+            gaps = self.find_time_gaps(start_time=current_time_minutes, end_time=end_time_minutes)
             
             print(f"Time window: {time_window_hours}h from current time")
-            print(f"Active trains in window: {len(active_trains)} out of {len(self.passenger_trains)}")
-            
-            # Temporarily replace passenger trains with active ones
-            original_trains = self.passenger_trains
-            self.passenger_trains = active_trains
-        
-        # Step 2: Find all valid time gaps (CSP)
-        gaps = self.find_time_gaps()
+            print(f"Gaps in window: {len(gaps)} out of {len(self.gap_index())}")
+        else:
+            gaps = self.find_time_gaps()
         
         if not gaps:
             return {
@@ -412,28 +912,58 @@ class FreightOptimizer:
             }
         
         # Step 3: Apply selected algorithm
+        # With a budget the GA may run out of time; its greedy fallback is
+        # scored now, so nothing is left to compute after the deadline
+        greedy = greedy_fitness = None
+        if stop.deadline is not None and algorithm in ('genetic', 'vectorized', 'island'):
+            greedy = self.greedy_heuristic(gaps, num_freight_trains)
+            greedy_fitness = self.fitness_function(greedy)
+        
+        warm_start = self.warm_start if warm_start is None else warm_start
+        warm_key = None
+        seeds = None
+        if warm_start and algorithm in ('genetic', 'vectorized', 'island'):
+            warm_key = self.warm_start_key(num_freight_trains, current_time_minutes, time_window_hours)
+            seeds = self.warm_start_genes(gaps, num_freight_trains, warm_key, greedy)
+        
         if algorithm == 'greedy':
             freight_trains = self.greedy_heuristic(gaps, num_freight_trains)
             fitness = self.fitness_function(freight_trains)
         elif algorithm == 'genetic':
-            freight_trains, fitness = self.genetic_algorithm(gaps, num_freight_trains)
+            freight_trains, fitness = self.genetic_algorithm(gaps, num_freight_trains, stop=stop, seeds=seeds)
+        elif algorithm == 'vectorized':
+            freight_trains, fitness = self.genetic_algorithm_vectorized(gaps, num_freight_trains, seed=seed,
+                                                                        stop=stop, seeds=seeds)
+        elif algorithm == 'cpsat':
+            freight_trains, fitness, solver_info = self.cpsat_assignment(gaps, num_freight_trains, stop)
+        elif algorithm == 'island':
+            freight_trains, fitness = self.genetic_algorithm_islands(
+                gaps, num_freight_trains, islands, migration_interval, seed, stop=stop, seeds=seeds
+            )
         else:
             freight_trains = self.greedy_heuristic(gaps, num_freight_trains)
             fitness = self.fitness_function(freight_trains)
         
-        # Restore original trains if we filtered
-        if time_window_hours:
-            self.passenger_trains = original_trains
+        # Out of time: keep the greedy schedule if the GA did not beat it
+        fallback = None
+        if stop.reason == TIME_BUDGET and greedy is not None and greedy_fitness > fitness:
+            freight_trains, fitness, fallback = greedy, greedy_fitness, 'greedy'
+        
+        if warm_key is not None:
+            FreightOptimizer._warm_starts.put(warm_key, freight_trains, fitness)
         
         # Step 4: Calculate statistics
         total_distance = sum(train['distance'] for train in freight_trains)
         avg_travel_time = sum(train['travel_time'] for train in freight_trains) / len(freight_trains) if freight_trains else 0
         
-        return {
+        result = {
             'success': True,
             'algorithm': algorithm,
             'time_window_hours': time_window_hours,
-            'freight_trains': freight_trains,
+            'freight_trains': to_public(freight_trains),
+            'generations_completed': stop.generations_completed,
+            'stop_reason': stop.reason or 'completed',
+            'elapsed_ms': round(stop.elapsed_ms, 2),
             'statistics': {
                 'total_freight_trains': len(freight_trains),
                 'total_distance_km': round(total_distance, 2),
@@ -443,6 +973,22 @@ class FreightOptimizer:
                 'utilization_rate': round((len(freight_trains) / num_freight_trains) * 100, 2)
             }
         }
+        
+        if algorithm == 'island':
+            result['islands'] = islands or self.islands
+            result['migration_interval'] = migration_interval or self.migration_interval
+        if algorithm == 'cpsat':
+            result['solver'] = solver_info
+            result['stop_reason'] = 'optimal' if solver_info['status'] == 'OPTIMAL' else \
+                'fallback' if 'fallback' in solver_info else 'time_limit'
+        if seeds is not None:
+            result['warm_start_seeds'] = len(seeds)
+        if fallback is not None:
+            result['fallback'] = fallback
+        if seed is not None:
+            result['seed'] = seed
+        
+        return result
     
     def _get_current_time_minutes(self) -> int:
         """Get current time in minutes since midnight"""
@@ -0,0 +1,75 @@
+"""
+Gap Index
+Per-station, time-sorted index of the free time gaps between passenger trains
+"""
+
+import numpy as np
+from typing import Dict, List, Optional
+
+MINUTES_PER_DAY = 1440
+
+
+class GapIndex:
+    """
+    find_time_gaps() output indexed for range queries.
+
+    Gaps keep their original order in self.gaps. Two sorted views answer
+    queries with binary search instead of a rescan of the timetable:
+    gaps grouped by station and sorted by start time, and all gaps sorted
+    by start time.
+    """
+
+    def __init__(self, gaps: List[Dict]):
+        self.gaps = gaps
+        self.stations = np.array([gap['station_id'] for gap in gaps], dtype=np.int64)
+        self.starts = np.array([gap['start_time'] for gap in gaps], dtype=np.int64)
+        self.ends = np.array([gap['end_time'] for gap in gaps], dtype=np.int64)
+
+        # Station view: positions sorted by (station, start), one range per station
+        self.by_station = np.lexsort((self.starts, self.stations))
+        station_sorted = self.stations[self.by_station]
+        present, first = np.unique(station_sorted, return_index=True)
+        last = np.append(first[1:], len(station_sorted))
+        self.station_ranges = {
+            int(station): (int(lo), int(hi)) for station, lo, hi in zip(present, first, last)
+        }
+        self.station_starts = self.starts[self.by_station]
+
+        # Time view: positions sorted by start
+        self.by_start = np.argsort(self.starts, kind='stable')
+        self.sorted_starts = self.starts[self.by_start]
+
+    def __len__(self):
+        return len(self.gaps)
+
+    def _select(self, positions: np.ndarray, end_time: Optional[int]) -> List[Dict]:
+        """Gaps at `positions` that end by end_time, in original order"""
+        if end_time is not None:
+            positions = positions[self.ends[positions] <= end_time]
+        return [self.gaps[i] for i in np.sort(positions).tolist()]
+
+    def at_station(self, station_id: int, start_time: Optional[int] = None,
+                   end_time: Optional[int] = None) -> List[Dict]:
+        """Gaps at one station lying within [start_time, end_time]"""
+        lo, hi = self.station_ranges.get(station_id, (0, 0))
+        starts = self.station_starts[lo:hi]
+        first = lo + (np.searchsorted(starts, start_time, side='left') if start_time is not None else 0)
+        last = lo + (np.searchsorted(starts, end_time, side='right') if end_time is not None else hi - lo)
+        return self._select(self.by_station[first:last], end_time)
+
+    def in_window(self, start_time: int, end_time: int) -> List[Dict]:
+        """
+        Gaps at any station lying within [start_time, end_time]
+
+        A window running past midnight continues at minute 0 of the same
+        (repeating) daily timetable.
+        """
+        if end_time >= MINUTES_PER_DAY and start_time < MINUTES_PER_DAY:
+            return self._window(start_time, MINUTES_PER_DAY - 1) + \
+                self._window(0, end_time - MINUTES_PER_DAY)
+        return self._window(start_time, end_time)
+
+    def _window(self, start_time: int, end_time: int) -> List[Dict]:
+        first = np.searchsorted(self.sorted_starts, start_time, side='left')
+        last = np.searchsorted(self.sorted_starts, end_time, side='right')
+        return self._select(self.by_start[first:last], end_time)
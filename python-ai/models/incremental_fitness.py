@@ -0,0 +1,188 @@
+"""
+Incremental Fitness
+Freight schedule fitness that updates per changed gene instead of from scratch
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Tuple
+
+
+def gene_key(train: Dict) -> Tuple:
+    """What a gene's fitness depends on: origin gap and destination station"""
+    return (train['origin_id'], train['departure_time'], train['destination_id'])
+
+
+def utilization_term(train: Dict) -> float:
+    """Gap utilization reward/penalty of one freight train (see fitness_function)"""
+    utilization = (train['travel_time'] / train['gap_size']) * 100
+    if 50 <= utilization <= 90:  # Sweet spot
+        return 50
+    return -abs(utilization - 70)
+
+
+def count_close(bucket: List[float], time: float, min_headway: float) -> int:
+    """Entries of a sorted bucket within min_headway of `time` (abs(diff) < min_headway)"""
+    lo = bisect_left(bucket, time - min_headway)
+    hi = bisect_right(bucket, time + min_headway)
+    return sum(1 for other in bucket[lo:hi] if abs(other - time) < min_headway)
+
+
+def count_headway_violations(stations: List[int], times: List[float], min_headway: float) -> int:
+    """
+    Pairs at the same station whose times differ by less than min_headway
+
+    Sorts by (station, time) and sweeps with two pointers: for each entry
+    the window end only moves forward, so the count takes O(n log n).
+    Within a station the later time minus the earlier is exactly the
+    abs() difference the pairwise check uses, so the count is identical.
+    """
+    events = sorted(zip(stations, times))
+    n = len(events)
+    count = 0
+    end = 0
+    for i, (station, time) in enumerate(events):
+        if end <= i:
+            end = i + 1
+        while end < n and events[end][0] == station and events[end][1] - time < min_headway:
+            end += 1
+        count += end - i - 1
+    return count
+
+
+class ScheduleFitness:
+    """
+    A chromosome together with its fitness components.
+
+    Keeps the per-gene distance and utilization terms, the headway
+    conflict count and per-station buckets of sorted departure / arrival
+    times. replace() and splice() return a new ScheduleFitness and only
+    touch the buckets of the genes that changed, so a mutation costs
+    O(n) instead of the O(n^2) pairwise conflict scan. Instances are never
+    modified after construction and can be shared between populations.
+    """
+
+    __slots__ = ('genes', 'keys', 'distances', 'utilization_terms', 'conflicts',
+                 'origin_buckets', 'dest_buckets', 'min_headway', 'fitness')
+
+    def __init__(self, genes, keys, distances, utilization_terms, conflicts,
+                 origin_buckets, dest_buckets, min_headway):
+        self.genes = genes
+        self.keys = keys
+        self.distances = distances
+        self.utilization_terms = utilization_terms
+        self.conflicts = conflicts
+        self.origin_buckets = origin_buckets
+        self.dest_buckets = dest_buckets
+        self.min_headway = min_headway
+        self.fitness = self._total()
+
+    @classmethod
+    def from_genes(cls, genes: List[Dict], min_headway: float) -> 'ScheduleFitness':
+        """Build from a list of freight train dicts"""
+        state = cls([], [], [], [], 0, {}, {}, min_headway)
+        return state.splice_genes(0, genes)
+
+    @property
+    def key(self) -> Tuple:
+        """Hashable identity of the chromosome for memoization"""
+        return tuple(self.keys)
+
+    @property
+    def count_reward(self) -> int:
+        return len(self.genes) * 100
+
+    @property
+    def distance_reward(self) -> float:
+        return sum(self.distances) * 2
+
+    @property
+    def utilization_reward(self) -> float:
+        return sum(self.utilization_terms)
+
+    def _total(self) -> float:
+        """Same arithmetic, in the same order, as FreightOptimizer.fitness_function()"""
+        if not self.genes:
+            return 0
+        fitness = 0
+        fitness += len(self.genes) * 100
+        fitness += sum(self.distances) * 2
+        for term in self.utilization_terms:
+            fitness += term
+        fitness -= self.conflicts * 200
+        return max(0, fitness)
+
+    def __len__(self):
+        return len(self.genes)
+
+    def replace(self, index: int, gene: Dict) -> 'ScheduleFitness':
+        """Copy with one gene replaced"""
+        return self.splice_genes(index, [gene])
+
+    def splice(self, other: 'ScheduleFitness', point: int) -> 'ScheduleFitness':
+        """self[:point] + other[point:], built from whichever parent needs fewer changes"""
+        if len(self) != len(other):
+            return ScheduleFitness.from_genes(self.genes[:point] + other.genes[point:], self.min_headway)
+        if point < len(self) - point:
+            return other.splice_genes(0, self.genes[:point])
+        return self.splice_genes(point, other.genes[point:])
+
+    def splice_genes(self, start: int, new_genes: List[Dict]) -> 'ScheduleFitness':
+        """Copy with genes[start:start + len(new_genes)] replaced (or appended)"""
+        genes = self.genes[:]
+        keys = self.keys[:]
+        distances = self.distances[:]
+        terms = self.utilization_terms[:]
+        conflicts = self.conflicts
+        buckets = (dict(self.origin_buckets), dict(self.dest_buckets))
+        copied = (set(), set())
+        h = self.min_headway
+
+        def remove(side, station, time):
+            times = buckets[side][station]
+            if station not in copied[side]:
+                # Copy-on-write: buckets are shared with the parent schedule
+                copied[side].add(station)
+                times = buckets[side][station] = times[:]
+            del times[bisect_left(times, time)]
+            return count_close(times, time, h) if times else 0
+
+        def add(side, station, time):
+            times = buckets[side].get(station)
+            if times is None:
+                copied[side].add(station)
+                buckets[side][station] = [time]
+                return 0
+            if station not in copied[side]:
+                copied[side].add(station)
+                times = buckets[side][station] = times[:]
+            close = count_close(times, time, h)
+            insort(times, time)
+            return close
+
+        for index, gene in enumerate(new_genes, start):
+            key = gene_key(gene)
+
+            if index < len(genes):
+                if keys[index] == key:
+                    # Same slot and route: only the dict differs, fitness does not
+                    genes[index] = gene
+                    continue
+                old = genes[index]
+                conflicts -= remove(0, old['origin_id'], old['departure_time'])
+                conflicts -= remove(1, old['destination_id'], old['arrival_time'])
+            else:
+                genes.append(None)
+                keys.append(None)
+                distances.append(None)
+                terms.append(None)
+
+            conflicts += add(0, gene['origin_id'], gene['departure_time'])
+            conflicts += add(1, gene['destination_id'], gene['arrival_time'])
+
+            genes[index] = gene
+            keys[index] = key
+            distances[index] = gene['distance']
+            terms[index] = utilization_term(gene)
+
+        return ScheduleFitness(genes, keys, distances, terms, conflicts,
+                               buckets[0], buckets[1], h)
@@ -0,0 +1,157 @@
+"""
+Island-Model Genetic Algorithm
+Parallel sub-populations of the vectorized GA with periodic migration
+"""
+
+import os
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+from models.stop_condition import StopCondition
+from models.vectorized_ga import VectorizedGA
+from utils.worker_pool import WorkerPool
+
+# Engine built once per worker process and problem. Pools outlive a run, so
+# tasks name the problem by its shared memory block: a worker attaches and
+# rebuilds only when the block changes, and otherwise just takes over the
+# population and RNG state it is sent
+_worker_block = None
+_worker_engine = None
+
+
+def _share_problem(problem: Dict) -> Tuple[shared_memory.SharedMemory, Dict]:
+    """
+    Copy the problem's arrays into one shared memory block
+
+    Returns:
+        (block, layout): the layout names the block and holds the other
+        arguments, and is all a task needs to carry
+    """
+    arrays = {name: np.asarray(value) for name, value in problem.items()
+              if isinstance(value, (list, np.ndarray))}
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(a.nbytes for a in arrays.values())))
+    fields = {}
+    offset = 0
+    for name, array in arrays.items():
+        np.ndarray(array.shape, array.dtype, block.buf, offset)[...] = array
+        fields[name] = (offset, array.shape, array.dtype.str)
+        offset += array.nbytes
+    params = {name: value for name, value in problem.items() if name not in arrays}
+    return block, {'block': block.name, 'fields': fields, 'params': params}
+
+
+def _attach_problem(layout: Dict) -> Tuple[shared_memory.SharedMemory, Dict]:
+    """Problem arguments as views of a block made by _share_problem() (worker process)"""
+    block = shared_memory.SharedMemory(name=layout['block'])
+    problem = dict(layout['params'])
+    for name, (offset, shape, dtype) in layout['fields'].items():
+        problem[name] = np.ndarray(shape, dtype, block.buf, offset)
+    return block, problem
+
+
+def _evolve_island(layout: Dict, state: Dict, generations: int, deadline: Optional[float]) -> Dict:
+    global _worker_block, _worker_engine
+    if _worker_block is None or _worker_block.name != layout['block']:
+        _worker_engine = None
+        if _worker_block is not None:
+            _worker_block.close()
+        _worker_block, problem = _attach_problem(layout)
+        _worker_engine = VectorizedGA(**problem)
+    _worker_engine.set_state(state)
+    _worker_engine.run(generations, StopCondition(generations, deadline=deadline))
+    return _worker_engine.get_state()
+
+
+class IslandGA:
+    """
+    N independent VectorizedGA populations ("islands") evolved in a
+    process pool. Every `migration_interval` generations each island sends
+    copies of its best chromosomes to the next island in a ring, where they
+    replace the worst ones.
+
+    Island seeds are spawned from one SeedSequence, so a given seed gives
+    the same result whatever the number of workers. The worker processes
+    come from the caller's WorkerPool, so they outlive a single run.
+    """
+
+    def __init__(self, problem: Dict, islands: int = 4, migration_interval: int = 10,
+                 migration_size: int = 5, seed: Optional[int] = None, workers: Optional[int] = None,
+                 pool: Optional[WorkerPool] = None):
+        """
+        Args:
+            problem: VectorizedGA keyword arguments without the seed
+            islands: number of sub-populations
+            migration_interval: generations between migrations
+            migration_size: chromosomes sent by each island per migration
+            seed: base seed for all islands
+            workers: worker processes (default: one per island, up to the CPU count)
+            pool: WorkerPool to run the islands in (default: this process)
+        """
+        self.problem = problem
+        self.migration_interval = max(1, migration_interval)
+        self.migration_size = migration_size
+        self.workers = workers or min(islands, os.cpu_count() or 1)
+        self.pool = pool.get(self.workers) if pool is not None and self.workers > 1 else None
+
+        seeds = np.random.SeedSequence(seed).spawn(islands)
+        self.islands = [VectorizedGA(**problem, seed=island_seed) for island_seed in seeds]
+
+    def migrate(self):
+        """Ring migration: island i sends its elites to island i + 1"""
+        if len(self.islands) < 2:
+            return
+        emigrants = [island.elites(self.migration_size) for island in self.islands]
+        for i, (genes, fitness) in enumerate(emigrants):
+            self.islands[(i + 1) % len(self.islands)].replace_worst(genes, fitness)
+
+    def seed_population(self, chromosomes):
+        """Seed every island with known (origin gap, destination gap) gene lists"""
+        for island in self.islands:
+            island.seed_population(chromosomes)
+
+    def best(self) -> VectorizedGA:
+        """Island holding the best chromosome found so far"""
+        return max(self.islands, key=lambda island: island.best_fitness)
+
+    def run(self, generations: int, stop: Optional[StopCondition] = None) -> Tuple[np.ndarray, float]:
+        """
+        Evolve every island for up to `generations` generations
+
+        The stop condition is checked between migrations; a time budget is
+        also enforced inside the workers through its deadline.
+
+        Returns:
+            (best genes, best fitness) over all islands
+        """
+        stop = stop or StopCondition(generations)
+        block = layout = None
+        if self.pool is not None:
+            block, layout = _share_problem(self.problem)
+
+        try:
+            completed = 0
+            while not stop.check(completed, self.best().best_fitness):
+                n = min(self.migration_interval, stop.max_generations - completed)
+                start = [island.generation for island in self.islands]
+
+                if self.pool is None:
+                    for island in self.islands:
+                        island.run(n, StopCondition(n, deadline=stop.deadline))
+                else:
+                    count = len(self.islands)
+                    states = self.pool.map(_evolve_island, [layout] * count,
+                                           [island.get_state() for island in self.islands],
+                                           [n] * count, [stop.deadline] * count)
+                    for island, state in zip(self.islands, states):
+                        island.set_state(state)
+
+                completed += max(island.generation - first for island, first in zip(self.islands, start))
+                self.migrate()
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+
+        best = self.best()
+        return best.best_genes, best.best_fitness
@@ -0,0 +1,95 @@
+"""
+Section Occupancy
+Block-section intervals between consecutive stops and their headway conflicts
+"""
+
+import numpy as np
+
+MINUTES_PER_DAY = 1440
+
+
+def section_intervals(offsets, station_ids, arrivals, departures):
+    """
+    One interval per pair of consecutive stops of a train, from CSR route
+    arrays (Timetable layout: stops of train i in rows offsets[i]:offsets[i+1])
+
+    A train occupies the directed section (stop k -> stop k+1) from its
+    departure at stop k until its arrival at stop k+1; an arrival before
+    the departure is taken to be after midnight. Pairs with a missing
+    time (NaN) are skipped.
+
+    Returns:
+        dict of arrays: 'from', 'to' (station ids), 'enter', 'exit'
+        (minutes) and 'row' (the stop row the train leaves from)
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    station_ids = np.asarray(station_ids, dtype=np.int64)
+    arrivals = np.asarray(arrivals, dtype=np.float64)
+    departures = np.asarray(departures, dtype=np.float64)
+
+    # Every row except each train's last stop starts a section
+    last = np.zeros(len(station_ids), dtype=bool)
+    last[offsets[1:][np.diff(offsets) > 0] - 1] = True
+    rows = np.flatnonzero(~last)
+    enter = departures[rows]
+    exit_ = arrivals[rows + 1]
+    keep = ~(np.isnan(enter) | np.isnan(exit_))
+    rows, enter, exit_ = rows[keep], enter[keep], exit_[keep]
+    exit_ = np.where(exit_ < enter, exit_ + MINUTES_PER_DAY, exit_)
+
+    return {
+        'from': station_ids[rows],
+        'to': station_ids[rows + 1],
+        'enter': enter,
+        'exit': exit_,
+        'row': rows
+    }
+
+
+def section_conflicts(from_ids, to_ids, enter, exit_, headway):
+    """
+    Headway and overtaking violations between trains on the same directed
+    section
+
+    Intervals are sorted by (from, to, enter). A later entry j can only
+    clash with i if it enters before i has left plus the headway, so one
+    searchsorted per interval bounds its candidates and the cost grows
+    with those candidate pairs, not with the square of the trains per
+    section. A candidate pair is an overtaking if j leaves before i, and
+    a headway violation if the trains enter or leave less than `headway`
+    minutes apart.
+
+    Returns:
+        (firsts, seconds, overtaking) - interval indices into the inputs,
+        ordered by section then entry, and a bool array per pair
+    """
+    n = len(from_ids)
+    empty = np.zeros(0, dtype=np.int64)
+    if n < 2:
+        return empty, empty, np.zeros(0, dtype=bool)
+
+    # One integer key per directed section, increasing in (from, to);
+    # shifted by one so unknown stations (-1) still sort first
+    from_ids = np.asarray(from_ids, dtype=np.int64) + 1
+    to_ids = np.asarray(to_ids, dtype=np.int64) + 1
+    section = from_ids * (to_ids.max() + 1) + to_ids
+    order = np.lexsort((enter, section))
+    section = section[order].astype(np.float64)
+    enter = np.asarray(enter, dtype=np.float64)[order]
+    exit_ = np.asarray(exit_, dtype=np.float64)[order]
+
+    # (section, entry) composite keys; a search never runs past its own section
+    low = enter.min()
+    span = max(enter.max(), exit_.max() + headway) - low + 1
+    composite = section * span + (enter - low)
+    ends = np.searchsorted(composite, section * span + (exit_ + headway - low), side='left')
+    counts = np.maximum(ends - np.arange(n) - 1, 0)
+
+    firsts = np.repeat(np.arange(n), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    seconds = firsts + 1 + offsets
+
+    overtaking = exit_[seconds] < exit_[firsts]
+    too_close = (enter[seconds] - enter[firsts] < headway) | (exit_[seconds] - exit_[firsts] < headway)
+    keep = overtaking | too_close
+    return order[firsts[keep]], order[seconds[keep]], overtaking[keep]
@@ -0,0 +1,89 @@
+"""
+Stop Condition
+Generation limit, wall-clock budget and stagnation check shared by the GA engines
+"""
+
+import time
+from typing import Optional
+
+# Stop reasons reported in optimize() responses
+MAX_GENERATIONS = 'max_generations'
+TIME_BUDGET = 'time_budget'
+STAGNATION = 'stagnation'
+
+
+class StopCondition:
+    """
+    Decides, before every generation, whether a GA should stop.
+
+    The time budget is a hard limit: a run stops as soon as one more
+    generation (at the average speed so far) would overshoot the deadline.
+    The clock starts when the condition is created, so setup such as
+    building the initial population counts too and can poll expired().
+    Deadlines use time.monotonic(), which is shared by all processes, so
+    the same deadline can be handed to island workers.
+    """
+
+    def __init__(self, max_generations: int, time_budget_ms: Optional[float] = None,
+                 stagnation_generations: Optional[int] = None, min_improvement: float = 0.0,
+                 deadline: Optional[float] = None):
+        """
+        Args:
+            max_generations: hard generation limit
+            time_budget_ms: wall-clock budget from now (milliseconds)
+            stagnation_generations: stop after this many generations without improvement
+            min_improvement: smaller fitness gains do not count as improvement
+            deadline: absolute time.monotonic() deadline (instead of time_budget_ms)
+        """
+        self.max_generations = max_generations
+        self.stagnation_generations = stagnation_generations
+        self.min_improvement = min_improvement
+
+        self.started = time.monotonic()
+        if time_budget_ms is not None:
+            deadline = self.started + time_budget_ms / 1000
+        self.deadline = deadline
+
+        self.loop_started = None
+        self.best_fitness = None
+        self.last_improvement = 0
+        self.generations_completed = 0
+        self.reason = None
+
+    def check(self, generation: int, best_fitness: float) -> bool:
+        """
+        Record progress after `generation` completed generations
+
+        Returns:
+            True when the run should stop (the reason is kept in self.reason)
+        """
+        self.generations_completed = generation
+        now = time.monotonic()
+        if self.loop_started is None:
+            self.loop_started = now
+
+        if self.best_fitness is None or best_fitness > self.best_fitness + self.min_improvement:
+            self.best_fitness = best_fitness
+            self.last_improvement = generation
+
+        if generation >= self.max_generations:
+            self.reason = MAX_GENERATIONS
+        elif self.stagnation_generations and generation - self.last_improvement >= self.stagnation_generations:
+            self.reason = STAGNATION
+        elif self.deadline is not None:
+            # Average generation time since the first check (setup not included)
+            per_generation = (now - self.loop_started) / generation if generation else 0
+            if now + per_generation > self.deadline:
+                self.reason = TIME_BUDGET
+
+        return self.reason is not None
+
+    def expired(self) -> bool:
+        """True (reason TIME_BUDGET) once the deadline has passed; for work outside check()"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.reason = TIME_BUDGET
+        return self.reason == TIME_BUDGET
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
@@ -0,0 +1,232 @@
+"""
+Time-Expanded Network
+Free-capacity windows per station linked by the timetable's line segments
+"""
+
+import heapq
+import numpy as np
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+MINUTES_PER_DAY = 1440
+
+
+class TimeExpandedNetwork:
+    """
+    Nodes are free windows (station, [start, end]): the complement of the
+    passenger occupancy of a station, where every passenger stop blocks
+    min_headway minutes either side. Edges are the line segments between
+    consecutive stops of the timetable routes.
+
+    A freight train may wait inside a window, runs a segment in
+    km / speed, and must arrive inside a free window of the next station.
+    Earliest-arrival search (A*) over these nodes gives multi-hop routes
+    through free capacity.
+    """
+
+    # Straight-line distance is scaled down before use as the A* lower
+    # bound, since geocoded positions are only approximate
+    HEURISTIC_FACTOR = 0.8
+
+    def __init__(self, registry, stop_stations, stop_times, segments: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                 min_headway: int = 5, freight_avg_speed: float = 40):
+        """
+        Args:
+            registry: StationRegistry the station ids refer to
+            stop_stations: station id of every passenger stop
+            stop_times: time (minutes) of every passenger stop
+            segments: (from station ids, to station ids, km) of consecutive stops
+            min_headway: minutes blocked either side of a passenger stop
+            freight_avg_speed: km/h
+        """
+        self.registry = registry
+        self.min_headway = min_headway
+        self.freight_avg_speed = freight_avg_speed
+
+        self._build_windows(np.asarray(stop_stations, dtype=np.int64), np.asarray(stop_times, dtype=np.int64))
+        self._build_edges(*segments)
+
+    def _build_windows(self, stations, times):
+        h = self.min_headway
+        valid = stations >= 0
+        stations, times = stations[valid], times[valid]
+        order = np.lexsort((times, stations))
+        stations, times = stations[order], times[order]
+
+        first = np.ones(len(stations), dtype=bool)
+        first[1:] = stations[1:] != stations[:-1]
+        last = np.ones(len(stations), dtype=bool)
+        last[:-1] = first[1:]
+
+        # Between consecutive stops of a station, before its first and after its last
+        inner = ~last[:-1] & (times[1:] - times[:-1] > 2 * h) if len(times) else np.zeros(0, dtype=bool)
+        lead = first & (times - h > 0)
+        trail = last & (times + h < MINUTES_PER_DAY - 1)
+
+        win_station = np.concatenate([stations[lead], stations[:-1][inner], stations[trail]])
+        win_start = np.concatenate([np.zeros(lead.sum(), dtype=np.int64), times[:-1][inner] + h, times[trail] + h])
+        win_end = np.concatenate([times[lead] - h, times[1:][inner] - h,
+                                  np.full(trail.sum(), MINUTES_PER_DAY - 1, dtype=np.int64)])
+
+        order = np.lexsort((win_start, win_station))
+        self.win_station = win_station[order].tolist()
+        self.win_start = win_start[order].tolist()
+        self.win_end = win_end[order].tolist()
+
+        # Per station: first window position plus sorted starts / ends for bisect
+        self.station_windows = {}
+        for position, station in enumerate(self.win_station):
+            entry = self.station_windows.get(station)
+            if entry is None:
+                entry = self.station_windows[station] = (position, [], [])
+            entry[1].append(self.win_start[position])
+            entry[2].append(self.win_end[position])
+
+    def _build_edges(self, from_ids, to_ids, km):
+        from_ids = np.asarray(from_ids, dtype=np.int64)
+        to_ids = np.asarray(to_ids, dtype=np.int64)
+        km = np.asarray(km, dtype=np.float64)
+
+        keep = (from_ids >= 0) & (to_ids >= 0) & (from_ids != to_ids)
+        from_ids, to_ids, km = from_ids[keep], to_ids[keep], km[keep]
+
+        # Route distances that are missing or not increasing: use the registry
+        bad = ~(km > 0)
+        if bad.any():
+            km[bad] = self.registry.pair_distances(from_ids[bad], to_ids[bad])
+
+        # Lines run both ways; keep the shortest km per station pair
+        a = np.concatenate([from_ids, to_ids])
+        b = np.concatenate([to_ids, from_ids])
+        km = np.concatenate([km, km])
+        order = np.lexsort((km, b, a))
+        a, b, km = a[order], b[order], km[order]
+        unique = np.ones(len(a), dtype=bool)
+        unique[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+
+        self.edges = {}
+        for station, neighbor, length in zip(a[unique].tolist(), b[unique].tolist(), km[unique].tolist()):
+            run = length / self.freight_avg_speed * 60
+            self.edges.setdefault(station, []).append((neighbor, length, run))
+
+    @property
+    def n_windows(self) -> int:
+        return len(self.win_station)
+
+    @property
+    def n_edges(self) -> int:
+        return sum(len(e) for e in self.edges.values())
+
+    def window_at(self, station_id: int, time: float) -> Optional[int]:
+        """Window of a station containing `time`, or None"""
+        entry = self.station_windows.get(station_id)
+        if entry is None:
+            return None
+        first, starts, ends = entry
+        i = bisect_left(ends, time)
+        if i < len(starts) and starts[i] <= time:
+            return first + i
+        return None
+
+    def _lower_bounds(self, destination_id: int):
+        """A* heuristic: minutes to the destination at freight speed, scaled down"""
+        registry = self.registry
+        if not registry.has_coordinates[destination_id]:
+            return None
+        km = registry.distances_from(destination_id).astype(np.float64)
+        bound = km * (self.HEURISTIC_FACTOR / self.freight_avg_speed * 60)
+        bound[~registry.has_coordinates] = 0.0
+        return bound
+
+    def shortest_path(self, origin_id: int, destination_id: int,
+                      departures: List[float]) -> Optional[List[Dict]]:
+        """
+        Earliest-arrival route from origin to destination
+
+        Args:
+            departures: possible earliest departure times at the origin
+
+        Returns:
+            list of hops [{'station_id', 'arrival_time', 'departure_time', 'km'}]
+            from origin to destination, or None if unreachable; 'km' is the
+            length of the segment leaving the hop (0.0 at the destination)
+        """
+        if origin_id == destination_id or destination_id not in self.station_windows:
+            return None
+
+        bounds = self._lower_bounds(destination_id)
+        best = {}
+        parents = {}
+        heap = []
+        for time in departures:
+            window = self.window_at(origin_id, time)
+            if window is not None and time < best.get(window, float('inf')):
+                best[window] = time
+                parents[window] = None
+                heapq.heappush(heap, (time, time, window))
+
+        settled = set()
+        while heap:
+            _, arrival, window = heapq.heappop(heap)
+            if window in settled:
+                continue
+            settled.add(window)
+
+            station = self.win_station[window]
+            if station == destination_id:
+                return self._reconstruct(window, best, parents)
+
+            # A route never passes through a station twice
+            visited = self._path_stations(window, parents)
+            latest_departure = self.win_end[window]
+            for neighbor, length, run in self.edges.get(station, ()):
+                entry = self.station_windows.get(neighbor)
+                if entry is None or neighbor in visited:
+                    continue
+                first, starts, ends = entry
+
+                # Windows at the neighbor reachable by leaving between now and the window end
+                earliest = arrival + run
+                latest = latest_departure + run
+                i = bisect_left(ends, earliest)
+                while i < len(starts) and starts[i] <= latest:
+                    target = first + i
+                    reached = max(earliest, starts[i])
+                    if reached < best.get(target, float('inf')):
+                        best[target] = reached
+                        parents[target] = (window, length, run)
+                        priority = reached + (bounds[neighbor] if bounds is not None else 0.0)
+                        heapq.heappush(heap, (priority, reached, target))
+                    i += 1
+
+        return None
+
+    def _reconstruct(self, window, best, parents) -> List[Dict]:
+        hops = []
+        departure = None
+        km = 0.0
+        while window is not None:
+            arrival = best[window]
+            hops.append({
+                'station_id': self.win_station[window],
+                'arrival_time': arrival,
+                'departure_time': departure if departure is not None else arrival,
+                'km': km
+            })
+            parent = parents[window]
+            if parent is None:
+                break
+            window, km, run = parent
+            # Leave as late as possible: just in time for the next arrival
+            departure = arrival - run
+        hops.reverse()
+        return hops
+
+    def _path_stations(self, window, parents) -> set:
+        """Stations on the route that reached a window, origin included"""
+        stations = set()
+        while window is not None:
+            stations.add(self.win_station[window])
+            parent = parents[window]
+            window = parent[0] if parent is not None else None
+        return stations
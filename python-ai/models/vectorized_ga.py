@@ -0,0 +1,218 @@
+"""
+Vectorized Genetic Algorithm
+Array-based GA engine for freight path placement
+
+A population is an integer array of shape (population, num_trains, 2)
+holding (origin gap, destination gap) indices into the gap list. Fitness,
+tournament selection, crossover and mutation all run as batched NumPy
+operations over the whole population.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from models.stop_condition import StopCondition
+
+
+class VectorizedGA:
+    def __init__(self, gap_stations, gap_starts, gap_sizes, station_distances, num_trains: int,
+                 population_size: int = 100, mutation_rate: float = 0.15, crossover_rate: float = 0.7,
+                 elite_size: int = 10, tournament_size: int = 3, min_headway: int = 5,
+                 freight_avg_speed: float = 40, seed=None):
+        """
+        Args:
+            gap_stations: local station index of every gap (0..k-1)
+            gap_starts: gap start times (minutes)
+            gap_sizes: usable gap sizes (minutes)
+            station_distances: (k, k) distance matrix between the local stations
+            num_trains: freight trains per schedule (genes per chromosome)
+            seed: seed for the engine's own random generator
+        """
+        self.gap_stations = np.asarray(gap_stations, dtype=np.int64)
+        self.gap_starts = np.asarray(gap_starts, dtype=np.float64)
+        self.gap_sizes = np.asarray(gap_sizes, dtype=np.float64)
+        self.station_distances = np.asarray(station_distances, dtype=np.float32)
+
+        if len(np.unique(self.gap_stations)) < 2:
+            raise ValueError("Vectorized GA needs gaps at two or more stations")
+
+        self.num_trains = num_trains
+        self.population_size = population_size
+        self.mutation_rate = mutation_rate
+        self.crossover_rate = crossover_rate
+        self.elite_size = min(elite_size, population_size)
+        self.tournament_size = tournament_size
+        self.min_headway = min_headway
+        self.freight_avg_speed = freight_avg_speed
+
+        self.rng = np.random.default_rng(seed)
+        self._upper = np.triu(np.ones((num_trains, num_trains), dtype=bool), 1)
+
+        self.population = self.random_genes((population_size, num_trains))
+        self.fitness = self.evaluate(self.population)
+        self.generation = 0
+
+        best = int(np.argmax(self.fitness))
+        self.best_genes = self.population[best].copy()
+        self.best_fitness = float(self.fitness[best])
+
+    @staticmethod
+    def problem_from_gaps(gaps: List[Dict], registry) -> Dict:
+        """Gap arrays and local distance matrix for find_time_gaps() output"""
+        station_ids = np.array([gap['station_id'] for gap in gaps], dtype=np.int64)
+        stations, local = np.unique(station_ids, return_inverse=True)
+
+        return {
+            'gap_stations': local,
+            'gap_starts': [gap['start_time'] for gap in gaps],
+            'gap_sizes': [gap['gap_size'] for gap in gaps],
+            'station_distances': registry.pair_distances(stations[:, None], stations[None, :])
+        }
+
+    @classmethod
+    def from_gaps(cls, gaps: List[Dict], registry, num_trains: int, **params) -> 'VectorizedGA':
+        """Build an engine from find_time_gaps() output and a StationRegistry"""
+        return cls(num_trains=num_trains, **cls.problem_from_gaps(gaps, registry), **params)
+
+    def random_genes(self, shape) -> np.ndarray:
+        """Random (origin gap, destination gap) pairs at two different stations"""
+        n_gaps = len(self.gap_stations)
+        origins = self.rng.integers(0, n_gaps, shape)
+        destinations = self.rng.integers(0, n_gaps, shape)
+
+        # Re-draw destinations at the origin station (uniform over the others)
+        clash = self.gap_stations[origins] == self.gap_stations[destinations]
+        while clash.any():
+            destinations[clash] = self.rng.integers(0, n_gaps, int(clash.sum()))
+            clash = self.gap_stations[origins] == self.gap_stations[destinations]
+
+        return np.stack([origins, destinations], axis=-1)
+
+    def evaluate(self, population: np.ndarray) -> np.ndarray:
+        """Batched fitness_function() for a whole population"""
+        origins = population[..., 0]
+        destinations = population[..., 1]
+        origin_stations = self.gap_stations[origins]
+        dest_stations = self.gap_stations[destinations]
+
+        distance = self.station_distances[origin_stations, dest_stations].astype(np.float64)
+        travel_time = (distance / self.freight_avg_speed) * 60
+        departure = self.gap_starts[origins]
+        arrival = departure + travel_time
+
+        fitness = self.num_trains * 100 + np.round(distance, 2).sum(axis=1) * 2
+
+        # Reward: Efficient gap utilization (sweet spot 50-90%)
+        utilization = (np.round(travel_time, 2) / self.gap_sizes[origins]) * 100
+        fitness += np.where(
+            (utilization >= 50) & (utilization <= 90), 50, -np.abs(utilization - 70)
+        ).sum(axis=1)
+
+        # Penalty: headway conflicts at shared origins / destinations
+        fitness -= self._conflicts(origin_stations, departure) * 200
+        fitness -= self._conflicts(dest_stations, arrival) * 200
+
+        return np.maximum(fitness, 0)
+
+    def _conflicts(self, stations, times) -> np.ndarray:
+        """Pairs per individual at the same station closer than min_headway"""
+        same_station = stations[:, :, None] == stations[:, None, :]
+        too_close = np.abs(times[:, :, None] - times[:, None, :]) < self.min_headway
+        return (same_station & too_close & self._upper).sum(axis=(1, 2))
+
+    def _tournament(self, count: int) -> np.ndarray:
+        """Indices of `count` tournament winners"""
+        candidates = self.rng.integers(0, self.population_size, (count, self.tournament_size))
+        winners = np.argmax(self.fitness[candidates], axis=1)
+        return candidates[np.arange(count), winners]
+
+    def step(self):
+        """Advance the population by one generation"""
+        order = np.argsort(-self.fitness, kind='stable')
+        elite = self.population[order[:self.elite_size]]
+        n_children = self.population_size - self.elite_size
+
+        parents1 = self.population[self._tournament(n_children)]
+        parents2 = self.population[self._tournament(n_children)]
+
+        # Single-point crossover
+        children = parents1.copy()
+        if self.num_trains > 1:
+            crossover = self.rng.random(n_children) < self.crossover_rate
+            points = self.rng.integers(1, self.num_trains, n_children)
+            take_second = (np.arange(self.num_trains)[None, :] >= points[:, None]) & crossover[:, None]
+            children[take_second] = parents2[take_second]
+
+        # Mutation: replace one random gene
+        mutants = np.flatnonzero(self.rng.random(n_children) < self.mutation_rate)
+        if len(mutants):
+            genes = self.rng.integers(0, self.num_trains, len(mutants))
+            children[mutants, genes] = self.random_genes(len(mutants))
+
+        self.population = np.concatenate([elite, children])
+        self.fitness = np.concatenate([self.fitness[order[:self.elite_size]], self.evaluate(children)])
+        self.generation += 1
+
+        best = int(np.argmax(self.fitness))
+        if self.fitness[best] > self.best_fitness:
+            self.best_fitness = float(self.fitness[best])
+            self.best_genes = self.population[best].copy()
+
+    def get_state(self) -> Dict:
+        """Evolving state (population, RNG, best so far) for moving between processes"""
+        return {
+            'population': self.population,
+            'fitness': self.fitness,
+            'rng': self.rng.bit_generator.state,
+            'generation': self.generation,
+            'best_genes': self.best_genes,
+            'best_fitness': self.best_fitness
+        }
+
+    def set_state(self, state: Dict):
+        self.population = state['population']
+        self.fitness = state['fitness']
+        self.rng.bit_generator.state = state['rng']
+        self.generation = state['generation']
+        self.best_genes = state['best_genes']
+        self.best_fitness = state['best_fitness']
+
+    def elites(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the `count` fittest chromosomes and their fitness"""
+        order = np.argsort(-self.fitness, kind='stable')[:count]
+        return self.population[order].copy(), self.fitness[order].copy()
+
+    def replace_worst(self, genes: np.ndarray, fitness: np.ndarray):
+        """Replace the least fit chromosomes with immigrants"""
+        worst = np.argsort(self.fitness, kind='stable')[:len(genes)]
+        self.population[worst] = genes
+        self.fitness[worst] = fitness
+
+        best = int(np.argmax(fitness))
+        if fitness[best] > self.best_fitness:
+            self.best_fitness = float(fitness[best])
+            self.best_genes = genes[best].copy()
+
+    def seed_population(self, chromosomes: List[List[Tuple[int, int]]]):
+        """Replace the worst chromosomes with known gene lists, padded with random genes"""
+        chromosomes = chromosomes[:self.population_size]
+        if not chromosomes:
+            return
+        genes = self.random_genes((len(chromosomes), self.num_trains))
+        for row, chromosome in zip(genes, chromosomes):
+            chromosome = chromosome[:self.num_trains]
+            row[:len(chromosome)] = chromosome
+        self.replace_worst(genes, self.evaluate(genes))
+
+    def run(self, generations: int, stop: Optional[StopCondition] = None) -> Tuple[np.ndarray, float]:
+        """
+        Evolve for up to `generations` generations (or until `stop` says so)
+
+        Returns:
+            (best genes, best fitness)
+        """
+        stop = stop or StopCondition(generations)
+        first_generation = self.generation
+        while not stop.check(self.generation - first_generation, self.best_fitness):
+            self.step()
+        return self.best_genes, self.best_fitness
@@ -0,0 +1,92 @@
+"""
+Warm Start Store
+Best freight schedules of earlier optimize() calls, reused to seed new GA runs
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Tuple
+
+from models.incremental_fitness import gene_key
+
+
+class WarmStartStore:
+    """
+    Best chromosomes per (dataset version, time window bucket, num_trains).
+
+    Chromosomes are kept as gene keys (origin station, departure time,
+    destination station) rather than gap indices, so they survive a change
+    of the gap list: decode() maps them onto the current gaps and drops
+    genes whose origin gap or destination station is gone.
+    """
+
+    def __init__(self, per_key: int = 5, max_keys: int = 256):
+        """
+        Args:
+            per_key: chromosomes kept per key (best fitness first)
+            max_keys: keys kept before the least recently used is dropped
+        """
+        self.per_key = per_key
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> List[Tuple]:
+        """Stored chromosomes for a key, best first (gene key tuples)"""
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries is None:
+                return []
+            self._entries.move_to_end(key)
+            return [chromosome for _, chromosome in entries]
+
+    def put(self, key: Hashable, chromosome: List[Dict], fitness: float):
+        """Remember a chromosome (freight train dicts) if it ranks among the best for its key"""
+        if not chromosome:
+            return
+        encoded = tuple(gene_key(train) for train in chromosome)
+
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            self._entries.move_to_end(key)
+            if any(stored == encoded for _, stored in entries):
+                return
+            entries.append((fitness, encoded))
+            entries.sort(key=lambda entry: entry[0], reverse=True)
+            del entries[self.per_key:]
+
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def decode(chromosomes: List[Tuple], gaps: List[Dict]) -> List[List[Tuple[int, int]]]:
+        """
+        Stored chromosomes as (origin gap, destination gap) index pairs into `gaps`
+
+        Genes whose origin gap (station and start time) or destination
+        station has no gap any more are dropped; empty chromosomes are left out.
+        """
+        origin_gaps = {}
+        station_gaps = {}
+        for i, gap in enumerate(gaps):
+            origin_gaps.setdefault((gap['station_id'], gap['start_time']), i)
+            station_gaps.setdefault(gap['station_id'], i)
+
+        decoded = []
+        for chromosome in chromosomes:
+            genes = []
+            for origin_id, departure_time, destination_id in chromosome:
+                origin = origin_gaps.get((origin_id, departure_time))
+                destination = station_gaps.get(destination_id)
+                if origin is not None and destination is not None and origin_id != destination_id:
+                    genes.append((origin, destination))
+            if genes:
+                decoded.append(genes)
+        return decoded
@@ -19,14 +19,14 @@ def main():
     print("PHASE 1: DATA PREPARATION")
     print("=" * 60)
     
-    # Step 1: Load and filter data
+    # Step 1: Load and filter data (streamed, so only matching trains are held in memory)
     print("\n--- Step 1: Loading and Filtering Data ---")
     loader = DataLoader(config.RAW_DATA_PATH)
-    loader.load_csv()
     
-    filtered_df = loader.filter_csmt_trains(
+    filtered_df = loader.load_filtered_csv(
         source_station=config.SOURCE_STATION,
-        dest_station=config.DESTINATION_STATION
+        dest_station=config.DESTINATION_STATION,
+        chunksize=config.CSV_CHUNKSIZE
     )
     
     # Save filtered data
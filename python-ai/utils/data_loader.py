@@ -4,9 +4,17 @@ Loads and filters train data from CSV
 """
 
 import pandas as pd
+import numpy as np
 import json
 from pathlib import Path
 
+from utils.timetable import Timetable, StringPool
+
+
+class NotGroupedError(ValueError):
+    """A CSV that must be grouped by train has a train in non-contiguous rows"""
+
+
 class DataLoader:
     def __init__(self, csv_path):
         self.csv_path = csv_path
@@ -19,6 +27,74 @@ class DataLoader:
         print(f"Loaded {len(self.df)} rows")
         return self.df
     
+    def iter_train_chunks(self, chunksize=100000, source_station=None, dest_station=None):
+        """
+        Stream the CSV in chunks, yielding frames of complete trains only
+        
+        Rows of the last train in a chunk are carried over to the next one,
+        so a train is never split across yielded frames. The optional
+        source/destination filter matches filter_csmt_trains() and is
+        applied per chunk. The file must be grouped by train number:
+        NotGroupedError is raised as soon as a train turns up again.
+        """
+        carry = None
+        flushed = set()
+        
+        def check_grouped(frame):
+            numbers = frame['Train No'].unique()
+            repeated = flushed.intersection(numbers.tolist())
+            if repeated:
+                raise NotGroupedError(
+                    f"{self.csv_path} is not grouped by train: train {sorted(repeated)[0]} "
+                    f"appears in non-contiguous rows"
+                )
+            flushed.update(numbers.tolist())
+        
+        for chunk in pd.read_csv(self.csv_path, chunksize=chunksize):
+            chunk = chunk[chunk['Train No'].notna()]
+            if source_station or dest_station:
+                chunk = chunk[
+                    (chunk['Source Station'] == source_station) |
+                    (chunk['Destination Station'] == dest_station)
+                ]
+            if carry is not None:
+                chunk = pd.concat([carry, chunk])
+            if chunk.empty:
+                continue
+            
+            # Hold back the (possibly incomplete) last train
+            is_last = (chunk['Train No'] == chunk['Train No'].iat[-1]).to_numpy()
+            carry = chunk[is_last]
+            complete = chunk[~is_last]
+            
+            if not complete.empty:
+                check_grouped(complete)
+                yield complete
+        
+        if carry is not None and not carry.empty:
+            check_grouped(carry)
+            yield carry
+    
+    def load_filtered_csv(self, source_station="CSMT", dest_station="CSMT", chunksize=100000):
+        """Streaming equivalent of load_csv() + filter_csmt_trains()
+        
+        The filter keeps or drops single rows, so each chunk is filtered
+        on its own and the file does not have to be grouped by train.
+        Only matching rows are kept in memory, so peak memory is one chunk
+        plus the filtered result rather than the whole file.
+        """
+        print(f"Streaming {self.csv_path} in chunks of {chunksize} rows...")
+        frames = [
+            chunk[(chunk['Source Station'] == source_station) | (chunk['Destination Station'] == dest_station)]
+            for chunk in pd.read_csv(self.csv_path, chunksize=chunksize)
+        ]
+        filtered = pd.concat(frames) if frames else pd.read_csv(self.csv_path, nrows=0)
+        
+        print(f"Found {len(filtered)} rows for {source_station} trains")
+        print(f"Total unique trains: {filtered['Train No'].nunique()}")
+        
+        return filtered
+    
     def filter_csmt_trains(self, source_station="CSMT", dest_station="CSMT"):
         """Filter trains that start or end at CSMT"""
         print(f"Filtering trains for {source_station}...")
@@ -72,10 +148,8 @@ class DataLoader:
 
 
 # Standalone functions for easy import
-def load_train_data():
-    """Load train data from CSV and return as list of dicts"""
-    import os
-    
+def find_train_csv():
+    """Locate Train_details.csv, or None if it is not present"""
     # Try multiple possible paths
     possible_paths = [
         '../backend/data/Train_details.csv',
@@ -84,65 +158,212 @@ def load_train_data():
         '../../backend/data/Train_details.csv'
     ]
     
-    csv_path = None
     for path in possible_paths:
         full_path = Path(__file__).parent / path
         if full_path.exists():
-            csv_path = full_path
-            break
+            return full_path
+    
+    return None
+
+
+def load_timetable(csv_path=None):
+    """Load train data from CSV into a columnar Timetable
+    
+    The CSV is parsed as one DataFrame, so peak memory grows with the
+    file; utils.timetable_cache.stream_timetable() builds the same
+    Timetable with bounded memory.
+    """
+    csv_path = csv_path or find_train_csv()
     
     if not csv_path:
         print("Warning: Train_details.csv not found, using empty dataset")
-        return []
+        return Timetable.empty()
     
     print(f"Loading train data from {csv_path}...")
     df = pd.read_csv(csv_path, low_memory=False)
     
-    # Convert Distance to numeric, handling errors
-    df['Distance'] = pd.to_numeric(df['Distance'], errors='coerce').fillna(0)
-    
-    # Group by train number to create train objects
-    trains = []
-    train_groups = df.groupby('Train No')
-    
-    for train_no, group in train_groups:
-        first_row = group.iloc[0]
-        
-        # Build route from all stops
-        route = []
-        for idx, row in group.iterrows():
-            # Safely get SEQ value
-            seq_val = row.get('SEQ', idx)
-            try:
-                seq = int(seq_val) if pd.notna(seq_val) and str(seq_val).isdigit() else idx
-            except:
-                seq = idx
+    timetable = timetable_from_dataframe(df)
+    print(f"Timetable: {timetable.n_trains} trains, {timetable.n_stops} stops, "
+          f"{len(timetable.station_codes)} stations ({timetable.nbytes / 1e6:.1f} MB)")
+    return timetable
+
+
+def load_train_data(csv_path=None):
+    """Load train data from CSV and return as list of dicts
+    
+    The result is a sequence view over a Timetable (see TrainListView);
+    the underlying store is available as `.timetable`.
+    """
+    return load_timetable(csv_path).as_dicts()
+
+
+def timetable_from_dataframe(df):
+    """Vectorized conversion of a Train_details frame into a Timetable
+    
+    Produces exactly what the previous row-by-row groupby parser did
+    (kept in benchmark.py), without a Python-level loop over rows.
+    """
+    pools = (StringPool(), StringPool(), StringPool())
+    parts = ingest_frame(df, *pools)
+    
+    return Timetable(
+        parts['trains'], parts['offsets'], parts['stops'],
+        pools[0].values, pools[1].values, pools[2].values,
+        parts['total_distance']
+    )
+
+
+def ingest_frame(df, station_pool, name_pool, time_pool, sort_trains=True):
+    """
+    Turn a Train_details frame into Timetable columns
+    
+    Strings are interned into the given pools so several frames (e.g.
+    chunks of one file) can share them. With sort_trains=False trains
+    keep their order of first appearance instead of train-number order.
+    
+    Returns:
+        dict with 'trains' (metadata lists), 'offsets', 'stops' (arrays)
+        and 'total_distance'
+    """
+    # One global stable sort by train; groupby() keeps file order inside a train
+    key_codes, key_uniques = pd.factorize(df['Train No'], sort=sort_trains)
+    order = np.argsort(key_codes, kind='stable')
+    order = order[key_codes[order] >= 0]  # groupby drops missing train numbers
+    sorted_codes = key_codes[order]
+    
+    # Train boundaries where the sorted train code changes
+    starts = np.flatnonzero(np.diff(sorted_codes)) + 1
+    offsets = np.concatenate(([0], starts, [len(order)])) if len(order) else np.zeros(1, dtype=np.int64)
+    first_rows = order[offsets[:-1]]
+    train_numbers = key_uniques[sorted_codes[offsets[:-1]]] if len(order) else []
+    
+    distance = pd.to_numeric(df['Distance'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)[order]
+    total_distance = np.maximum.reduceat(distance, offsets[:-1]) if len(order) else np.zeros(0)
+    
+    # SEQ falls back to the row label when it is not a plain integer
+    if 'SEQ' in df:
+        seq = _map_unique(df['SEQ'], _seq_value)[order]
+        labels = df.index.to_numpy()[order]
+        seq = np.where(pd.isna(seq), labels, seq).astype(np.int64)
+    else:
+        seq = df.index.to_numpy()[order].astype(np.int64)
+    
+    def column(name):
+        if name in df:
+            return df[name].iloc[order]
+        return pd.Series([''] * len(order), dtype=object)
+    
+    def train_column(name):
+        if name in df:
+            return [str(v) for v in df[name].to_numpy(dtype=object)[first_rows]]
+        return [''] * len(train_numbers)
+    
+    train_ids = [str(k) for k in train_numbers]
+    if 'Train Name' in df:
+        train_names = train_column('Train Name')
+    else:
+        train_names = [f'Train {k}' for k in train_numbers]
+    
+    arrival = column('Arrival time')
+    departure = column('Departure Time')
+    
+    stops = {
+        'seq': seq,
+        'station_ids': _intern_column(column('Station Code'), station_pool),
+        'station_name_ids': _intern_column(column('Station Name'), name_pool),
+        'arrival_time_ids': _intern_column(arrival, time_pool),
+        'departure_time_ids': _intern_column(departure, time_pool),
+        'arrival_minutes': _map_unique(arrival, parse_time_column).astype(np.int32),
+        'departure_minutes': _map_unique(departure, parse_time_column).astype(np.int32),
+        'distance': distance
+    }
+    
+    trains = {
+        'train_ids': train_ids,
+        'train_names': train_names,
+        'train_types': ['passenger'] * len(train_ids),
+        'source_codes': train_column('Source Station'),
+        'source_names': train_column('Source Station Name'),
+        'destination_codes': train_column('Destination Station'),
+        'destination_names': train_column('Destination Station Name')
+    }
+    
+    return {
+        'trains': trains,
+        'offsets': offsets,
+        'stops': stops,
+        'total_distance': total_distance
+    }
+
+
+def _intern_column(series, pool):
+    """str() every value and intern it; only distinct values are converted"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    ids = pool.intern_many([str(u) for u in uniques])
+    return ids[codes] if len(codes) else np.zeros(0, dtype=np.int32)
+
+
+def _map_unique(series, converter):
+    """Apply an array converter to the distinct values of a column and gather back"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    values = np.asarray(converter(np.asarray(uniques, dtype=object)), dtype=object)
+    return values[codes] if len(codes) else np.zeros(0, dtype=object)
+
+
+def _seq_value(values):
+    """SEQ as int where the row-wise parser accepts it, else NaN"""
+    out = []
+    for v in values:
+        try:
+            out.append(int(v) if pd.notna(v) and str(v).isdigit() else np.nan)
+        except (TypeError, ValueError):
+            out.append(np.nan)
+    return out
+
+
+def parse_time_column(values, scalar_parser=None, missing=('',)):
+    """
+    Column-wise HH:MM[:SS] -> minutes since midnight
+    
+    Well-formed strings are split and converted with str.split/to_numeric
+    in one pass. Anything else (NaN, blanks, odd formats) goes through the
+    scalar parser so results always match it exactly.
+    
+    Args:
+        values: array of raw time values
+        scalar_parser: per-value parser for irregular values
+                       (default convert_time_to_minutes)
+        missing: well-formed values that must still use the scalar parser
+    """
+    scalar_parser = scalar_parser or convert_time_to_minutes
+    text = pd.Series(values, dtype=object)
+    is_text = text.map(type).eq(str).to_numpy()
+    
+    result = np.empty(len(text), dtype=object)
+    fast = np.zeros(len(text), dtype=bool)
+    
+    if is_text.any():
+        parts = text[is_text].astype(str).str.split(':', n=2, expand=True)
+        if parts.shape[1] >= 2:
+            hours_text = parts[0].fillna('')
+            minutes_text = parts[1].fillna('')
+            well_formed = (
+                hours_text.str.fullmatch(r'[0-9]+') & minutes_text.str.fullmatch(r'[0-9]+')
+                & ~text[is_text].isin(missing)
+            ).to_numpy(dtype=bool)
             
-            route.append({
-                'seq': seq,
-                'station_code': str(row['Station Code']),
-                'station_name': str(row['Station Name']),
-                'arrival_time': str(row.get('Arrival time', '')),
-                'departure_time': str(row.get('Departure Time', '')),
-                'distance': float(row.get('Distance', 0)) if pd.notna(row.get('Distance')) else 0,
-                'arrival_minutes': convert_time_to_minutes(row.get('Arrival time', '00:00'))
-            })
-        
-        trains.append({
-            'train_id': str(train_no),
-            'train_name': str(first_row.get('Train Name', f'Train {train_no}')),
-            'train_type': 'passenger',
-            'source_code': str(first_row.get('Source Station', '')),
-            'source_name': str(first_row.get('Source Station Name', '')),
-            'destination_code': str(first_row.get('Destination Station', '')),
-            'destination_name': str(first_row.get('Destination Station Name', '')),
-            'total_distance': float(group['Distance'].max()) if len(group) > 0 else 0.0,
-            'total_stations': len(group),
-            'route': route
-        })
-    
-    print(f"Loaded {len(trains)} trains")
-    return trains
+            minutes = (
+                pd.to_numeric(hours_text.where(well_formed, '0')).to_numpy() * 60 +
+                pd.to_numeric(minutes_text.where(well_formed, '0')).to_numpy()
+            )
+            text_positions = np.flatnonzero(is_text)
+            fast[text_positions[well_formed]] = True
+            result[text_positions[well_formed]] = minutes[well_formed].tolist()
+    
+    for i in np.flatnonzero(~fast):
+        result[i] = scalar_parser(text.iat[i])
+    
+    return result
 
 
 def load_stations():
@@ -4,6 +4,7 @@ Converts CSV data into structured train schedule JSON
 """
 
 import pandas as pd
+import numpy as np
 import json
 from datetime import datetime, timedelta
 
@@ -45,54 +46,110 @@ class ScheduleBuilder:
             return None
     
     def build_train_schedules(self):
-        """Build structured train schedules"""
+        """Build structured train schedules (vectorized)
+        
+        One global sort by (train, SEQ) replaces the per-train groupby and
+        iterrows loop; output is identical to that loop (kept in benchmark.py).
+        """
+        from utils.data_loader import parse_time_column
+        
         print("Building train schedules...")
         
-        trains = {}
+        df = self.df
+        key_codes, key_uniques = pd.factorize(df['Train No'], sort=True)
+        seq = df['SEQ'].astype('int64').to_numpy()
+        
+        order = np.lexsort((seq, key_codes))
+        order = order[key_codes[order] >= 0]
+        sorted_codes = key_codes[order]
+        
+        # Train boundaries where the sorted train code changes
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1))
+        ends = np.concatenate((starts[1:], [len(order)]))
+        if not len(order):
+            starts = ends = starts[:0]
+        first_rows = order[starts]
+        last_rows = order[ends - 1]
+        
+        def raw(name):
+            return df[name].to_numpy(dtype=object)
+        
+        def minutes(name):
+            codes, uniques = pd.factorize(df[name], use_na_sentinel=False)
+            parsed = parse_time_column(
+                np.asarray(uniques, dtype=object),
+                scalar_parser=self.parse_time,
+                missing=('00:00:00',)
+            )
+            return parsed[codes[order]].tolist()
         
-        # Group by train number
-        grouped = self.df.groupby('Train No')
-        
-        for train_no, group in grouped:
-            # Sort by sequence
-            group = group.sort_values('SEQ')
-            
-            # Get train metadata
-            first_row = group.iloc[0]
-            train_name = first_row['Train Name']
-            train_type = self.determine_train_type(train_name)
-            
-            # Build route
-            route = []
-            for _, row in group.iterrows():
-                station = {
-                    'seq': int(row['SEQ']),
-                    'station_code': row['Station Code'],
-                    'station_name': row['Station Name'],
-                    'arrival_time': row['Arrival time'],
-                    'departure_time': row['Departure Time'],
-                    'distance': float(row['Distance']),
-                    'arrival_minutes': self.parse_time(row['Arrival time']),
-                    'departure_minutes': self.parse_time(row['Departure Time'])
-                }
-                route.append(station)
-            
-            # Create train object
-            train = {
+        distance = df['Distance'].astype(float).to_numpy()
+        
+        stop_rows = zip(
+            seq[order].tolist(),
+            raw('Station Code')[order].tolist(),
+            raw('Station Name')[order].tolist(),
+            raw('Arrival time')[order].tolist(),
+            raw('Departure Time')[order].tolist(),
+            distance[order].tolist(),
+            minutes('Arrival time'),
+            minutes('Departure Time')
+        )
+        stops = [
+            {
+                'seq': seq_no,
+                'station_code': code,
+                'station_name': name,
+                'arrival_time': arrival,
+                'departure_time': departure,
+                'distance': dist,
+                'arrival_minutes': arrival_min,
+                'departure_minutes': departure_min
+            }
+            for seq_no, code, name, arrival, departure, dist, arrival_min, departure_min in stop_rows
+        ]
+        
+        # Train type from the name, classified for all trains at once
+        train_names = pd.Series(raw('Train Name')[first_rows], dtype=object)
+        upper_names = train_names.str.upper()
+        train_types = np.where(
+            upper_names.str.contains('SF|EXPRESS|RAJDHANI', regex=True).fillna(False).to_numpy(dtype=bool),
+            'express',
+            np.where(
+                upper_names.str.contains('FREIGHT|FTR', regex=True).fillna(False).to_numpy(dtype=bool),
+                'freight', 'local'
+            )
+        ).tolist()
+        
+        train_rows = zip(
+            key_uniques[sorted_codes[starts]].tolist() if len(order) else [],
+            train_names.tolist(),
+            train_types,
+            raw('Source Station')[first_rows].tolist(),
+            raw('Source Station Name')[first_rows].tolist(),
+            raw('Destination Station')[first_rows].tolist(),
+            raw('Destination Station Name')[first_rows].tolist(),
+            distance[last_rows].tolist(),
+            starts.tolist(),
+            ends.tolist()
+        )
+        
+        trains = {}
+        for (train_no, train_name, train_type, source, source_name,
+             destination, destination_name, total_distance, start, end) in train_rows:
+            trains[str(train_no)] = {
                 'train_id': str(train_no),
                 'train_name': train_name,
                 'train_type': train_type,
                 'priority': self.get_priority(train_type),
-                'source_station': first_row['Source Station'],
-                'source_name': first_row['Source Station Name'],
-                'destination_station': first_row['Destination Station'],
-                'destination_name': first_row['Destination Station Name'],
-                'total_distance': float(group.iloc[-1]['Distance']),
-                'total_stations': len(route),
-                'route': route
+                'source_station': source,
+                'source_name': source_name,
+                'destination_station': destination,
+                'destination_name': destination_name,
+                'total_distance': total_distance,
+                'total_stations': end - start,
+                'route': stops[start:end]
             }
-            
-            trains[str(train_no)] = train
         
         print(f"Built schedules for {len(trains)} trains")
         return trains
@@ -0,0 +1,192 @@
+"""
+Station Registry
+Maps station codes to dense integer ids shared by all engines
+"""
+
+import threading
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance; arguments broadcast like NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class StationRegistry:
+    """
+    Dense integer ids for every known station.
+
+    Built from stations_geocoded.json plus any extra codes found in the
+    timetable. Engines keep per-station state in flat arrays indexed by
+    these ids and only turn ids back into codes/names at the API boundary.
+    """
+
+    MISSING = -1
+
+    # Distance used when either station has no coordinates
+    DEFAULT_DISTANCE_KM = 100.0
+
+    # Up to this many stations the full float32 matrix is built at once
+    # (4096 stations = 64 MB); beyond it rows are computed on first use
+    DENSE_DISTANCE_LIMIT = 4096
+
+    def __init__(self, codes, names, latitudes, longitudes):
+        self.codes = list(codes)
+        self.names = list(names)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        # Same rule as the old dict lookup: a falsy latitude means "no coordinates"
+        self.has_coordinates = np.nan_to_num(self.latitudes) != 0
+
+        self._translations = {}
+        self._distance_matrix = None
+        self._distance_rows = {}
+        self._distance_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def id_of(self, code):
+        """Integer id of a station code (MISSING if unknown)"""
+        return self.index.get(code, self.MISSING)
+
+    def ids_of(self, codes):
+        """Integer ids for a sequence of codes"""
+        index = self.index
+        return np.fromiter((index.get(c, self.MISSING) for c in codes), dtype=np.int32, count=len(codes))
+
+    def code(self, station_id):
+        return self.codes[station_id]
+
+    def name(self, station_id):
+        return self.names[station_id]
+
+    def translate(self, timetable):
+        """Registry ids for a Timetable's station_ids (cached per timetable version)"""
+        key = timetable.version
+        table = self._translations.get(key)
+        if table is None:
+            table = self.ids_of(timetable.station_codes)
+            self._translations[key] = table
+        return table[timetable.station_ids] if len(table) else np.zeros(0, dtype=np.int32)
+
+    def _distance_block(self, ids):
+        """float32 distances from each station in `ids` to every station"""
+        ids = np.asarray(ids)
+        block = haversine_km(
+            self.latitudes[ids, None], self.longitudes[ids, None],
+            self.latitudes[None, :], self.longitudes[None, :]
+        ).astype(np.float32)
+        missing = ~self.has_coordinates[ids, None] | ~self.has_coordinates[None, :]
+        block[missing] = self.DEFAULT_DISTANCE_KM
+        return block
+
+    def distance_matrix(self):
+        """Dense float32 station-to-station distance matrix (km), computed once"""
+        if self._distance_matrix is None:
+            with self._distance_lock:
+                if self._distance_matrix is None:
+                    self._distance_matrix = self._distance_block(np.arange(len(self)))
+        return self._distance_matrix
+
+    def distances_from(self, station_id):
+        """float32 distances (km) from one station to every station"""
+        if len(self) <= self.DENSE_DISTANCE_LIMIT:
+            return self.distance_matrix()[station_id]
+
+        row = self._distance_rows.get(station_id)
+        if row is None:
+            row = self._distance_block([station_id])[0]
+            with self._distance_lock:
+                self._distance_rows[station_id] = row
+        return row
+
+    def distance(self, id1, id2):
+        """Distance (km) between two station ids; default for unknown stations"""
+        if id1 < 0 or id2 < 0:
+            return self.DEFAULT_DISTANCE_KM
+        return float(self.distances_from(id1)[id2])
+
+    def pair_distances(self, ids1, ids2):
+        """Element-wise distances (km) for two equally shaped id arrays"""
+        ids1 = np.asarray(ids1)
+        ids2 = np.asarray(ids2)
+        if len(self) <= self.DENSE_DISTANCE_LIMIT:
+            return self.distance_matrix()[ids1, ids2]
+
+        result = haversine_km(
+            self.latitudes[ids1], self.longitudes[ids1],
+            self.latitudes[ids2], self.longitudes[ids2]
+        ).astype(np.float32)
+        result[~self.has_coordinates[ids1] | ~self.has_coordinates[ids2]] = self.DEFAULT_DISTANCE_KM
+        return result
+
+    @classmethod
+    def build(cls, stations=None, timetable=None, trains=None):
+        """
+        Build a registry from a stations dict and the timetable
+
+        Args:
+            stations: dict of code -> station info (latitude/longitude/name)
+            timetable: Timetable whose station codes must all be present
+            trains: iterable of train dicts (used when there is no Timetable)
+        """
+        codes = []
+        names = []
+        latitudes = []
+        longitudes = []
+        seen = set()
+
+        def add(code, name, latitude=None, longitude=None):
+            if code in seen:
+                return
+            seen.add(code)
+            codes.append(code)
+            names.append(name)
+            latitudes.append(latitude if latitude is not None else np.nan)
+            longitudes.append(longitude if longitude is not None else np.nan)
+
+        for code, info in (stations or {}).items():
+            add(code, info.get('name', code), info.get('latitude'), info.get('longitude'))
+
+        if timetable is not None:
+            for code in timetable.station_codes:
+                add(code, code)
+        elif trains is not None:
+            trains = trains.values() if isinstance(trains, dict) else trains
+            for train in trains:
+                for stop in train.get('route') or []:
+                    add(stop['station_code'], stop['station_code'])
+
+        return cls(codes, names, latitudes, longitudes)
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, stations, timetable=None):
+        """
+        Registry shared by every engine using the same stations dict and timetable
+
+        The API builds engines per request; this keeps one registry (and
+        everything cached on it) per dataset instead of one per request.
+        """
+        key = (id(stations), len(stations or {}), timetable.version if timetable is not None else None)
+        entry = cls._shared.get(key)
+        if entry is None:
+            with cls._shared_lock:
+                entry = cls._shared.get(key)
+                if entry is None:
+                    # Keep a reference to `stations` so its id() cannot be reused
+                    entry = (stations, cls.build(stations, timetable=timetable))
+                    cls._shared[key] = entry
+        return entry[1]
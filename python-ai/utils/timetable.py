@@ -0,0 +1,277 @@
+"""
+Timetable Store
+Columnar, array-backed storage of all train stops
+"""
+
+import hashlib
+import numpy as np
+from collections.abc import Sequence
+
+
+class StringPool:
+    """Interns repeated strings (station codes, names, times) to dense integer ids"""
+
+    def __init__(self, values=None):
+        self.values = []
+        self.index = {}
+        for value in values or []:
+            self.intern(value)
+
+    def intern(self, value):
+        """Return the id of a string, adding it to the pool if needed"""
+        pool_id = self.index.get(value)
+        if pool_id is None:
+            pool_id = len(self.values)
+            self.index[value] = pool_id
+            self.values.append(value)
+        return pool_id
+
+    def intern_many(self, values):
+        """Intern a sequence of strings and return their ids as an int32 array"""
+        return np.fromiter((self.intern(v) for v in values), dtype=np.int32, count=len(values))
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Timetable:
+    """
+    All stops of all trains held as flat NumPy arrays.
+
+    Stops of train i live in rows offsets[i]:offsets[i+1] (CSR layout),
+    so a full-network scan is a handful of array operations instead of a
+    walk over nested dicts. Strings are interned into pools and stored
+    as integer ids.
+    """
+
+    # Per-train metadata columns (Python lists of str)
+    TRAIN_COLUMNS = (
+        'train_ids', 'train_names', 'train_types',
+        'source_codes', 'source_names',
+        'destination_codes', 'destination_names'
+    )
+
+    # Per-stop columns (NumPy arrays, one row per stop) and their dtypes
+    STOP_DTYPES = {
+        'seq': np.int32,
+        'station_ids': np.int32,
+        'station_name_ids': np.int32,
+        'arrival_time_ids': np.int32,
+        'departure_time_ids': np.int32,
+        'arrival_minutes': np.int32,
+        'departure_minutes': np.int32,
+        'distance': np.float64,
+        'train_index': np.int32
+    }
+    STOP_COLUMNS = tuple(STOP_DTYPES)
+
+    def __init__(self, trains, offsets, stops, station_codes, station_names, time_strings, total_distance,
+                 version=None):
+        """
+        Args:
+            trains: dict of per-train metadata lists (see TRAIN_COLUMNS)
+            offsets: int64 array of length n_trains + 1
+            stops: dict of per-stop arrays (see STOP_COLUMNS, train_index optional)
+            station_codes: station id -> station code
+            station_names: station name id -> station name
+            time_strings: time id -> raw time string
+            total_distance: float64 array, one value per train
+            version: dataset version string (defaults to a content hash)
+        """
+        for column in self.TRAIN_COLUMNS:
+            setattr(self, column, list(trains[column]))
+
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.total_distance = np.asarray(total_distance, dtype=np.float64)
+
+        for column, dtype in self.STOP_DTYPES.items():
+            if column in stops and stops[column] is not None:
+                setattr(self, column, np.asarray(stops[column], dtype=dtype))
+
+        if stops.get('train_index') is None:
+            self.train_index = np.repeat(
+                np.arange(self.n_trains, dtype=np.int32), np.diff(self.offsets)
+            )
+
+        self.station_codes = list(station_codes)
+        self.station_names = list(station_names)
+        self.time_strings = list(time_strings)
+
+        self.station_index = {code: i for i, code in enumerate(self.station_codes)}
+        self._train_positions = None
+        self._version = version
+
+    @property
+    def n_trains(self):
+        return len(self.offsets) - 1
+
+    @property
+    def n_stops(self):
+        return int(self.offsets[-1])
+
+    @property
+    def version(self):
+        """Dataset version; changes whenever the stops change"""
+        if self._version is None:
+            digest = hashlib.sha1()
+            for column in ('offsets', 'station_ids', 'arrival_minutes', 'departure_minutes'):
+                digest.update(np.ascontiguousarray(getattr(self, column)).tobytes())
+            digest.update('\n'.join(self.station_codes).encode('utf-8'))
+            digest.update('\n'.join(self.train_ids).encode('utf-8'))
+            self._version = digest.hexdigest()[:16]
+        return self._version
+
+    @version.setter
+    def version(self, value):
+        self._version = value
+
+    @property
+    def nbytes(self):
+        """Bytes held by the numeric arrays"""
+        arrays = [self.offsets, self.total_distance] + [getattr(self, c) for c in self.STOP_COLUMNS]
+        return sum(a.nbytes for a in arrays)
+
+    def __len__(self):
+        return self.n_trains
+
+    def stop_slice(self, train_pos):
+        """Row range of one train's stops"""
+        return slice(int(self.offsets[train_pos]), int(self.offsets[train_pos + 1]))
+
+    def train_position(self, train_id):
+        """Position of a train id in the store, or None"""
+        if self._train_positions is None:
+            self._train_positions = {tid: i for i, tid in enumerate(self.train_ids)}
+        return self._train_positions.get(str(train_id))
+
+    def route(self, train_pos):
+        """Route of one train as a list of stop dicts (load_train_data format)"""
+        rows = self.stop_slice(train_pos)
+        codes = self.station_codes
+        names = self.station_names
+        times = self.time_strings
+
+        return [
+            {
+                'seq': seq,
+                'station_code': codes[sid],
+                'station_name': names[nid],
+                'arrival_time': times[aid],
+                'departure_time': times[did],
+                'distance': dist,
+                'arrival_minutes': arr
+            }
+            for seq, sid, nid, aid, did, dist, arr in zip(
+                self.seq[rows].tolist(),
+                self.station_ids[rows].tolist(),
+                self.station_name_ids[rows].tolist(),
+                self.arrival_time_ids[rows].tolist(),
+                self.departure_time_ids[rows].tolist(),
+                self.distance[rows].tolist(),
+                self.arrival_minutes[rows].tolist()
+            )
+        ]
+
+    def train(self, train_pos):
+        """One train as a dict (load_train_data format)"""
+        return {
+            'train_id': self.train_ids[train_pos],
+            'train_name': self.train_names[train_pos],
+            'train_type': self.train_types[train_pos],
+            'source_code': self.source_codes[train_pos],
+            'source_name': self.source_names[train_pos],
+            'destination_code': self.destination_codes[train_pos],
+            'destination_name': self.destination_names[train_pos],
+            'total_distance': float(self.total_distance[train_pos]),
+            'total_stations': int(self.offsets[train_pos + 1] - self.offsets[train_pos]),
+            'route': self.route(train_pos)
+        }
+
+    def as_dicts(self):
+        """List-of-dicts view for callers that expect load_train_data output"""
+        return TrainListView(self)
+
+    @classmethod
+    def empty(cls):
+        return cls.from_trains([])
+
+    @classmethod
+    def from_trains(cls, trains):
+        """Build a Timetable from load_train_data style dicts"""
+        from utils.data_loader import convert_time_to_minutes
+
+        station_pool = StringPool()
+        name_pool = StringPool()
+        time_pool = StringPool()
+
+        meta = {column: [] for column in cls.TRAIN_COLUMNS}
+        total_distance = []
+        offsets = [0]
+        stops = {column: [] for column in cls.STOP_COLUMNS if column != 'train_index'}
+
+        for train in trains:
+            meta['train_ids'].append(train['train_id'])
+            meta['train_names'].append(train['train_name'])
+            meta['train_types'].append(train.get('train_type', 'passenger'))
+            meta['source_codes'].append(train.get('source_code', ''))
+            meta['source_names'].append(train.get('source_name', ''))
+            meta['destination_codes'].append(train.get('destination_code', ''))
+            meta['destination_names'].append(train.get('destination_name', ''))
+            total_distance.append(train.get('total_distance', 0.0))
+
+            route = train.get('route') or []
+            for stop in route:
+                stops['seq'].append(stop['seq'])
+                stops['station_ids'].append(station_pool.intern(stop['station_code']))
+                stops['station_name_ids'].append(name_pool.intern(stop['station_name']))
+                stops['arrival_time_ids'].append(time_pool.intern(stop['arrival_time']))
+                stops['departure_time_ids'].append(time_pool.intern(stop['departure_time']))
+                stops['arrival_minutes'].append(stop.get('arrival_minutes', 0))
+                stops['departure_minutes'].append(convert_time_to_minutes(stop['departure_time']))
+                stops['distance'].append(stop['distance'])
+            offsets.append(offsets[-1] + len(route))
+
+        return cls(
+            meta, offsets, stops,
+            station_pool.values, name_pool.values, time_pool.values,
+            total_distance
+        )
+
+
+class TrainListView(Sequence):
+    """
+    Sequence of train dicts backed by a Timetable.
+
+    A train's dict is built from the arrays on first access and kept, so
+    repeated indexing or iteration returns the same objects without
+    rebuilding them, and changes made to them stay visible through this
+    view. They are not written back to the Timetable: code that reads
+    the arrays (`.timetable`) sees the loaded data, not the changes.
+    Only trains that are actually accessed are held as nested dicts.
+    """
+
+    def __init__(self, timetable):
+        self.timetable = timetable
+        self._rows = [None] * timetable.n_trains
+
+    def __len__(self):
+        return self.timetable.n_trains
+
+    def _row(self, index):
+        row = self._rows[index]
+        if row is None:
+            row = self._rows[index] = self.timetable.train(index)
+        return row
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('train index out of range')
+        return self._row(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._row(i)
@@ -0,0 +1,463 @@
+"""
+Timetable Cache
+Binary on-disk cache of the parsed timetable, keyed by the source CSV
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from utils.timetable import Timetable, StringPool
+
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_CACHE_DIR = Path(os.getenv(
+    'TIMETABLE_CACHE_DIR',
+    Path(__file__).parent.parent / 'data' / 'cache' / 'timetable'
+))
+
+# Arrays written as one .npy file each so they can be memory-mapped on load
+ARRAY_COLUMNS = ('offsets', 'total_distance') + Timetable.STOP_COLUMNS
+
+
+def file_fingerprint(csv_path, with_hash=True):
+    """Size, mtime and (optionally) content hash of the source file"""
+    stat = os.stat(csv_path)
+    fingerprint = {
+        'path': str(Path(csv_path).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        fingerprint['sha256'] = digest.hexdigest()
+    return fingerprint
+
+
+def cache_dir_for(csv_path, cache_root=None):
+    """Cache directory used for one source file (file name plus a hash of its full path)"""
+    resolved = str(Path(csv_path).resolve())
+    path_key = hashlib.sha1(resolved.encode('utf-8')).hexdigest()[:8]
+    return Path(cache_root or DEFAULT_CACHE_DIR) / f'{Path(csv_path).stem}-{path_key}'
+
+
+def _prepare_tmp_dir(cache_dir):
+    """Fresh build directory next to cache_dir, unique to this build"""
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=cache_dir.name + '.', suffix='.tmp', dir=cache_dir.parent))
+
+
+def _publish(tmp_dir, cache_dir):
+    """
+    Move a finished build into place with os.replace()
+
+    Any existing cache is first renamed aside, so readers never see a
+    half-written directory. If another process publishes in between,
+    its cache (built from the same source) is kept and this build is
+    discarded.
+
+    Returns:
+        True if this build was published
+    """
+    stale = None
+    if cache_dir.exists():
+        stale = Path(tempfile.mkdtemp(prefix=cache_dir.name + '.', suffix='.old', dir=cache_dir.parent))
+        try:
+            os.replace(cache_dir, stale)
+        except FileNotFoundError:
+            pass  # already moved aside by another publisher
+    try:
+        os.replace(tmp_dir, cache_dir)
+        published = True
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        published = False
+    if stale is not None:
+        shutil.rmtree(stale, ignore_errors=True)
+    return published
+
+
+def save_timetable(timetable, cache_dir, fingerprint, source_filter=None):
+    """Write a timetable to cache_dir (atomically replaces any old cache); see _publish()"""
+    cache_dir = Path(cache_dir)
+    tmp_dir = _prepare_tmp_dir(cache_dir)
+
+    for column in ARRAY_COLUMNS:
+        np.save(tmp_dir / f'{column}.npy', np.ascontiguousarray(getattr(timetable, column)))
+
+    _write_meta(
+        tmp_dir, fingerprint, timetable.version,
+        {column: getattr(timetable, column) for column in Timetable.TRAIN_COLUMNS},
+        timetable.station_codes, timetable.station_names, timetable.time_strings,
+        source_filter
+    )
+    return _publish(tmp_dir, cache_dir)
+
+
+def _write_meta(directory, fingerprint, version, trains, station_codes, station_names, time_strings,
+                source_filter=None):
+    meta = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'source': fingerprint,
+        'filter': source_filter,
+        'version': version,
+        'trains': trains,
+        'station_codes': station_codes,
+        'station_names': station_names,
+        'time_strings': time_strings
+    }
+    with open(Path(directory) / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def load_timetable_from_cache(cache_dir, meta=None, mmap=True):
+    """Load a cached timetable; arrays are memory-mapped read-only by default"""
+    cache_dir = Path(cache_dir)
+    if meta is None:
+        with open(cache_dir / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {
+        column: np.load(cache_dir / f'{column}.npy', mmap_mode=mmap_mode)
+        for column in ARRAY_COLUMNS
+    }
+    stops = {column: arrays[column] for column in Timetable.STOP_COLUMNS}
+
+    return Timetable(
+        meta['trains'], arrays['offsets'], stops,
+        meta['station_codes'], meta['station_names'], meta['time_strings'],
+        arrays['total_distance'],
+        version=meta['version']
+    )
+
+
+def read_cache_meta(cache_dir):
+    """Metadata of an existing cache, or None"""
+    meta_path = Path(cache_dir) / 'meta.json'
+    if not meta_path.exists():
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta
+
+
+def is_cache_valid(meta, csv_path, source_filter=None):
+    """Check a cache against its source file
+
+    Size and mtime match -> valid without reading the CSV. If only the
+    mtime changed (file touched or copied), fall back to the content hash.
+    """
+    if not meta or meta.get('format_version') != CACHE_FORMAT_VERSION:
+        return False
+    if meta.get('filter') != source_filter:
+        return False
+
+    source = meta.get('source') or {}
+    current = file_fingerprint(csv_path, with_hash=False)
+    if current['size'] != source.get('size'):
+        return False
+    if current['mtime_ns'] == source.get('mtime_ns'):
+        return True
+
+    return file_fingerprint(csv_path)['sha256'] == source.get('sha256')
+
+
+def build_cache(csv_path, cache_root=None, chunksize=None):
+    """Parse the CSV and (re)write its cache; returns the timetable
+
+    With chunksize set the CSV is streamed (see stream_timetable) and the
+    returned timetable is memory-mapped from the new cache.
+    """
+    from utils.data_loader import load_timetable
+
+    cache_dir = cache_dir_for(csv_path, cache_root)
+    if chunksize:
+        return stream_timetable(csv_path, cache_dir, chunksize=chunksize)
+
+    fingerprint = file_fingerprint(csv_path)
+    timetable = load_timetable(csv_path)
+    timetable.version = fingerprint['sha256'][:16]
+
+    if save_timetable(timetable, cache_dir, fingerprint):
+        print(f"Timetable cache written to {cache_dir}")
+    else:
+        print(f"Timetable cache {cache_dir} was published by another process first; keeping it")
+    return timetable
+
+
+class StreamingTimetableWriter:
+    """
+    Writes a timetable cache incrementally, one frame of complete trains at a time
+
+    Per-stop columns are appended straight to their .npy files, so memory
+    use does not grow with the number of stops; only per-train metadata
+    and the string pools are held until close(). close() brings the
+    result into the same layout as load_timetable() (trains in
+    train-number order, string ids in order of first use), rewriting the
+    stop files block by block if the file order differs.
+    """
+
+    # Fixed .npy header size, rewritten with the final length on close()
+    HEADER_BYTES = 128
+
+    # Stops gathered per block when close() reorders the stop files
+    BLOCK_ROWS = 1 << 20
+
+    # Pool of each group of id columns, in the order load_timetable() interns them
+    POOL_COLUMNS = (
+        ('station_ids',),
+        ('station_name_ids',),
+        ('arrival_time_ids', 'departure_time_ids')
+    )
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.tmp_dir = _prepare_tmp_dir(self.output_dir)
+
+        self.pools = (StringPool(), StringPool(), StringPool())
+        self.trains = {column: [] for column in Timetable.TRAIN_COLUMNS}
+        self.offsets = [0]
+        self.total_distance = []
+        self.n_stops = 0
+        self.train_keys = []
+
+        self.files = {}
+        for column, dtype in Timetable.STOP_DTYPES.items():
+            f = open(self.tmp_dir / f'{column}.npy', 'wb')
+            f.write(self._npy_header(dtype, 0))
+            self.files[column] = f
+
+    @classmethod
+    def _npy_header(cls, dtype, length):
+        header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.dtype(dtype).str, length)
+        padding = cls.HEADER_BYTES - 10 - len(header) - 1
+        return (b'\x93NUMPY\x01\x00' + struct.pack('<H', cls.HEADER_BYTES - 10) +
+                header.encode('latin1') + b' ' * padding + b'\n')
+
+    def append_frame(self, df):
+        """Ingest one frame of complete trains"""
+        from utils.data_loader import ingest_frame
+
+        parts = ingest_frame(df, *self.pools, sort_trains=False)
+        first_train = len(self.offsets) - 1
+        # Raw train numbers in the order ingest_frame() emitted the trains
+        self.train_keys.append(pd.Series(df['Train No'].dropna().unique()))
+
+        stops = dict(parts['stops'])
+        stops['train_index'] = np.repeat(
+            np.arange(first_train, first_train + len(parts['offsets']) - 1),
+            np.diff(parts['offsets'])
+        )
+        for column, dtype in Timetable.STOP_DTYPES.items():
+            np.ascontiguousarray(stops[column], dtype=dtype).tofile(self.files[column])
+
+        for column in Timetable.TRAIN_COLUMNS:
+            self.trains[column].extend(parts['trains'][column])
+        self.offsets.extend((np.asarray(parts['offsets'][1:]) + self.n_stops).tolist())
+        self.total_distance.extend(np.asarray(parts['total_distance']).tolist())
+        self.n_stops = self.offsets[-1]
+
+    def close(self, fingerprint, version, source_filter=None):
+        """Finalize headers and metadata and publish the cache directory; see _publish()"""
+        for column, dtype in Timetable.STOP_DTYPES.items():
+            f = self.files[column]
+            f.seek(0)
+            f.write(self._npy_header(dtype, self.n_stops))
+            f.close()
+        self._canonicalize()
+
+        np.save(self.tmp_dir / 'offsets.npy', np.asarray(self.offsets, dtype=np.int64))
+        np.save(self.tmp_dir / 'total_distance.npy', np.asarray(self.total_distance, dtype=np.float64))
+
+        station_pool, name_pool, time_pool = self.pools
+        _write_meta(
+            self.tmp_dir, fingerprint, version, self.trains,
+            station_pool.values, name_pool.values, time_pool.values,
+            source_filter
+        )
+        return _publish(self.tmp_dir, self.output_dir)
+
+    def abort(self):
+        """Close and delete the partial output; any published cache is left as it was"""
+        for f in self.files.values():
+            f.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _canonicalize(self):
+        """Reorder trains and string ids as load_timetable() would have"""
+        offsets = np.asarray(self.offsets, dtype=np.int64)
+        if self.train_keys:
+            codes, _ = pd.factorize(pd.concat(self.train_keys, ignore_index=True), sort=True)
+            order = np.argsort(codes, kind='stable')
+        else:
+            order = np.zeros(0, dtype=np.int64)
+        lengths = np.diff(offsets)[order]
+        new_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+        def blocks():
+            """(first train, end train, old rows) in the new order, about BLOCK_ROWS stops each"""
+            start = 0
+            while start < len(order):
+                end = int(np.searchsorted(new_offsets, new_offsets[start] + self.BLOCK_ROWS, side='right')) - 1
+                end = min(max(end, start + 1), len(order))
+                shift = np.repeat(offsets[order[start:end]] - new_offsets[start:end], lengths[start:end])
+                yield start, end, shift + np.arange(new_offsets[start], new_offsets[end])
+                start = end
+
+        def stop_file(column):
+            return np.load(self.tmp_dir / f'{column}.npy', mmap_mode='r')
+
+        # Old id -> new id per pool, numbering strings by first use in the new row order
+        remaps = {}
+        for pool, columns in zip(self.pools, self.POOL_COLUMNS):
+            seen = np.zeros(len(pool), dtype=bool)
+            first_use = []
+            for column in columns:
+                ids = stop_file(column)
+                for _, _, rows in blocks():
+                    block = ids[rows]
+                    unique, first = np.unique(block, return_index=True)
+                    new = ~seen[unique]
+                    first_use.extend(block[np.sort(first[new])].tolist())
+                    seen[unique] = True
+                del ids
+            first_use.extend(np.flatnonzero(~seen).tolist())
+            remap = np.empty(len(pool), dtype=np.int32)
+            remap[first_use] = np.arange(len(pool), dtype=np.int32)
+            pool.values = [pool.values[i] for i in first_use]
+            pool.index = {value: i for i, value in enumerate(pool.values)}
+            for column in columns:
+                remaps[column] = remap
+
+        in_order = np.array_equal(order, np.arange(len(order)))
+        if in_order and all(np.array_equal(remap, np.arange(len(remap))) for remap in remaps.values()):
+            return
+
+        for column, dtype in Timetable.STOP_DTYPES.items():
+            source = stop_file(column)
+            target = self.tmp_dir / f'{column}.npy.sorted'
+            with open(target, 'wb') as f:
+                f.write(self._npy_header(dtype, self.n_stops))
+                for start, end, rows in blocks():
+                    if column == 'train_index':
+                        values = np.repeat(np.arange(start, end), lengths[start:end])
+                    else:
+                        values = source[rows]
+                        if column in remaps:
+                            values = remaps[column][values]
+                    np.ascontiguousarray(values, dtype=dtype).tofile(f)
+            del source
+            os.replace(target, self.tmp_dir / f'{column}.npy')
+
+        order_list = order.tolist()
+        for column in Timetable.TRAIN_COLUMNS:
+            values = self.trains[column]
+            self.trains[column] = [values[i] for i in order_list]
+        self.total_distance = [self.total_distance[i] for i in order_list]
+        self.offsets = new_offsets.tolist()
+
+
+def stream_timetable(csv_path, output_dir, chunksize=100000, source_station=None, dest_station=None):
+    """
+    Bounded-memory ingestion of an arbitrarily large timetable CSV
+
+    The file is read with pd.read_csv(chunksize=...), trains are carried
+    across chunk boundaries, the optional source/destination filter is
+    applied while streaming and columns are written to output_dir as they
+    are produced. The result matches load_timetable() on the same rows:
+    trains in train-number order, so a cache has the same layout whichever
+    way it was built. Streaming needs the file grouped by train; if it is
+    not, the whole file is read into one frame instead (no memory bound).
+
+    Returns:
+        the resulting Timetable, memory-mapped from output_dir
+    """
+    from utils.data_loader import DataLoader, NotGroupedError, timetable_from_dataframe
+
+    source_filter = None
+    if source_station or dest_station:
+        source_filter = {'source_station': source_station, 'dest_station': dest_station}
+
+    fingerprint = file_fingerprint(csv_path)
+    version_key = fingerprint['sha256'] + json.dumps(source_filter, sort_keys=True)
+    version = hashlib.sha256(version_key.encode('utf-8')).hexdigest()[:16] if source_filter \
+        else fingerprint['sha256'][:16]
+
+    print(f"Streaming {csv_path} in chunks of {chunksize} rows...")
+    writer = StreamingTimetableWriter(output_dir)
+    loader = DataLoader(csv_path)
+    try:
+        for frame in loader.iter_train_chunks(chunksize, source_station, dest_station):
+            writer.append_frame(frame)
+    except NotGroupedError as e:
+        writer.abort()
+        print(f"Warning: {e}; reading the whole file instead")
+        df = pd.read_csv(csv_path, low_memory=False)
+        if source_filter:
+            df = df[(df['Source Station'] == source_station) | (df['Destination Station'] == dest_station)]
+        timetable = timetable_from_dataframe(df)
+        timetable.version = version
+        save_timetable(timetable, output_dir, fingerprint, source_filter)
+    else:
+        writer.close(fingerprint, version, source_filter)
+
+    timetable = load_timetable_from_cache(output_dir)
+    print(f"Timetable: {timetable.n_trains} trains, {timetable.n_stops} stops written to {output_dir}")
+    return timetable
+
+
+def load_cached_timetable(csv_path=None, cache_root=None):
+    """
+    Load the timetable through the binary cache
+
+    Returns:
+        (timetable, info) where info reports 'status' ('hit', 'miss' or
+        'no_source'), 'load_ms' and the cache directory
+    """
+    from utils.data_loader import find_train_csv
+
+    start = time.perf_counter()
+    csv_path = csv_path or find_train_csv()
+
+    if not csv_path:
+        print("Warning: Train_details.csv not found, using empty dataset")
+        return Timetable.empty(), {'status': 'no_source', 'load_ms': 0.0, 'cache_dir': None}
+
+    cache_dir = cache_dir_for(csv_path, cache_root)
+
+    meta = read_cache_meta(cache_dir)
+
+    if is_cache_valid(meta, csv_path):
+        try:
+            timetable = load_timetable_from_cache(cache_dir, meta)
+            status = 'hit'
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: timetable cache unreadable ({e}), rebuilding")
+            timetable = build_cache(csv_path, cache_root)
+            status = 'miss'
+    else:
+        timetable = build_cache(csv_path, cache_root)
+        status = 'miss'
+
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"Timetable cache {status} ({load_ms:.1f} ms)")
+
+    return timetable, {
+        'status': status,
+        'load_ms': round(load_ms, 2),
+        'cache_dir': str(cache_dir)
+    }
@@ -0,0 +1,51 @@
+"""
+Worker Pool
+Lazily started process pool kept by an engine and reused across calls
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class WorkerPool:
+    """
+    One ProcessPoolExecutor per owner, started on first use and reused by
+    every later call, so requests do not pay the process start-up each time.
+
+    Workers are not forked from the owner: it may run inside a threaded
+    server, and a forked child would inherit its locks in whatever state
+    other threads left them. They come from a single-threaded fork server
+    instead (spawned where that is unavailable). Asking for a different
+    worker count replaces the pool.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._workers = 0
+        self._lock = threading.Lock()
+
+    def get(self, workers: int) -> ProcessPoolExecutor:
+        """Running pool with `workers` processes"""
+        with self._lock:
+            if self._pool is None or self._workers != workers:
+                if self._pool is not None:
+                    self._pool.shutdown()
+                self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=_context())
+                self._workers = workers
+            return self._pool
+
+    def shutdown(self):
+        """Stop the worker processes; the next get() starts a new pool"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = None
+            self._workers = 0
+